@@ -0,0 +1,142 @@
+"""
+Speed benchmark for removing duplicate recordings from an artist's discography.
+
+Times `remove_duplicate_recordings` against a copy of the original implementation, which compared every recording
+with every other one and removed duplicates from a list, on synthetic discographies from 100 to 50,000 recordings.
+The synthetic recordings have the same mix as a large discography: most songs released several times on singles
+and compilations, with live, remix, demo and instrumental versions. The original implementation is skipped for
+the larger sizes since it takes minutes, and where both are run their results are checked to be the same.
+
+Run from the repository root with `python -m benchmarks.duplicate_removal [LARGEST_NUMBER_OF_RECORDINGS]`.
+"""
+import contextlib
+import io
+import random
+import sys
+from time import perf_counter
+
+import flags
+from helpers.data import Artist, ReleaseRegistry, Track
+from helpers.data_cleanup_helpers import (
+    is_non_artist_song,
+    is_re_release_or_instrumental,
+    remove_duplicate_recordings,
+    remove_from_releases,
+)
+
+ARTIST_ID = "b7ffd2af-418f-4be2-bdd1-22f8b48613da"
+SIZES = (100, 1000, 5000, 10000, 50000)
+# The original implementation takes minutes beyond this many recordings
+LEGACY_LIMIT = 10000
+VARIANTS = ("", "", "", " (live)", " (remix)", " (demo)", " (instrumental)", " - Live at Woodstock", " (2010 remaster)")
+RELEASE_NAMES = ("{song}", "{song}", "Greatest Hits", "Live in {year}", "{song} Remixes", "Deluxe Edition")
+
+
+def legacy_remove_duplicate_recordings(raw_recordings_data: [Track], artist: Artist) -> [Track]:
+    """
+    The original `remove_duplicate_recordings`, only changed to use the artist's registry of releases. It shares the
+    current `is_re_release_or_instrumental`, so the difference in time is only from comparing every pair.
+    """
+    original_length = len(raw_recordings_data)
+
+    output_data = raw_recordings_data.copy()
+
+    print("Cleaning duplicate tracks...")
+
+    # Loop over every recording we have
+    for recording in raw_recordings_data:
+        # Quick sanity check to see if a track with the wrong artist ID has slipped through the search filters
+        if is_non_artist_song(recording, artist):
+            if flags.IS_VERBOSE:
+                if flags.IS_VERBOSE:
+                    print(f"{recording} is not by the artist {artist.name} - removing.")
+                if recording in output_data:
+                    output_data.remove(recording)
+                    remove_from_releases(recording, artist.releases)
+            continue
+
+        search_term = recording.name
+
+        # Find any recordings with similar names
+        similar_recordings = []
+        for track in raw_recordings_data:
+            substring = track.name.find(search_term)
+            if substring != -1:
+                if track.mb_id == recording.mb_id:
+                    continue
+                else:
+                    similar_recordings.append(track)
+
+        # Look for instrumental, live, remix, etc. track variants
+        if similar_recordings:
+            for sim in similar_recordings:
+                if is_re_release_or_instrumental(sim):
+                    if flags.IS_VERBOSE:
+                        print(f"Removing {sim}! as it is likely a remix, instrumental, or live version.")
+                    if sim in output_data:
+                        output_data.remove(sim)
+                        remove_from_releases(sim, artist.releases)
+                    continue
+                else:
+                    if sim.name == recording.name:
+                        if flags.IS_VERBOSE:
+                            print(f"Removing re-released track: {sim}")
+                            if sim in output_data:
+                                output_data.remove(sim)
+                                remove_from_releases(sim, artist.releases)
+                        continue
+
+    print(f"Removed {original_length - len(output_data)} duplicates, remixes, or live tracks")
+
+    return output_data
+
+
+def make_recordings(recording_count: int, releases: ReleaseRegistry, seed: int = 1) -> [Track]:
+    """Recordings of songs released several times over, with variants and a few recordings by other artists."""
+    rng = random.Random(seed)
+    song_count = max(recording_count // 6, 1)
+    recordings = []
+    for index in range(recording_count):
+        song = f"Song {rng.randrange(song_count)}"
+        year = rng.randint(1989, 2020)
+        release_name = rng.choice(RELEASE_NAMES).format(song=song, year=year)
+        recordings.append(Track(releases=releases, raw_data={
+            "id": f"{index:08d}-0000-4000-8000-000000000000",
+            "title": song + rng.choice(VARIANTS),
+            "artist-credit": [{"artist": {"id": ARTIST_ID if rng.random() > 0.02 else "other"}}],
+            "releases": [{
+                "id": f"{release_name}-{year}",
+                "title": release_name,
+                "date": f"{year}-03-08",
+                "release-group": {"primary-type": "Album"},
+            }],
+        }))
+    return recordings
+
+
+def time_removal(remove, recording_count: int) -> (float, [str]):
+    artist = Artist("", "Nine Inch Nails", ARTIST_ID, "")
+    recordings = make_recordings(recording_count, artist.releases)
+    with contextlib.redirect_stdout(io.StringIO()):
+        timer_start = perf_counter()
+        kept = remove(recordings, artist)
+        seconds = perf_counter() - timer_start
+    return seconds, [track.mb_id for track in kept]
+
+
+def main(largest_size: int) -> None:
+    print(f"{'Recordings':>10} {'Original':>12} {'Indexed':>12}")
+    for size in SIZES:
+        if size > largest_size:
+            break
+        seconds, kept = time_removal(remove_duplicate_recordings, size)
+        legacy = "skipped"
+        if size <= LEGACY_LIMIT:
+            legacy_seconds, legacy_kept = time_removal(legacy_remove_duplicate_recordings, size)
+            assert kept == legacy_kept, f"Different recordings removed from {size} recordings"
+            legacy = f"{legacy_seconds:.3f}s"
+        print(f"{size:>10} {legacy:>12} {seconds:>11.3f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1])
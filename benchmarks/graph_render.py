@@ -0,0 +1,86 @@
+"""
+Speed benchmark for saving the word count graph.
+
+Times `plot_data` saving an SVG with the non-interactive backend against the original graph, which scattered one
+point for every song, on synthetic discographies from 100 to 100,000 songs released over 30 years. Above
+`MAX_SCATTER_POINTS` songs `plot_data` draws each year's median and interquartile range instead, so its time
+should stay about the same as the number of songs grows.
+
+Run from the repository root with `python -m benchmarks.graph_render [LARGEST_NUMBER_OF_SONGS]`.
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+from matplotlib.figure import Figure
+
+from helpers.calculation_helpers import plot_data
+from helpers.data import Artist, ReleaseRegistry, Track
+from helpers.track_table import TrackTable
+
+SIZES = (100, 1000, 10000, 100000)
+FIRST_YEAR = 1989
+YEARS = 30
+
+
+def legacy_save_graph(track_table: TrackTable, average_word_count: int, artist: Artist, output_path: str) -> None:
+    """The original graph of one point per song, drawn on a Figure so it can be saved without a window."""
+    rows = track_table.dated_rows_by_year()
+    xs = track_table.years[rows]
+    ys = track_table.word_counts[rows]
+    fig = Figure()
+    ax = fig.subplots()
+    ax.set_title(f"Word count of {artist.name} songs over time.")
+    ax.scatter(xs, ys)
+    ax.plot([xs[0], xs[-1]], [average_word_count, average_word_count], 'k--')
+    fig.savefig(output_path)
+
+
+def make_table(track_count: int, seed: int = 1) -> TrackTable:
+    rng = random.Random(seed)
+    releases = ReleaseRegistry()
+    tracks = []
+    for index in range(track_count):
+        year = FIRST_YEAR + rng.randrange(YEARS)
+        track = Track(releases=releases, raw_data={
+            "id": f"{index:08d}-0000-4000-8000-000000000000",
+            "title": f"Song {index}",
+            "artist-credit": [{"artist": {"id": "artist"}}],
+            "releases": [{"id": str(year), "title": "Album", "date": f"{year}-03-08",
+                          "release-group": {"primary-type": "Album"}}],
+        })
+        track.word_count = int(rng.lognormvariate(5.3, 0.5))
+        tracks.append(track)
+    return TrackTable(tracks)
+
+
+def time_graph(save_graph, track_table: TrackTable, output_path: str) -> float:
+    artist = Artist("", "Nine Inch Nails", "artist", "")
+    average_word_count = int(track_table.word_counts.mean())
+    with contextlib.redirect_stdout(io.StringIO()):
+        timer_start = perf_counter()
+        save_graph(track_table, average_word_count, artist, output_path)
+        return perf_counter() - timer_start
+
+
+def main(largest_size: int) -> None:
+    print(f"{'Songs':>10} {'Original':>12} {'Aggregated':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, "graph.svg")
+        # The first graph drawn loads the fonts, so draw one before timing any
+        time_graph(plot_data, make_table(10), output_path)
+        for size in SIZES:
+            if size > largest_size:
+                break
+            track_table = make_table(size)
+            legacy_seconds = time_graph(legacy_save_graph, track_table, output_path)
+            seconds = time_graph(plot_data, track_table, output_path)
+            print(f"{size:>10} {legacy_seconds:>11.3f}s {seconds:>11.3f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1])
@@ -0,0 +1,81 @@
+"""
+Speed benchmark for the lyrics metrics calculated when a Track's lyrics are set.
+
+Times three ways of analysing the same synthetic lyrics (shaped like lyrics.ovh responses, with \\r\\n line endings
+and blank lines between verses): the original setter, which only counted words by splitting on single spaces,
+a straightforward version of the current metrics that scans the lyrics once per metric, and `analyse_lyrics`, which
+splits the lowercased lyrics once and only counts each word's uses when the top words are wanted. The setter doesn't
+want them, so `analyse_lyrics` without top words is the time added to setting each track's lyrics. The word counts
+are compared too, since splitting on single spaces counted every extra space and blank line as a word.
+
+Run from the repository root with `python -m benchmarks.lyrics_analysis [NUMBER_OF_SONGS]`.
+"""
+import random
+import sys
+from collections import Counter
+from time import perf_counter
+
+from helpers.lyrics_analysis import analyse_lyrics, _word_punctuation
+
+VOCABULARY_SIZE = 2000
+
+
+def make_lyrics(rng: random.Random) -> str:
+    """A song of a few verses of lines of words, separated the way lyrics.ovh separates them."""
+    verses = []
+    for _ in range(rng.randint(2, 6)):
+        lines = []
+        for _ in range(rng.randint(4, 8)):
+            words = [f"word{int(rng.paretovariate(1.2)) % VOCABULARY_SIZE}" for _ in range(rng.randint(3, 10))]
+            if rng.random() < 0.3:
+                words[-1] += rng.choice(",.!?")
+            lines.append(" ".join(words))
+        verses.append("\r\n".join(lines))
+    return "\r\n\r\n".join(verses) + "\r\n"
+
+
+def original_setter(lyrics: str) -> int:
+    escaped_lyrics = lyrics.replace("\n", " ").replace("\r", " ")
+    return len(escaped_lyrics.split(" "))
+
+
+def multi_pass(lyrics: str):
+    words = lyrics.split()
+    vocabulary = Counter(word.strip(_word_punctuation).lower() for word in words)
+    vocabulary.pop("", None)
+    line_count = sum(1 for line in lyrics.splitlines() if line.strip())
+    return len(words), len(vocabulary), line_count, vocabulary.most_common(10)
+
+
+def time_per_song(analyse, songs: [str], repeats: int = 15) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        timer_start = perf_counter()
+        for lyrics in songs:
+            analyse(lyrics)
+        best = min(best, perf_counter() - timer_start)
+    return best / len(songs)
+
+
+def main(song_count: int) -> None:
+    rng = random.Random(1)
+    songs = [make_lyrics(rng) for _ in range(song_count)]
+
+    results = [
+        ("Original setter (word count only)", time_per_song(original_setter, songs)),
+        ("One scan per metric", time_per_song(multi_pass, songs)),
+        ("analyse_lyrics, no top words", time_per_song(lambda lyrics: analyse_lyrics(lyrics, top_n=0), songs)),
+        ("analyse_lyrics, top 10 words", time_per_song(analyse_lyrics, songs)),
+    ]
+
+    print(f"{song_count} songs, {sum(map(len, songs)) / song_count:.0f} characters per song")
+    for name, seconds in results:
+        print(f"{name:<40} {seconds * 1e6:8.1f} µs per song")
+
+    original_words = sum(map(original_setter, songs))
+    words = sum(analyse_lyrics(lyrics, top_n=0).word_count for lyrics in songs)
+    print(f"Original setter counted {original_words} words, {original_words - words} more than the {words} there are")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
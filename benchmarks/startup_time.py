@@ -0,0 +1,84 @@
+"""
+Startup benchmark for the command line program.
+
+Runs `python -X importtime main.py --help` several times and adds up the time spent importing the modules the
+program loads itself, leaving out the interpreter's own startup. The plotting, numerical and network stacks
+(matplotlib, numpy, aiohttp, musicbrainzngs, and backoff) took most of the startup time when they were imported
+up front, so the benchmark also checks none of them, or the response cache's sqlite3 and orjson, are imported just
+to show the help.
+
+Exits with an error if the median import time is over the budget or a heavy module is imported, so it can be
+used to catch startup regressions. Run from the repository root with
+`python -m benchmarks.startup_time [BUDGET_MILLISECONDS]`.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+RUNS = 5
+DEFAULT_BUDGET_MS = 100
+HEAVY_MODULES = ("matplotlib", "numpy", "aiohttp", "musicbrainzngs", "backoff", "PyQt5", "sqlite3", "orjson")
+
+
+def parse_import_times(importtime_output: str) -> ({str: int}, {str: int}):
+    """
+    Find the imports made after the interpreter's startup in the output of `python -X importtime`.
+    :param importtime_output: What the program wrote to stderr.
+    :return: A tuple of a dict of each module imported directly by the program to the microseconds taken to import
+        it, including any modules it imported itself, and the same for every module imported after startup.
+    """
+    top_level_times = {}
+    all_modules = {}
+    started = False
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            # The column headings
+            continue
+        module = name.strip()
+        if started:
+            all_modules[module] = int(cumulative)
+        # Nested imports are indented under the module that imported them
+        is_top_level = not name.startswith("  ")
+        if started and is_top_level:
+            top_level_times[module] = int(cumulative)
+        # Everything up to and including the site module is the interpreter starting up
+        if module == "site":
+            started = True
+    return top_level_times, all_modules
+
+
+def measure_startup() -> ({str: int}, {str}):
+    """Run the program's help once, returning its top level import times and every module it imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", MAIN_SCRIPT, "--help"], capture_output=True, text=True, check=True
+    )
+    top_level_times, all_modules = parse_import_times(result.stderr)
+    return top_level_times, set(all_modules)
+
+
+def main(budget_ms: float) -> None:
+    totals = []
+    for _ in range(RUNS):
+        top_level_times, modules = measure_startup()
+        totals.append(sum(top_level_times.values()) / 1000)
+
+    print(f"{'Module':<40} {'Import time':>12}")
+    for module, microseconds in sorted(top_level_times.items(), key=lambda item: -item[1])[:10]:
+        print(f"{module:<40} {microseconds / 1000:>10.1f}ms")
+    median_ms = statistics.median(totals)
+    print(f"Median import time over {RUNS} runs: {median_ms:.1f}ms (budget {budget_ms:g}ms)")
+
+    heavy_imports = sorted({module.split(".")[0] for module in modules}.intersection(HEAVY_MODULES))
+    if heavy_imports:
+        sys.exit(f"Heavy modules imported at startup: {', '.join(heavy_imports)}")
+    if median_ms > budget_ms:
+        sys.exit(f"Startup took {median_ms:.1f}ms, over the budget of {budget_ms:g}ms")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS)
@@ -0,0 +1,157 @@
+"""
+Memory benchmark for the Track and Release objects built from the recordings data.
+
+Builds the same synthetic recordings pages (shaped like the MusicBrainz recordings search responses, with several
+releases per recording) into Track objects three times: with a replica of the original classes, which kept a
+__dict__ and the full recording dict on every object, then with the replica fed the trimmed recordings, and then
+with the current slotted classes. Lyrics aren't set since they take the same space either way.
+
+Run from the repository root with `python -m benchmarks.track_memory [NUMBER_OF_TRACKS]`.
+"""
+import gc
+import json
+import sys
+import tracemalloc
+
+from helpers.data import ReleaseRegistry, Track
+from helpers.data_collection_helpers import trim_recording_data
+
+RELEASES_PER_RECORDING = 5
+ALBUMS = 200
+
+
+class LegacyRelease:
+    def __init__(self, raw_data: dict):
+        self.raw_data = raw_data
+        self.name = self.raw_data.get("title")
+        self.mb_id = self.raw_data.get("id")
+        self.date = self.raw_data.get("date")
+        self.release_type = self.raw_data.get("release-group").get("primary-type")
+        self.tracks = []
+
+
+class LegacyTrack:
+    def __init__(self, raw_data: dict, known_releases: dict):
+        self.raw_data: dict = raw_data
+        self.name: str = self.raw_data.get("title")
+        self.mb_id: str = self.raw_data.get("id")
+        # The original searched a global list of releases, a dict gives the same objects without the quadratic scan
+        release_data = self.raw_data.get("releases")[0]
+        release = known_releases.get(release_data.get("id"))
+        if release is None:
+            release = LegacyRelease(raw_data=release_data)
+            known_releases[release.mb_id] = release
+        release.tracks.append(self)
+        self.release = release
+        self.word_count: int = 0
+
+
+def make_recording(index: int) -> dict:
+    """A recording dict with the fields the MusicBrainz recordings search returns."""
+    album = index % ALBUMS
+    artist = {
+        "id": "b7ffd2af-418f-4be2-bdd1-22f8b48613da",
+        "name": "Nine Inch Nails",
+        "sort-name": "Nine Inch Nails",
+        "disambiguation": "",
+    }
+    return {
+        "id": f"{index:08d}-0000-4000-8000-000000000000",
+        "score": 100,
+        "title": f"Song {index % (ALBUMS * 12)}",
+        "length": 240000 + index,
+        "video": None,
+        "first-release-date": "1994-03-08",
+        "artist-credit": [{"name": "Nine Inch Nails", "artist": artist}],
+        "isrcs": [f"USIR1940{index:04d}"],
+        "releases": [
+            {
+                "id": f"{album:08d}-{release:04d}-4000-8000-000000000000",
+                "status-id": "4e304316-386d-3409-af2e-78857eec5cfe",
+                "count": 1,
+                "title": f"Album {album}",
+                "status": "Official",
+                "artist-credit": [{"name": "Nine Inch Nails", "artist": artist}],
+                "release-group": {
+                    "id": f"{album:08d}-0000-4000-8000-000000000000",
+                    "type-id": "f529b476-6e62-324f-b0aa-1f3e33d313fc",
+                    "primary-type-id": "f529b476-6e62-324f-b0aa-1f3e33d313fc",
+                    "title": f"Album {album}",
+                    "primary-type": "Album",
+                },
+                "date": f"{1989 + release}-03-08",
+                "country": "US",
+                "release-events": [{"date": f"{1989 + release}-03-08", "area": {"id": "489ce91b", "name": "United States"}}],
+                "track-count": 14,
+                "media": [{
+                    "position": 1,
+                    "format": "CD",
+                    "track": [{"id": f"track-{index}", "number": "1", "title": f"Song {index}", "length": 240000}],
+                    "track-count": 14,
+                    "track-offset": 0,
+                }],
+            }
+            for release in range(RELEASES_PER_RECORDING)
+        ],
+    }
+
+
+def make_pages(track_count: int) -> [bytes]:
+    recordings = [make_recording(index) for index in range(track_count)]
+    return [
+        json.dumps({"count": track_count, "recordings": recordings[offset:offset + 100]}).encode()
+        for offset in range(0, track_count, 100)
+    ]
+
+
+def measure(build_tracks, pages: [bytes]) -> int:
+    """The number of bytes still allocated by the objects `build_tracks` returns, once the pages are discarded."""
+    gc.collect()
+    tracemalloc.start()
+    tracks = build_tracks(pages)
+    gc.collect()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tracks
+    return size
+
+
+def build_legacy_tracks(pages: [bytes]) -> list:
+    known_releases = {}
+    return [
+        LegacyTrack(recording, known_releases)
+        for page in pages for recording in json.loads(page)["recordings"]
+    ]
+
+
+def build_legacy_trimmed_tracks(pages: [bytes]) -> list:
+    known_releases = {}
+    return [
+        LegacyTrack(trim_recording_data(recording), known_releases)
+        for page in pages for recording in json.loads(page)["recordings"]
+    ]
+
+
+def build_tracks(pages: [bytes]) -> list:
+    releases = ReleaseRegistry()
+    return [
+        Track(trim_recording_data(recording), releases)
+        for page in pages for recording in json.loads(page)["recordings"]
+    ]
+
+
+def main(track_count: int) -> None:
+    pages = make_pages(track_count)
+    results = [
+        ("Original classes, full recordings", measure(build_legacy_tracks, pages)),
+        ("Original classes, trimmed recordings", measure(build_legacy_trimmed_tracks, pages)),
+        ("Slotted classes, trimmed recordings", measure(build_tracks, pages)),
+    ]
+
+    print(f"{track_count} tracks, {RELEASES_PER_RECORDING} releases per recording")
+    for name, size in results:
+        print(f"{name:<40} {size / track_count:8.0f} bytes per track ({size / 1024 ** 2:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
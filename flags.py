@@ -1,7 +1,37 @@
 
+import os
 
 IS_VERBOSE = False
 MAX_SEARCH_RESULTS = 0
 PERFORMANCE_TIMING = False
 SHOW_STATISTICS = False
 SHOW_GRAPH = False
+GRAPH_OUT = ""
+TERMINAL_GRAPH = False
+USE_CACHE = False
+CACHE_DIR = ""
+# Where the response cache is kept if CACHE_DIR isn't set
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "lyrics_avg")
+STREAM_PIPELINE = False
+RELEASE_GROUPS = False
+KEEP_RAW_DATA = False
+DEADLINE = None
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 30
+# The lyrics providers that can be listed in LYRICS_PROVIDERS
+LYRICS_OVH = "lyrics.ovh"
+LOCAL_CORPUS = "local"
+PROVIDER_NAMES = (LOCAL_CORPUS, LYRICS_OVH)
+LYRICS_PROVIDERS = []
+LYRICS_CORPUS = ""
+HEDGE_REQUESTS = False
+VARIANT_KEYWORDS = []
+# Words in a track or release name that mean it's a remix, live, instrumental, or other version of a song, used if
+# VARIANT_KEYWORDS is empty
+DEFAULT_VARIANT_KEYWORDS = (
+    "live", "mix", "remix", "cut", "take", "master", "mono", "deluxe", "demo", "version", "instrumental", "session",
+    "acoustic", "rehearsal", "5.1",
+)
+NEAR_DUPLICATES = False
+DEDUPE_LYRICS = False
+LIVE_STATISTICS = False
@@ -0,0 +1,188 @@
+import re
+import aiohttp
+
+import flags
+from .concurrency import AdaptiveConcurrencyLimiter
+from .data import Artist, Track
+from .deadline import Deadline, DeadlineExceeded
+from .data_cleanup_helpers import (
+    remove_duplicate_lyrics,
+    remove_duplicate_recordings,
+    remove_near_duplicate_recordings,
+    skip_known_duplicate_lyrics,
+)
+from .data_collection_helpers import (
+    search_artist_data,
+    lookup_artist_data,
+    get_recordings_data,
+    get_release_group_recordings_data,
+    get_song_lyrics,
+)
+from .pipeline import stream_song_lyrics
+from .calculation_helpers import calculate_statistics, calculate_coverage
+from .track_table import TrackTable
+import helpers.output_helpers as oh
+
+_mb_id_pattern = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE)
+
+# The reasons `analyse_artist_tracks` gives for an analysis failing
+NOT_FOUND = "not-found"
+DEADLINE_REACHED = "deadline"
+UPSTREAM_ERROR = "upstream"
+
+
+def is_mb_id(query: str) -> bool:
+    """Check whether an artist query is a MusicBrainz ID rather than a name to search for."""
+    return bool(_mb_id_pattern.match(query.strip()))
+
+
+async def resolve_artist(session: aiohttp.ClientSession, query: str, interactive: bool = True) -> (Artist, str):
+    """
+    Find an artist from either their MusicBrainz ID or their name.
+    :param session: The session to make API requests with.
+    :param query: An artist's MusicBrainz ID, or a name to search for.
+    :param interactive: Whether the user can be prompted to choose between multiple search results.
+    :return: A tuple containing the Artist object, and a string to pass as an error message.
+    """
+    if is_mb_id(query):
+        return await lookup_artist_data(session, query.strip())
+    return await search_artist_data(session, query, interactive)
+
+
+async def collect_lyrics(
+        session: aiohttp.ClientSession,
+        artist: Artist,
+        limiter: AdaptiveConcurrencyLimiter = None,
+        deadline: Deadline = None,
+) -> ([Track], str):
+    """
+    Find, clean, and get the lyrics for an Artist's songs, using the collection mode set by the global flags.
+    :param session: The session to make API requests with.
+    :param artist: The Artist to find lyrics for.
+    :param limiter: The concurrency limiter for the lyrics requests, pass one in to share it between artists.
+    :param deadline: The run's deadline, if it passes while lyrics are being requested only the lyrics
+        found so far are returned.
+    :return: A tuple containing a list of Track objects with lyrics, and a string to pass as an error message.
+    """
+    if deadline is None:
+        deadline = Deadline()
+
+    if flags.STREAM_PIPELINE:
+        # Request lyrics for each page of recordings while the later pages are still being requested
+        recordings_with_lyrics, err = await stream_song_lyrics(session, artist, limiter, deadline)
+    else:
+        recordings_with_lyrics, err = await collect_recordings_then_lyrics(session, artist, limiter, deadline)
+    if err or not flags.DEDUPE_LYRICS:
+        return recordings_with_lyrics, err
+
+    # Different recordings of a song can still return the same lyrics, so only count those lyrics once
+    return remove_duplicate_lyrics(recordings_with_lyrics, artist), None
+
+
+async def collect_recordings_then_lyrics(
+        session: aiohttp.ClientSession,
+        artist: Artist,
+        limiter: AdaptiveConcurrencyLimiter,
+        deadline: Deadline,
+) -> ([Track], str):
+    """
+    Find and clean every one of an Artist's songs before requesting any lyrics.
+    :param session: The session to make API requests with.
+    :param artist: The Artist to find lyrics for.
+    :param limiter: The concurrency limiter for the lyrics requests.
+    :param deadline: The run's deadline.
+    :return: A tuple containing a list of Track objects with lyrics, and a string to pass as an error message.
+    """
+    # Get the recording data from the API using the artist ID
+    if flags.RELEASE_GROUPS:
+        collect_recordings = get_release_group_recordings_data(session, artist)
+    else:
+        collect_recordings = get_recordings_data(session, artist)
+    try:
+        recordings, err = await deadline.wait_for(collect_recordings)
+    except DeadlineExceeded:
+        return None, oh.fail("Deadline reached before all songs were found!")
+    if err:
+        return None, err
+
+    # Clean the data by removing any duplicate songs/singles/remixes/re-releases/etc.
+    cleaned_recordings = remove_duplicate_recordings(recordings, artist)
+    if flags.NEAR_DUPLICATES:
+        cleaned_recordings = remove_near_duplicate_recordings(cleaned_recordings, artist)
+    if flags.DEDUPE_LYRICS:
+        cleaned_recordings = skip_known_duplicate_lyrics(cleaned_recordings, artist)
+
+    # For each song we have, get the lyrics and store them in the class
+    return await get_song_lyrics(session, cleaned_recordings, artist, limiter, deadline)
+
+
+async def analyse_artist(
+        session: aiohttp.ClientSession,
+        query: str,
+        limiter: AdaptiveConcurrencyLimiter = None,
+) -> dict:
+    """
+    Run the whole analysis for one artist without prompting the user, for use when analysing many artists at once.
+    :param session: The session to make API requests with.
+    :param query: An artist's MusicBrainz ID, or a name to search for - the top search result is used.
+    :param limiter: The concurrency limiter for the lyrics requests.
+    :return: A dict of the statistics from `calculate_statistics` and `calculate_coverage` along with the artist's
+        name and ID, or the query, an `error` message and the `failure` reason if the analysis failed.
+    """
+    artist, track_table, err, failure = await analyse_artist_tracks(session, query, limiter)
+    if err:
+        return {"query": query, "error": oh.plain(err), "failure": failure}
+    return artist_statistics(query, artist, track_table)
+
+
+async def analyse_artist_tracks(
+        session: aiohttp.ClientSession,
+        query: str,
+        limiter: AdaptiveConcurrencyLimiter = None,
+) -> (Artist, TrackTable, str, str):
+    """
+    Find an artist without prompting the user, and collect the lyrics for their songs.
+    :param session: The session to make API requests with.
+    :param query: An artist's MusicBrainz ID, or a name to search for - the top search result is used.
+    :param limiter: The concurrency limiter for the lyrics requests.
+    :return: A tuple containing the Artist object, a TrackTable of their tracks with lyrics, a string to pass
+        as an error message, and the reason the analysis failed: `NOT_FOUND` if the artist, their songs, or any
+        lyrics couldn't be found, `DEADLINE_REACHED` if the deadline passed first, or `UPSTREAM_ERROR` if a request
+        to an API failed.
+    """
+    # Each artist gets the whole deadline, starting once it's their turn to be analysed
+    deadline = Deadline(flags.DEADLINE)
+    failure = NOT_FOUND
+    try:
+        artist, err = await resolve_artist(session, query, interactive=False)
+        if not err:
+            recordings_with_lyrics, err = await collect_lyrics(session, artist, limiter, deadline)
+    except Exception as e:
+        # Requests that run out of retries raise, but one artist failing shouldn't stop the others
+        err = f"{type(e).__name__}: {e}"
+        failure = UPSTREAM_ERROR
+
+    if err:
+        # Whatever was missing might have been found with more time
+        if deadline.expired and failure == NOT_FOUND:
+            failure = DEADLINE_REACHED
+        return None, None, err, failure
+    return artist, TrackTable(recordings_with_lyrics), None, None
+
+
+def artist_statistics(query: str, artist: Artist, track_table: TrackTable) -> dict:
+    """
+    Gather an artist's statistics into one dict.
+    :param query: The artist name or MusicBrainz ID the artist was found with.
+    :param artist: The Artist object.
+    :param track_table: A non-empty TrackTable of the artist's tracks with lyrics.
+    :return: A dict of the statistics from `calculate_statistics` and `calculate_coverage` along with the artist's
+        name and ID.
+    """
+    return {
+        "query": query,
+        "artist": artist.name,
+        "mb_id": artist.mb_id,
+        **calculate_statistics(track_table),
+        **calculate_coverage(track_table, artist),
+    }
@@ -1,6 +1,29 @@
+import re
 from urllib.parse import quote
 
 _api_prefix = "https://musicbrainz.org/ws/2"
+# Characters with a special meaning in the Lucene query syntax used by the MusicBrainz search API
+_lucene_special_characters = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+
+def build_artist_search_url(artist_name: str, limit: int = 3) -> str:
+    """
+    Given the name of an artist, build a url to pass to the API in order to search for artists with that name.
+    :param artist_name: The name of the artist to search for.
+    :param limit: The maximum number of artists to return.
+    :return: A url string that can be passed to the MusicBrainz API to get the artist search results.
+    """
+    escaped_name = _lucene_special_characters.sub(r"\\\1", artist_name)
+    return f"{_api_prefix}/artist/?query={quote(f'artist:({escaped_name})', safe='')}&limit={limit}"
+
+
+def build_artist_lookup_url(artist_id: str) -> str:
+    """
+    Given the ID of an artist, build a url to pass to the API in order to retrieve that artist's data.
+    :param artist_id: The id the artist is assigned in the MusicBrainz database.
+    :return: A url string that can be passed to the MusicBrainz API to get the artist data.
+    """
+    return f"{_api_prefix}/artist/{sanitise_url_string(artist_id)}?inc=tags"
 
 
 def build_recordings_query_url(artist_id: str, offset: int = 0) -> str:
@@ -15,6 +38,26 @@ def build_recordings_query_url(artist_id: str, offset: int = 0) -> str:
     return f"{_api_prefix}/recording/?query=arid:{artist_id}%20AND%20status:official%20AND%20video:false%20NOT%20secondarytype:*&limit=100&offset={offset}"
 
 
+def build_release_browse_url(artist_id: str, offset: int = 0) -> str:
+    """
+    Given the ID of an artist, build a url to pass to the API in order to retrieve the artist's official album and
+    EP releases, along with the release group each one belongs to.
+    :param artist_id: The id the artist is assigned in the MusicBrainz database.
+    :param offset: The API returns at most 100 releases per request, so we offset the request to get later pages.
+    :return: A url string that can be passed to the MusicBrainz API to get a page of release data.
+    """
+    return f"{_api_prefix}/release?artist={artist_id}&type=album|ep&status=official&inc=release-groups&limit=100&offset={offset}"
+
+
+def build_release_lookup_url(release_id: str) -> str:
+    """
+    Given the ID of a release, build a url to pass to the API in order to retrieve the release's tracklist.
+    :param release_id: The id the release is assigned in the MusicBrainz database.
+    :return: A url string that can be passed to the MusicBrainz API to get the release and its recordings.
+    """
+    return f"{_api_prefix}/release/{release_id}?inc=recordings+artist-credits+release-groups"
+
+
 def build_lyrics_url(artist_name: str, song_title: str) -> str:
     """
     Given an artist name and a song title, build a url to pass to the lyrics API
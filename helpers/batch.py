@@ -0,0 +1,49 @@
+import asyncio
+import contextlib
+import json
+import sys
+
+from .analysis import analyse_artist
+from .concurrency import AdaptiveConcurrencyLimiter
+from .data_collection_helpers import create_session
+
+
+def read_batch_queries(path: str) -> [str]:
+    """
+    Read the artists to analyse from a file, one artist name or MusicBrainz ID per line.
+    Blank lines and lines starting with `#` are skipped.
+    :param path: The path of the file to read, or `-` to read from stdin.
+    :return: A list of artist names and IDs.
+    """
+    if path == "-":
+        lines = sys.stdin.readlines()
+    else:
+        with open(path, encoding="utf-8") as batch_file:
+            lines = batch_file.readlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+async def run_batch(queries: [str], max_concurrent_artists: int = 4, output=None) -> None:
+    """
+    Analyse many artists concurrently over one session, writing one JSON line of statistics per artist as
+    each one finishes. An artist that can't be analysed gets a line with an `error` instead of stopping the batch.
+    :param queries: The artist names or MusicBrainz IDs to analyse.
+    :param max_concurrent_artists: The maximum number of artists to analyse at once.
+    :param output: The file to write the JSON lines to, defaults to stdout.
+    :return: None.
+    """
+    output = output or sys.stdout
+    artist_semaphore = asyncio.Semaphore(max_concurrent_artists)
+    # One limiter for every artist's lyrics requests, so the batch as a whole stays within what the API can take
+    lyrics_limiter = AdaptiveConcurrencyLimiter()
+
+    async def analyse(query: str) -> dict:
+        async with artist_semaphore:
+            return await analyse_artist(session, query, lyrics_limiter)
+
+    # The usual progress output would be mixed in with the JSON lines, so send it to stderr instead
+    with contextlib.redirect_stdout(sys.stderr):
+        async with create_session() as session:
+            for result in asyncio.as_completed([analyse(query) for query in queries]):
+                output.write(json.dumps(await result) + "\n")
+                output.flush()
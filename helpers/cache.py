@@ -0,0 +1,245 @@
+import json
+import os
+import sqlite3
+import time
+
+import flags
+from .fast_json import loads
+
+# How long (in seconds) a cached response stays fresh for each endpoint. Recordings data changes as
+# the MusicBrainz database is edited so we refresh it daily, lyrics are far more stable.
+DEFAULT_TTLS = {
+    "recordings": 60 * 60 * 24,
+    "lyrics": 60 * 60 * 24 * 30,
+}
+# "No lyrics found" responses are cached for a shorter time since the lyrics API's sources are updated.
+DEFAULT_NEGATIVE_TTL = 60 * 60 * 24 * 7
+# Once the stored responses grow past this many bytes the least recently used entries are evicted.
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+# Roughly how many bytes a stored lyrics fingerprint takes up, so they count towards `max_size` with the responses.
+FINGERPRINT_SIZE = 100
+
+
+class ResponseCache:
+    def __init__(
+            self,
+            cache_dir: str,
+            ttls: dict = None,
+            negative_ttl: int = DEFAULT_NEGATIVE_TTL,
+            max_size: int = DEFAULT_MAX_SIZE,
+    ):
+        """
+        SQLite backed cache of API responses, shared by the recordings and lyrics requests so repeat
+        runs for the same artist don't have to hit the network again.
+        :param cache_dir: The directory to store the cache database in, created if it doesn't exist.
+        :param ttls: A dict of endpoint name to the number of seconds a response for that endpoint stays fresh.
+        :param negative_ttl: The number of seconds a negative ("no data found") response stays fresh.
+        :param max_size: The maximum number of bytes of response data to store before evicting old entries.
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "responses.sqlite3")
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        # Autocommit mode with a write-ahead log keeps each write cheap without holding a transaction open.
+        self.connection = sqlite3.connect(self.path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, "
+            "endpoint TEXT NOT NULL, "
+            "body TEXT, "
+            "size INTEGER NOT NULL, "
+            "expires REAL NOT NULL, "
+            "accessed REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        # The SimHash fingerprint of each recording's lyrics, and the recording with the same lyrics it was merged
+        # into, so later runs don't have to request lyrics for known duplicates. They're derived from the lyrics so
+        # they expire with them, and are evicted along with the responses.
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS lyrics_fingerprints ("
+            "recording_id TEXT PRIMARY KEY, "
+            "fingerprint INTEGER NOT NULL, "
+            "duplicate_of TEXT, "
+            "expires REAL NOT NULL DEFAULT 0, "
+            "accessed REAL NOT NULL DEFAULT 0)"
+        )
+        fingerprint_columns = {row[1] for row in self.connection.execute("PRAGMA table_info(lyrics_fingerprints)")}
+        for column in ("expires", "accessed"):
+            # Caches from before fingerprints expired are missing the columns, their fingerprints are evicted first
+            if column not in fingerprint_columns:
+                self.connection.execute(f"ALTER TABLE lyrics_fingerprints ADD COLUMN {column} REAL NOT NULL DEFAULT 0")
+        self._size = self._stored_size()
+
+    def get(self, endpoint: str, url: str) -> (bool, dict):
+        """
+        Look up a stored response for a url.
+        :param endpoint: The name of the endpoint the url belongs to, e.g. `recordings` or `lyrics`.
+        :param url: The request url, as built by `api_parser`.
+        :return: A tuple containing whether a fresh entry was found, and the stored JSON data - which
+            will be None for a cached negative response.
+        """
+        now = time.time()
+        row = self.connection.execute(
+            "SELECT body FROM responses WHERE url = ? AND endpoint = ? AND expires > ?",
+            (url, endpoint, now),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return False, None
+
+        self.hits += 1
+        self.connection.execute("UPDATE responses SET accessed = ? WHERE url = ?", (now, url))
+        body = row[0]
+        return True, loads(body) if body is not None else None
+
+    def set(self, endpoint: str, url: str, data: dict = None) -> None:
+        """
+        Store a response for a url, evicting the least recently used entries if the cache is full.
+        :param endpoint: The name of the endpoint the url belongs to, used to pick the entry's TTL.
+        :param url: The request url, as built by `api_parser`.
+        :param data: The JSON data returned by the API, or None to store a negative result.
+        :return: None.
+        """
+        now = time.time()
+        if data is None:
+            body = None
+            ttl = self.negative_ttl
+        else:
+            body = json.dumps(data, separators=(",", ":"))
+            ttl = self.ttls[endpoint]
+        size = len(body) if body else 0
+
+        old_size = self.connection.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+        if old_size:
+            self._size -= old_size[0]
+        self.connection.execute(
+            "INSERT OR REPLACE INTO responses (url, endpoint, body, size, expires, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+            (url, endpoint, body, size, now + ttl, now),
+        )
+        self._size += size
+
+        if self._size > self.max_size:
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove expired entries, then the least recently used entries until the stored responses
+        take up no more than 90% of `max_size` so we aren't evicting on every write.
+        :return: None.
+        """
+        now = time.time()
+        self.connection.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+        self.connection.execute("DELETE FROM lyrics_fingerprints WHERE expires <= ?", (now,))
+        self._size = self._stored_size()
+
+        target_size = self.max_size * 0.9
+        if self._size <= target_size:
+            return
+
+        evicted = {"responses": [], "lyrics_fingerprints": []}
+        for table, key, size, _ in self.connection.execute(
+            "SELECT 'responses', url, size, accessed FROM responses "
+            "UNION ALL SELECT 'lyrics_fingerprints', recording_id, ?, accessed FROM lyrics_fingerprints "
+            "ORDER BY accessed",
+            (FINGERPRINT_SIZE,),
+        ):
+            evicted[table].append((key,))
+            self._size -= size
+            if self._size <= target_size:
+                break
+        self.connection.executemany("DELETE FROM responses WHERE url = ?", evicted["responses"])
+        self.connection.executemany(
+            "DELETE FROM lyrics_fingerprints WHERE recording_id = ?", evicted["lyrics_fingerprints"]
+        )
+
+    def _stored_size(self) -> int:
+        """The number of bytes the stored responses and lyrics fingerprints count as towards `max_size`."""
+        response_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        fingerprint_count = self.connection.execute("SELECT COUNT(*) FROM lyrics_fingerprints").fetchone()[0]
+        return response_size + fingerprint_count * FINGERPRINT_SIZE
+
+    def set_lyrics_fingerprints(self, fingerprints: [(str, int, str)]) -> None:
+        """
+        Store the lyrics fingerprints of some recordings, which stay fresh for as long as the lyrics responses,
+        evicting the least recently used entries if the cache is full.
+        :param fingerprints: A list of the recording's MBID, the 64 bit fingerprint of its lyrics, and the MBID of the
+            recording it's a duplicate of, or None if it isn't a duplicate.
+        :return: None.
+        """
+        now = time.time()
+        expires = now + self.ttls["lyrics"]
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO lyrics_fingerprints (recording_id, fingerprint, duplicate_of, expires, accessed) "
+            "VALUES (?, ?, ?, ?, ?)",
+            # SQLite integers are signed, so store the fingerprint's bits as a signed 64 bit integer
+            [
+                (
+                    recording_id,
+                    fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint,
+                    duplicate_of,
+                    expires,
+                    now,
+                )
+                for recording_id, fingerprint, duplicate_of in fingerprints
+            ],
+        )
+        # Replaced fingerprints don't add to the size, so count the rows rather than adding on every fingerprint
+        self._size = self._stored_size()
+        if self._size > self.max_size:
+            self.evict()
+
+    def get_lyrics_duplicates(self, recording_ids: [str]) -> dict:
+        """
+        Look up which of some recordings are known to have the same lyrics as another recording.
+        :param recording_ids: The MBIDs of the recordings.
+        :return: A dict of the MBID of each known duplicate to the MBID of the recording it's a duplicate of.
+        """
+        now = time.time()
+        recording_ids = list(recording_ids)
+        duplicates = {}
+        # Older SQLite versions allow at most 999 parameters in a query
+        for offset in range(0, len(recording_ids), 900):
+            chunk = recording_ids[offset:offset + 900]
+            duplicates.update(self.connection.execute(
+                "SELECT recording_id, duplicate_of FROM lyrics_fingerprints "
+                f"WHERE duplicate_of IS NOT NULL AND expires > ? AND recording_id IN ({', '.join('?' * len(chunk))})",
+                [now, *chunk],
+            ))
+        self.connection.executemany(
+            "UPDATE lyrics_fingerprints SET accessed = ? WHERE recording_id = ?",
+            [(now, recording_id) for recording_id in duplicates],
+        )
+        return duplicates
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+_response_cache = None
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get the response cache shared by the request functions, opening it in `flags.CACHE_DIR` the first time.
+    :return: The shared ResponseCache object, or None if caching is disabled.
+    """
+    global _response_cache
+    if not flags.USE_CACHE:
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(flags.CACHE_DIR or flags.DEFAULT_CACHE_DIR)
+    return _response_cache
+
+
+def close_response_cache() -> None:
+    """Close the shared response cache if it has been opened."""
+    global _response_cache
+    if _response_cache is not None:
+        _response_cache.close()
+        _response_cache = None
@@ -1,88 +1,284 @@
 import flags
-import statistics
-import matplotlib.pyplot as plt
 
-from helpers.data import Track, Artist
+from helpers.data import Artist
+from helpers.track_table import TrackTable
 import helpers.output_helpers as oh
 
+# Graphs of more songs than this show the median and interquartile range of each year instead of every song
+MAX_SCATTER_POINTS = 1000
 
-def calculate_output(recordings_with_lyrics: [Track], artist: Artist) -> (int, str):
+
+def calculate_output(track_table: TrackTable, artist: Artist) -> (int, str):
     """
-    For a list of cleaned Track objects with lyrics, calculate the average number of words
+    For a table of cleaned tracks with lyrics, calculate the average number of words
     used by the Track's Artist, as well as other statistical values such as standard deviation,
     variance, minimum and maximum values.
-    :param recordings_with_lyrics: A list of Track objects with cleaned lyrics attributes.
+    :param track_table: A TrackTable of the Track objects with cleaned lyrics attributes.
     :param artist: The Artist object linked to the tracks.
     :return: A tuple containing the average word count as an integer and a string to pass as an error message.
     """
     # Error handling
-    if not recordings_with_lyrics:
+    if not track_table:
         return None, oh.fail("No lyrics to count!")
 
-    word_counts = [track.word_count for track in recordings_with_lyrics]
-
-    average_word_count = int(statistics.mean(word_counts))
-
-    std_dev = statistics.pstdev(word_counts)
-    variance = statistics.pvariance(word_counts)
-
-    min_length = min(word_counts)
-    track_with_min_length = recordings_with_lyrics[word_counts.index(min_length)]
-
-    max_length = max(word_counts)
-    track_with_max_length = recordings_with_lyrics[word_counts.index(max_length)]
+    stats = calculate_statistics(track_table)
+    average_word_count = stats["average_word_count"]
 
     print(oh.separator())
     print(oh.bold(f"{artist.name} uses an average of ") + oh.green(f"{average_word_count}") + oh.bold(
         " words in their songs"))
+    # Let the user know how much of the artist's catalogue the average is based on
+    coverage = calculate_coverage(track_table, artist)
+    if coverage["lyrics_attempted"]:
+        coverage_str = f"{coverage['lyrics_found']}/{coverage['lyrics_attempted']} ({coverage['coverage']:.0%})"
+        if coverage["partial"]:
+            print("\t - " + oh.warning("Partial result, the deadline was reached with lyrics found for ") + oh.bold(
+                coverage_str) + oh.warning(" tracks"))
+        elif flags.SHOW_STATISTICS:
+            print("\t - Lyrics were found for " + oh.bold(coverage_str) + " tracks")
+    if coverage["lyrics_merged"] and flags.SHOW_STATISTICS:
+        print("\t - " + oh.bold(str(coverage["lyrics_merged"])) + " tracks with duplicate lyrics were counted once")
     if flags.SHOW_STATISTICS:
-        print("\t - " + oh.blue("Standard deviation") + " of the sample is " + oh.bold(str(std_dev)))
-        print("\t - " + oh.cyan("Variance") + " of the sample is " + oh.bold(str(variance)))
+        print("\t - " + oh.blue("Standard deviation") + " of the sample is " + oh.bold(str(stats["std_dev"])))
+        print("\t - " + oh.cyan("Variance") + " of the sample is " + oh.bold(str(stats["variance"])))
         print("\t - The song with the " + oh.cyan("least") + " words was " + oh.bold(
-            str(track_with_min_length.name)) + " with " + oh.cyan(str(min_length)) + " words")
+            str(stats["min_track"])) + " with " + oh.cyan(str(stats["min_word_count"])) + " words")
         print("\t - The song with the " + oh.header("most") + " words was " + oh.bold(
-            str(track_with_max_length.name)) + " with " + oh.header(str(max_length)) + " words")
+            str(stats["max_track"])) + " with " + oh.header(str(stats["max_word_count"])) + " words")
+        print("\t - The " + oh.cyan("median") + " song has " + oh.bold(f"{stats['median_word_count']:.0f}")
+              + " words, and " + oh.bold("90%") + " of songs have at most " + oh.bold(f"{stats['p90_word_count']:.0f}")
+              + " words")
+        print("\t - The average song has " + oh.bold(str(stats["average_unique_word_count"])) + " unique words over "
+              + oh.bold(str(stats["average_line_count"])) + " lines")
     print(oh.separator())
 
     return average_word_count, None
 
 
-def plot_data(track_data: [Track], average_word_count: int, artist: Artist) -> None:
+def calculate_statistics(track_table: TrackTable) -> dict:
+    """
+    Calculate the statistics shown by `calculate_output` for a table of tracks with lyrics.
+    :param track_table: A non-empty TrackTable of Track objects with cleaned lyrics attributes.
+    :return: A dict of the number of tracks, the average word count, standard deviation, variance,
+        the names and word counts of the shortest and longest tracks, the median and 90th percentile word counts, and
+        the average number of unique words and lines.
+    """
+    return track_table.statistics()
+
+
+def calculate_coverage(track_table: TrackTable, artist: Artist) -> dict:
+    """
+    Calculate how many of the tracks we requested lyrics for the statistics are based on.
+    :param track_table: A TrackTable of the Track objects with cleaned lyrics attributes.
+    :param artist: The Artist object linked to the tracks.
+    :return: A dict of the number of tracks with lyrics, the number of tracks lyrics were requested for, the
+        fraction of those tracks with lyrics, whether the run's deadline cut the requests short, and the number of
+        tracks with lyrics that were merged into another track with the same lyrics.
+    """
+    # Tracks merged for having duplicate lyrics still had lyrics found, they're just not counted twice
+    lyrics_found = len(track_table) + artist.lyrics_merged
+    return {
+        "lyrics_found": lyrics_found,
+        "lyrics_attempted": artist.lyrics_attempted,
+        "coverage": lyrics_found / artist.lyrics_attempted if artist.lyrics_attempted else None,
+        "partial": artist.deadline_reached,
+        "lyrics_merged": artist.lyrics_merged,
+    }
+
+
+def _shorten(name: str, length: int = 24) -> str:
+    return name if len(name) <= length else name[:length - 3] + "..."
+
+
+# The rows of `format_comparison`, as the label and a function formatting the value from an artist's statistics
+_comparison_rows = (
+    ("Songs", lambda result: str(result["track_count"])),
+    ("Average words", lambda result: str(result["average_word_count"])),
+    ("Standard deviation", lambda result: f"{result['std_dev']:.1f}"),
+    ("Variance", lambda result: f"{result['variance']:.1f}"),
+    ("Median words", lambda result: f"{result['median_word_count']:.0f}"),
+    ("90th percentile", lambda result: f"{result['p90_word_count']:.0f}"),
+    ("Fewest words", lambda result: f"{_shorten(result['min_track'])} ({result['min_word_count']})"),
+    ("Most words", lambda result: f"{_shorten(result['max_track'])} ({result['max_word_count']})"),
+    ("Average unique words", lambda result: str(result["average_unique_word_count"])),
+    ("Average lines", lambda result: str(result["average_line_count"])),
+    ("Lyrics found", lambda result: f"{result['lyrics_found']}/{result['lyrics_attempted']}"),
+)
+
+
+def format_comparison(results: [dict]) -> str:
+    """
+    Lay out the statistics of several artists side by side, one column per artist.
+    :param results: The dicts of statistics from `analyse_artist` for each artist that was analysed successfully.
+    :return: The table as a string, ready to print.
+    """
+    rows = [[""] + [result["artist"] for result in results]]
+    for label, format_value in _comparison_rows:
+        rows.append([label] + [format_value(result) for result in results])
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+
+    lines = []
+    for index, row in enumerate(rows):
+        cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+        line = "   ".join(cells)
+        # Colour the artist names once they're padded, so the colour codes don't count towards the widths
+        lines.append(oh.bold(line) if index == 0 else line)
+    return "\n".join(lines)
+
+
+def plot_data(track_table: TrackTable, average_word_count: int, artist: Artist, output_path: str = None) -> None:
     """
     Given the cleaned and calculated track data plot a scatter graph of an Artist's songs, with the
     year of release along the x-axis, the number of words in the track along the y-axis, and the
     average number of words plotted as a dashed line across the plot.
-    :param track_data: Cleaned list of Track objects.
+    :param track_table: A TrackTable of the cleaned Track objects.
     :param average_word_count: The average number of words across all tracks.
     :param artist: The Artist object linked to the tracks.
+    :param output_path: A file to save the graph to instead of showing it in a window, the format is taken from its
+        extension, e.g. `graph.png` or `graph.svg`.
     :return: None.
     """
-    xs = []
-    ys = []
+    plot_comparison([(artist, track_table, average_word_count)], output_path)
+
 
-    tracks_with_lyrics_year_ascending = sorted(
-        [track for track in track_data if track.release.date],
-        key=lambda x: x.release.date,
-        reverse=False,
-    )
+def plot_comparison(artist_tracks: [(Artist, TrackTable, int)], output_path: str = None) -> None:
+    """
+    Plot the graph from `plot_data` for several Artists on the same axes, each in their own colour.
+    :param artist_tracks: A tuple for each Artist of the Artist object, a TrackTable of their cleaned Track objects,
+        and their average word count.
+    :param output_path: A file to save the graph to instead of showing it in a window, the format is taken from its
+        extension, e.g. `graph.png` or `graph.svg`.
+    :return: None.
+    """
+    artist_tracks = _dated_artist_tracks(artist_tracks)
+    if not artist_tracks:
+        return
 
-    # Extract only the years from each track's release date, some tracks only have a year value
-    # but all date values should follow a %Y-%m-%d format so we can just slice the first 4 chars
-    # to get the year in this case.
-    for track in tracks_with_lyrics_year_ascending:
-        xs.append(track.release.date[0:4])
+    if output_path:
+        # A Figure on its own is drawn by the non-interactive Agg backend, so no display or GUI toolkit is needed
+        from matplotlib.figure import Figure
 
-    for point in tracks_with_lyrics_year_ascending:
-        ys.append(point.word_count)
+        fig = Figure()
+        ax = fig.subplots()
+    else:
+        # Importing pyplot loads a GUI backend, which is slow enough to only be worth it when a graph is shown
+        import matplotlib.pyplot as plt
 
-    fig, ax = plt.subplots()
-    ax.set_title(f"Word count of {artist.name} songs over time.")
+        fig, ax = plt.subplots()
+    from matplotlib.ticker import MaxNLocator
 
+    ax.set_title(_graph_title(artist_tracks))
     # Limit the number of x-ticks so we don't get flooded with date labels
     # and obscure the x-axis for large datasets
-    ax.xaxis.set_major_locator(plt.MaxNLocator(12))
+    ax.xaxis.set_major_locator(MaxNLocator(12, integer=True))
+    comparing = len(artist_tracks) > 1
+    for index, (artist, track_table, average_word_count) in enumerate(artist_tracks):
+        if comparing:
+            draw_word_counts(ax, track_table, average_word_count, label=artist.name, colour=f"C{index}")
+        else:
+            draw_word_counts(ax, track_table, average_word_count)
+    if ax.get_legend_handles_labels()[0]:
+        ax.legend()
+
+    if output_path:
+        fig.savefig(output_path)
+        print(oh.cyan("Saved the graph to ") + oh.bold(output_path))
+    else:
+        plt.show()
+
+
+def draw_word_counts(ax, track_table: TrackTable, average_word_count: int, label: str = "", colour: str = None) -> None:
+    """
+    Draw the word count of an Artist's songs over time on a set of axes. Each song is drawn as a point, unless there
+    are more than `MAX_SCATTER_POINTS` songs, then the median and interquartile range of each year's songs are drawn
+    instead so the graph stays readable and quick to draw however many songs there are.
+    :param ax: The matplotlib Axes to draw on.
+    :param track_table: A TrackTable of the cleaned Track objects, at least one of which has a release date.
+    :param average_word_count: The average number of words across all tracks.
+    :param label: The name to put before each part of the graph in the legend, for telling artists apart.
+    :param colour: The matplotlib colour to draw in, otherwise the songs are drawn in the next colour and the
+        average in black.
+    :return: None.
+    """
+    # Only tracks with a release date can be plotted, some tracks only have a year value so we plot by year
+    rows = track_table.dated_rows_by_year()
+    first_year, last_year = track_table.years[rows[0]], track_table.years[rows[-1]]
+
+    if len(rows) > MAX_SCATTER_POINTS:
+        years, lower_quartiles, medians, upper_quartiles = track_table.yearly_word_count_quartiles()
+        ax.fill_between(years, lower_quartiles, upper_quartiles, alpha=0.3, color=colour,
+                        label=_legend_label(label, "Interquartile range"))
+        ax.plot(years, medians, marker="o", color=colour, label=_legend_label(label, "Median"))
+    else:
+        ax.scatter(track_table.years[rows], track_table.word_counts[rows], color=colour, label=label or None)
+    # Plot the average as a dashed line, black unless there are several artists to tell apart
+    ax.plot([first_year, last_year], [average_word_count, average_word_count], "--", color=colour or "k",
+            label=_legend_label(label, "Average") if label else None)
+
+
+def _legend_label(label: str, part: str) -> str:
+    return f"{label} {part.lower()}" if label else part
+
+
+def _dated_artist_tracks(artist_tracks: [(Artist, TrackTable, int)]) -> [(Artist, TrackTable, int)]:
+    """Leave out the artists without any tracks with a release date, which can't be plotted."""
+    dated_artist_tracks = []
+    for artist, track_table, average_word_count in artist_tracks:
+        if len(track_table.dated_rows_by_year()):
+            dated_artist_tracks.append((artist, track_table, average_word_count))
+        elif len(artist_tracks) > 1:
+            print(oh.warning(f"None of {artist.name}'s tracks have a release date to plot!"))
+        else:
+            print(oh.warning("None of the tracks have a release date to plot!"))
+    return dated_artist_tracks
+
+
+def _graph_title(artist_tracks: [(Artist, TrackTable, int)]) -> str:
+    names = [artist.name for artist, _, _ in artist_tracks]
+    if len(names) > 1:
+        names = [", ".join(names[:-1]) + " and " + names[-1]]
+    return f"Word count of {names[0]} songs over time."
+
+
+def plot_terminal(track_table: TrackTable, average_word_count: int, artist: Artist) -> None:
+    """
+    Draw the graph from `plot_data` as text in the terminal with uniplot, for servers without a display.
+    :param track_table: A TrackTable of the cleaned Track objects.
+    :param average_word_count: The average number of words across all tracks.
+    :param artist: The Artist object linked to the tracks.
+    :return: None.
+    """
+    plot_terminal_comparison([(artist, track_table, average_word_count)])
+
+
+def plot_terminal_comparison(artist_tracks: [(Artist, TrackTable, int)]) -> None:
+    """
+    Draw the graph from `plot_comparison` as text in the terminal with uniplot.
+    :param artist_tracks: A tuple for each Artist of the Artist object, a TrackTable of their cleaned Track objects,
+        and their average word count.
+    :return: None.
+    """
+    try:
+        from uniplot import plot
+    except ImportError:
+        print(oh.warning("Install uniplot to draw graphs in the terminal"))
+        return
+
+    artist_tracks = _dated_artist_tracks(artist_tracks)
+    if not artist_tracks:
+        return
 
-    plt.scatter(xs, ys)
-    # Plot the average as a dashed black line
-    plt.plot([xs[0], xs[-1]], [average_word_count, average_word_count], 'k--')
-    plt.show()
+    ys, xs, lines, legend_labels = [], [], [], []
+    for artist, track_table, average_word_count in artist_tracks:
+        rows = track_table.dated_rows_by_year()
+        aggregated = len(rows) > MAX_SCATTER_POINTS
+        if aggregated:
+            years, _, word_counts, _ = track_table.yearly_word_count_quartiles()
+        else:
+            years, word_counts = track_table.years[rows], track_table.word_counts[rows]
+        label = artist.name if len(artist_tracks) > 1 else ""
+        ys += [word_counts, [average_word_count, average_word_count]]
+        xs += [years, [years[0], years[-1]]]
+        lines += [aggregated, True]
+        legend_labels += [_legend_label(label, "Median" if aggregated else "Songs"), _legend_label(label, "Average")]
+    plot(ys=ys, xs=xs, lines=lines, legend_labels=legend_labels, title=_graph_title(artist_tracks))
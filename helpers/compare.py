@@ -0,0 +1,53 @@
+import asyncio
+import sys
+from time import perf_counter
+
+import flags
+from .analysis import analyse_artist_tracks, artist_statistics
+from .calculation_helpers import format_comparison, plot_comparison, plot_terminal_comparison
+from .concurrency import AdaptiveConcurrencyLimiter
+from .data_collection_helpers import create_session
+import helpers.output_helpers as oh
+
+
+async def run_comparison(queries: [str]) -> None:
+    """
+    Analyse several artists at once over one session and show their statistics side by side, along with a graph
+    of all of their songs if one was asked for. Every artist's songs and lyrics are requested concurrently, so the
+    comparison takes about as long as the slowest artist on their own rather than all of them one after another.
+    :param queries: The artist names or MusicBrainz IDs to compare, the top search result is used for names.
+    :return: None.
+    """
+    timer_start = perf_counter()
+    # One limiter for every artist's lyrics requests, so together they stay within what the API can take
+    lyrics_limiter = AdaptiveConcurrencyLimiter()
+
+    async with create_session() as session:
+        analyses = await asyncio.gather(*(analyse_artist_tracks(session, query, lyrics_limiter) for query in queries))
+
+    results = []
+    artist_tracks = []
+    for query, (artist, track_table, err, _failure) in zip(queries, analyses):
+        if err:
+            # One artist failing shouldn't stop the others being compared
+            print(oh.fail(f"Couldn't analyse {query}: ") + err, file=sys.stderr)
+            continue
+        results.append(artist_statistics(query, artist, track_table))
+        artist_tracks.append((artist, track_table, results[-1]["average_word_count"]))
+
+    if not results:
+        return
+
+    print(oh.separator())
+    print(format_comparison(results))
+    print(oh.separator())
+
+    if flags.PERFORMANCE_TIMING:
+        print(f"Elapsed time: {perf_counter() - timer_start}s\n\n")
+
+    if flags.GRAPH_OUT:
+        plot_comparison(artist_tracks, flags.GRAPH_OUT)
+    if flags.TERMINAL_GRAPH:
+        plot_terminal_comparison(artist_tracks)
+    if flags.SHOW_GRAPH:
+        plot_comparison(artist_tracks)
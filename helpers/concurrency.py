@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+
+class AdaptiveConcurrencyLimiter:
+    def __init__(
+            self,
+            initial_window: int = 10,
+            min_window: int = 1,
+            max_window: int = 100,
+            decrease_factor: float = 0.5,
+            latency_tolerance: float = 4.0,
+    ):
+        """
+        Limits the number of requests in flight to an API, adjusting the limit with additive-increase
+        multiplicative-decrease (AIMD) so throughput converges on what the API can actually sustain.
+
+        Each healthy response grows the window by 1/window, so a full window of successes grows it by 1.
+        Any response signalling congestion (429, 5xx, or a timeout) shrinks it by `decrease_factor`.
+        :param initial_window: The number of requests allowed in flight to start with.
+        :param min_window: The smallest the window can shrink to.
+        :param max_window: The largest the window can grow to.
+        :param decrease_factor: The multiplier applied to the window when a request fails.
+        :param latency_tolerance: How many times slower than the fastest response seen a successful response can
+            be before we stop growing the window, since rising latency means the API is starting to queue requests.
+        """
+        self.min_window = min_window
+        self.max_window = max_window
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self._window = float(initial_window)
+        self._in_flight = 0
+        self._min_latency = None
+        self._last_decrease = 0.0
+        self._condition = None
+
+        self.successes = 0
+        self.failures = 0
+
+    @property
+    def window(self) -> int:
+        """The number of requests currently allowed in flight."""
+        return int(self._window)
+
+    @property
+    def in_flight(self) -> int:
+        """The number of requests currently in flight."""
+        return self._in_flight
+
+    def slot(self) -> "LimiterSlot":
+        """
+        Get a slot to make a request in, used as an async context manager that waits for room in the window.
+        :return: A LimiterSlot object.
+        """
+        return LimiterSlot(self)
+
+    async def acquire(self) -> float:
+        """
+        Wait until there is room in the window for another request.
+        :return: The time the request started, to pass back to `release`.
+        """
+        # Create the condition here rather than in the constructor so it's bound to the running event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.window)
+            self._in_flight += 1
+        return time.monotonic()
+
+    async def release(self, start_time: float, is_congested: bool) -> None:
+        """
+        Free up a request's place in the window and adjust the window based on how the request went.
+        :param start_time: The time the request started, as returned by `acquire`.
+        :param is_congested: Whether the response signalled that the API is overloaded.
+        :return: None.
+        """
+        now = time.monotonic()
+        latency = now - start_time
+
+        async with self._condition:
+            self._in_flight -= 1
+
+            if is_congested:
+                self.failures += 1
+                # Requests started before the last decrease were sent under the old window, so only shrink
+                # once for them rather than once per failed request in the same burst.
+                if start_time >= self._last_decrease:
+                    self._window = max(self.min_window, self._window * self.decrease_factor)
+                    self._last_decrease = now
+            else:
+                self.successes += 1
+                if self._min_latency is None or latency < self._min_latency:
+                    self._min_latency = latency
+                if latency <= self._min_latency * self.latency_tolerance:
+                    self._window = min(self.max_window, self._window + 1 / self._window)
+
+            self._condition.notify_all()
+
+
+class LimiterSlot:
+    def __init__(self, limiter: AdaptiveConcurrencyLimiter):
+        """
+        A single request's place in an AdaptiveConcurrencyLimiter's window. Requests that time out, fail to
+        connect, or call `mark_congested` count as a congestion signal.
+        :param limiter: The limiter the slot belongs to, if None the slot doesn't limit anything.
+        """
+        self.limiter = limiter
+        self.is_congested = False
+        self._start_time = None
+
+    def mark_congested(self) -> None:
+        """Flag the response as a sign the API is overloaded, e.g. a 429 or 5xx status."""
+        self.is_congested = True
+
+    async def __aenter__(self) -> "LimiterSlot":
+        if self.limiter:
+            self._start_time = await self.limiter.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        if not self.limiter:
+            return
+        is_congested = self.is_congested or (
+            exc_type is not None and issubclass(exc_type, (asyncio.TimeoutError, OSError))
+        )
+        await self.limiter.release(self._start_time, is_congested)
@@ -1,10 +1,27 @@
-# TODO - dataclasses would probably work better here for most of these.
-#   since dataclasses make hashing easier we could do some sort of hash comparison to compare releases?
+import sys
 
-known_releases = []
+import flags
+from .lyrics_analysis import analyse_lyrics
+
+# These classes use __slots__ rather than a per-instance __dict__ since an artist can have tens of thousands of tracks.
+# Dataclasses would do the same with `slots=True`, but that needs Python 3.10 and we still support 3.9.
+
+
+def intern_string(value: str) -> str:
+    """
+    Intern a string that's repeated across many objects, such as a release title, so they all share one copy.
+    :param value: The string to intern, or None.
+    :return: The interned string, or None.
+    """
+    return sys.intern(value) if value is not None else None
 
 
 class Artist:
+    __slots__ = (
+        "raw_data", "name", "mb_id", "description", "_tags", "releases", "lyrics_attempted", "deadline_reached",
+        "lyrics_merged",
+    )
+
     def __init__(self, raw_data: str, name: str, mb_id: str, description: str):
         """
         Class to store data for a given Artist based on data retrieved from the MusicBrainz API.
@@ -18,11 +35,25 @@ class Artist:
         self.mb_id: str = mb_id
         self.description: str = description
         self._tags: str
-        self.releases: [Release] = []
+        # Every release the artist's tracks appear on, owned by the artist so each analysis has its own
+        self.releases: ReleaseRegistry = ReleaseRegistry()
+        # How many tracks we requested lyrics for, and whether the run's deadline cut the requests short
+        self.lyrics_attempted: int = 0
+        self.deadline_reached: bool = False
+        # How many tracks with lyrics were merged into another track with the same lyrics
+        self.lyrics_merged: int = 0
 
     def __str__(self):
         return f"{self.name}"
 
+    def __eq__(self, other):
+        if not isinstance(other, Artist):
+            return NotImplemented
+        return self.mb_id == other.mb_id
+
+    def __hash__(self):
+        return hash(self.mb_id)
+
     @property
     def tags(self):
         return self._tags
@@ -35,18 +66,22 @@ class Artist:
 
 
 class Release:
+    __slots__ = ("raw_data", "name", "mb_id", "date", "release_type", "tracks")
+
     def __init__(self, raw_data: dict):
         """
         Class to store data for a single Release (i.e. a Single, an EP, an Album, etc.) by an Artist based
-        on data retrieved from the MusicBrainz API.
-        :param raw_data: The full JSON data retrieved from the API call.
+        on data retrieved from the MusicBrainz API. Releases are equal if they have the same MBID.
+        :param raw_data: The full JSON data retrieved from the API call, only kept if `flags.KEEP_RAW_DATA` is set.
         """
-        self.raw_data = raw_data
-        self.name = self.raw_data.get("title")
-        self.mb_id = self.raw_data.get("id")
-        self.date = self.raw_data.get("date")
-        self.release_type = self.raw_data.get("release-group").get("primary-type")
-        self.tracks = []
+        self.raw_data = raw_data if flags.KEEP_RAW_DATA else None
+        self.name = intern_string(raw_data.get("title"))
+        self.mb_id = raw_data.get("id")
+        self.date = intern_string(raw_data.get("date"))
+        self.release_type = intern_string(raw_data.get("release-group").get("primary-type"))
+        # A dict with every value set to None, used as an ordered set of the release's tracks. Tracks hash by
+        # identity, so repeated appearances of a recording on the release are kept apart.
+        self.tracks: {Track: None} = {}
 
     def __str__(self):
         return f"{self.name} - {self.release_type} ({self.date})"
@@ -54,21 +89,92 @@ class Release:
     def __repr__(self):
         return f"{self.name} - {self.release_type} ({self.date})"
 
+    def __eq__(self, other):
+        if not isinstance(other, Release):
+            return NotImplemented
+        return self.mb_id == other.mb_id
+
+    def __hash__(self):
+        return hash(self.mb_id)
+
+
+class ReleaseRegistry:
+    def __init__(self):
+        """
+        The releases found during an analysis, indexed by MBID so tracks on the same release can find it
+        without searching every release.
+        """
+        self._releases: {str: Release} = {}
+
+    def __len__(self):
+        return len(self._releases)
+
+    def __iter__(self):
+        return iter(self._releases.values())
+
+    def __contains__(self, release: Release):
+        return self._releases.get(release.mb_id) is release
+
+    def get(self, mb_id: str) -> Release:
+        return self._releases.get(mb_id)
+
+    def add_track(self, track: "Track", release_data: dict) -> Release:
+        """
+        Add a track to the release it appears on, creating the Release object if it's the first track we've
+        seen from that release.
+        :param track: The Track object to add.
+        :param release_data: The JSON data for the track's release, from the track's recording data.
+        :return: The Release object the track was added to.
+        """
+        release_mb_id = release_data.get("id")
+        release = self._releases.get(release_mb_id)
+        if release is None:
+            release = Release(raw_data=release_data)
+            self._releases[release_mb_id] = release
+        release.tracks[track] = None
+        return release
+
+    def remove_track(self, track: "Track") -> None:
+        """
+        Remove a track from its release, and remove the release entirely once it has no tracks left.
+        :param track: The Track object to remove.
+        :return: None.
+        """
+        release = track.release
+        release.tracks.pop(track, None)
+        if not release.tracks and release in self:
+            del self._releases[release.mb_id]
+
 
 class Track:
-    def __init__(self, raw_data: dict):
+    __slots__ = (
+        "raw_data", "name", "mb_id", "artist_id", "release", "_lyrics", "word_count", "unique_word_count", "line_count",
+    )
+
+    def __init__(self, raw_data: dict, releases: ReleaseRegistry = None):
         """
         Class to store data for a single Track by an Artist based on data retrieved from the MusicBrainz API.
-        :param raw_data: The full JSON data retrieved from the API call.
+        Tracks are only equal to themselves, since a recording can appear more than once in an artist's recordings
+        (e.g. twice on one release) and each appearance is kept or removed separately.
+        :param raw_data: The full JSON data retrieved from the API call, only kept if `flags.KEEP_RAW_DATA` is set.
+        :param releases: The registry of releases found during this analysis, usually the Artist's `releases`.
+            Tracks on the same release share a Release object through the registry, if no registry is given
+            the track gets a Release object of its own.
         """
-        self.raw_data: dict = raw_data
-        self.name: str = self.raw_data.get("title")
-        self.mb_id: str = self.raw_data.get("id")
-        self.release: Release = self._assign_release()
-        #
-        self.raw_lyrics_data: str
-        self._lyrics: str
+        self.raw_data: dict = raw_data if flags.KEEP_RAW_DATA else None
+        # Re-releases of a song share its name, so there are far fewer names than tracks
+        self.name: str = intern_string(raw_data.get("title"))
+        self.mb_id: str = raw_data.get("id")
+        # The first artist credited on the track, which should be the artist we searched for
+        self.artist_id: str = intern_string(raw_data.get("artist-credit")[0].get("artist").get("id"))
+        self.release: Release = self._assign_release(
+            raw_data.get("releases")[0],
+            releases if releases is not None else ReleaseRegistry(),
+        )
+        self._lyrics: str = None
         self.word_count: int = 0
+        self.unique_word_count: int = 0
+        self.line_count: int = 0
 
     def __str__(self):
         return f"{self.release}: {self.name}"
@@ -85,40 +191,22 @@ class Track:
     def lyrics(self, value):
         self._lyrics = value
 
-        # When we set the lyrics for a track, calculate the number of words in the lyrics as well.
+        # When we set the lyrics for a track, calculate the metrics for the lyrics as well. The most frequent words
+        # aren't kept since an artist can have tens of thousands of tracks, call `analyse_lyrics` for those.
         if self.lyrics:
-            # Trim the escape characters off of the text and replace them with spaces for easier counting.
-            escaped_lyrics = self.lyrics.replace("\n", " ").replace("\r", " ")
-            self.word_count = len(escaped_lyrics.split(" "))
+            analysis = analyse_lyrics(self.lyrics, top_n=0)
+            self.word_count = analysis.word_count
+            self.unique_word_count = analysis.unique_word_count
+            self.line_count = analysis.line_count
 
-    def _assign_release(self) -> Release:
+    def _assign_release(self, release_data: dict, releases: ReleaseRegistry) -> Release:
         """When we get Track data details of the track's Release is also included, using this method we
         build backwards to either assign the new Track object to the existing Release object's `tracks`
         attribute, or to create a new Release object based on the data derived from the track and assign
         the Track to the new Release's `tracks attribute.
+        :param release_data: The JSON data for the track's first release.
+        :param releases: The registry of releases to find or add the track's Release in.
         :returns: The Release object linked to this Track object.
         """
         # TODO - improve this, we're getting a bunch of releases with different IDs - find a way to merge them
-        release_data = self.raw_data.get("releases")[0]
-        release_name = release_data.get("title")
-        release_mb_id = release_data.get("id")
-        # Check if a Release object exists in known_releases with the same name and mb_id passed to the constructor
-        _is_existing_release = False
-        new_release = None
-
-        for release in known_releases:
-            if release.name == release_name and release.mb_id == release_mb_id:
-                _is_existing_release = True
-                new_release = release
-
-        # If the release doesn't exist yet, create it
-        if not _is_existing_release:
-            new_release = Release(raw_data=release_data)
-            known_releases.append(new_release)
-            # print(new_release)
-
-        # If this track object is not already part of the Release object's track list, add it
-        if self not in new_release.tracks:
-            new_release.tracks.append(self)
-
-        return new_release
+        return releases.add_track(self, release_data)
@@ -1,9 +1,37 @@
 import re
+import unicodedata
+from operator import itemgetter
+
 import flags
 
-from .data import Artist, Track, known_releases
+from .cache import get_response_cache
+from .data import Artist, Track, ReleaseRegistry
+from .minhash import MinHashLSH, shingle
+from .simhash import SimHashIndex, lyrics_fingerprint
+from .variant_classifier import get_variant_classifier
 import helpers.output_helpers as oh
 
+# Words in a bracketed or dashed part of a title that mark it as another edition of the same song,
+# e.g. `Song - 2011 Remaster`, `Song (Radio Edit)` or `Song [feat. X]`
+TITLE_EDITION_KEYWORDS = frozenset((
+    "remaster", "remastered", "edit", "radio", "single", "version", "mix", "remix", "mono", "stereo", "explicit",
+    "clean", "live", "demo", "acoustic", "instrumental", "bonus", "extended", "original", "feat", "ft", "featuring",
+))
+_title_part_pattern = re.compile(r"\s*\(([^)]*)\)|\s*\[([^\]]*)\]|\s+-\s+(.*)$")
+_featuring_pattern = re.compile(r"\s+(?:feat\.|ft\.|featuring\b).*$", re.IGNORECASE)
+_year_pattern = re.compile(r"^(?:19|20)\d\d$")
+# A number or a roman numeral up to 39 on its own, e.g. the `2` in `Song Part 2` or the `iv` in `Song IV`
+_sequence_number_pattern = re.compile(r"^(?:\d+|x{0,3}(?:ix|iv|v?i{1,3}|v)|x{1,3})$")
+# The similarity of the shingles of two normalised titles for them to be the same song
+NEAR_DUPLICATE_THRESHOLD = 0.8
+# The most bits the SimHash fingerprints of two songs' lyrics can differ by for them to be the same lyrics
+LYRICS_DUPLICATE_DISTANCE = 3
+
+# The reasons `find_duplicate_recordings` gives for removing a recording
+NON_ARTIST = "non-artist"
+VARIANT = "variant"
+RE_RELEASE = "re-release"
+
 
 def remove_duplicate_recordings(raw_recordings_data: [Track], artist: Artist) -> [Track]:
     """
@@ -14,60 +42,22 @@ def remove_duplicate_recordings(raw_recordings_data: [Track], artist: Artist) ->
     """
     original_length = len(raw_recordings_data)
 
-    output_data = raw_recordings_data.copy()
-
     print(oh.header("Cleaning duplicate tracks..."))
 
-    # Loop over every recording we have
-    for recording in raw_recordings_data:
-        # Quick sanity check to see if a track with the wrong artist ID has slipped through the search filters
-        if is_non_artist_song(recording, artist):
-            if flags.IS_VERBOSE:
-                if flags.IS_VERBOSE:
-                    print(oh.fail(f"{recording} is not by the artist {artist.name} - removing."))
-                if recording in output_data:
-                    output_data.remove(recording)
-                    remove_from_releases(recording)
-            continue
-
-        # Split the song name into a list of words so we can use the
-        # first word as the substring to find similar tracks
-        search_term = recording.name
-
-        # Find any recordings with similar names
-        similar_recordings = []
-        for track in raw_recordings_data:
-            substring = track.name.find(search_term)
-            if substring != -1:
-                if track.mb_id == recording.mb_id:
-                    continue
-                else:
-                    similar_recordings.append(track)
-
-        # Look for instrumental, live, remix, etc. track variants
-        if similar_recordings:
-            for sim in similar_recordings:
-                start_substr = sim.name.find(search_term)
-                end_substr = start_substr + len(search_term)
-                if is_re_release_or_instrumental(sim):
-                    if flags.IS_VERBOSE:
-                        print(oh.warning(f"Removing {sim}! as it is likely a remix, instrumental, or live version."))
-                    if sim in output_data:
-                        output_data.remove(sim)
-                        remove_from_releases(sim)
-                    continue
-                else:
-                    # If we have an exact match it's likely a single or EP re-release, in this case
-                    # we prioritise album tracks
-                    if sim.name == recording.name:
-                        # Determine which one to remove:
-                        # Is one a single with the same name? Remove that one.
-                        if flags.IS_VERBOSE:
-                            print(oh.cyan(f"Removing re-released track: {sim}"))
-                            if sim in output_data:
-                                output_data.remove(sim)
-                                remove_from_releases(sim)
-                        continue
+    removed_positions = set()
+    for position, track, reason in find_duplicate_recordings(raw_recordings_data, artist):
+        if flags.IS_VERBOSE:
+            if reason == NON_ARTIST:
+                print(oh.fail(f"{track} is not by the artist {artist.name} - removing."))
+            elif reason == VARIANT:
+                print(oh.warning(f"Removing {track}! as it is likely a remix, instrumental, or live version."))
+            else:
+                print(oh.cyan(f"Removing re-released track: {track}"))
+        removed_positions.add(position)
+        remove_from_releases(track, artist.releases)
+    output_data = [
+        recording for position, recording in enumerate(raw_recordings_data) if position not in removed_positions
+    ]
 
     # Calculate how many tracks we've removed from the initial list
     new_length = len(output_data)
@@ -85,20 +75,308 @@ def remove_duplicate_recordings(raw_recordings_data: [Track], artist: Artist) ->
     return output_data
 
 
-def remove_from_releases(track: Track) -> None:
+def find_duplicate_recordings(recordings: [Track], artist: Artist) -> [(int, Track, str)]:
+    """
+    Find the recordings `remove_duplicate_recordings` removes. Each recording by the artist is compared with every
+    recording whose name contains its name, and for each one that is a different recording:
+     - If the similar recording looks like a remix, instrumental, or live version it is removed.
+     - If it has exactly the same name it's likely a single or EP re-release, and is removed in verbose mode.
+    Recordings by other artists are also removed in verbose mode.
+
+    Rather than comparing every pair of recordings, the recordings by the artist are looked up by name, and the
+    names inside a variant's name are found with a TitleIndex. Like the original loop, a recording is removed by
+    identity, so a recording that appears more than once in the list is only removed where it is matched itself.
+    :param recordings: A list of Track objects to check for duplicates.
+    :param artist: The Artist linked to the Tracks.
+    :return: A list of the position in `recordings` of each recording to remove, the Track at that position, and
+        the reason it's removed (`NON_ARTIST`, `VARIANT` or `RE_RELEASE`), in the order the comparisons are made.
+    """
+    # The positions of the artist's recordings with each name
+    name_positions = {}
+    for position, recording in enumerate(recordings):
+        if not is_non_artist_song(recording, artist):
+            name_positions.setdefault(recording.name, []).append(position)
+    title_index = TitleIndex(name_positions)
+
+    # The first comparison that removes each recording, keyed by when it's made: the position of the artist's
+    # recording being compared, then the position of the similar recording, with the check for other artists first
+    removals = []
+    for position, recording in enumerate(recordings):
+        comparisons = []
+        if flags.IS_VERBOSE and is_non_artist_song(recording, artist):
+            comparisons.append(((position, -1), NON_ARTIST))
+
+        if is_re_release_or_instrumental(recording):
+            names = title_index.titles_in(recording.name)
+            reason = VARIANT
+        elif flags.IS_VERBOSE and recording.name in name_positions:
+            names = (recording.name,)
+            reason = RE_RELEASE
+        else:
+            names = ()
+        for name in names:
+            # Only the earliest recording with the name that is a different recording matters
+            for original_position in name_positions[name]:
+                if recordings[original_position].mb_id != recording.mb_id:
+                    comparisons.append(((original_position, position), reason))
+                    break
+
+        if comparisons:
+            key, reason = min(comparisons)
+            removals.append((key, position, recording, reason))
+
+    removals.sort(key=itemgetter(0))
+    return [(removed_position, recording, reason) for _key, removed_position, recording, reason in removals]
+
+
+class TitleIndex:
+    def __init__(self, titles):
+        """
+        An index of track titles for finding which of them appear inside another title, without testing every title.
+        Every prefix of the titles is kept in a set, so the titles starting at each position of the other title can
+        be found by extending a match one character at a time, stopping as soon as it isn't the start of any title.
+        :param titles: The titles to index.
+        """
+        self._titles = set(titles)
+        self._prefixes = {title[:end] for title in self._titles for end in range(1, len(title) + 1)}
+
+    def titles_in(self, text: str) -> {str}:
+        """
+        Find the indexed titles that are a substring of some text, matched exactly like `str.find`.
+        :param text: The text to search, usually another track's title.
+        :return: A set of the titles found in the text.
+        """
+        titles = self._titles
+        prefixes = self._prefixes
+        found = {""} if "" in titles else set()
+        text_length = len(text)
+        for start in range(text_length):
+            for end in range(start + 1, text_length + 1):
+                substring = text[start:end]
+                if substring not in prefixes:
+                    break
+                if substring in titles:
+                    found.add(substring)
+        return found
+
+
+def remove_near_duplicate_recordings(
+        recordings: [Track],
+        artist: Artist,
+        threshold: float = NEAR_DUPLICATE_THRESHOLD,
+) -> [Track]:
+    """
+    Remove the near duplicates the exact and substring matching in `remove_duplicate_recordings` misses, such
+    as `Song - 2011 Remaster`, `Song (Radio Edit)` or `Song [feat. X]`. Titles are normalised with
+    `normalise_title`, then titles with similar shingles are grouped with MinHash and locality sensitive hashing,
+    so each title is only compared with the few titles likely to be near duplicates of it rather than every other.
+    :param recordings: A list of Track objects, usually already cleaned by `remove_duplicate_recordings`.
+    :param artist: The Artist linked to the Tracks.
+    :param threshold: The Jaccard similarity of two normalised titles' shingles for them to be the same song, titles
+        ending in different numbers (see `title_sequence_numbers`) are never the same song however similar they are.
+    :return: The recordings with one canonical track kept from each group of near duplicates, chosen by
+        `canonical_track_key`, in their original order.
+    """
+    # Tracks with the same normalised title are always grouped, so only compare each different title once
+    titles = {}
+    for recording in recordings:
+        titles.setdefault(normalise_title(recording.name), []).append(recording)
+    title_groups = MinHashLSH(threshold=threshold).group([shingle(title) for title in titles])
+
+    groups = {}
+    for group, (title, title_recordings) in zip(title_groups, titles.items()):
+        # The numbered parts of a song share most of their title, so their shingles are similar even for long titles,
+        # but they're different songs
+        groups.setdefault((group, title_sequence_numbers(title)), []).extend(title_recordings)
+
+    removed = set()
+    for group_recordings in groups.values():
+        if len(group_recordings) == 1:
+            continue
+        canonical = min(group_recordings, key=canonical_track_key)
+        for recording in group_recordings:
+            if recording is not canonical:
+                if flags.IS_VERBOSE:
+                    print(oh.cyan(f"Removing {recording} as a near duplicate of {canonical}"))
+                removed.add(id(recording))
+                remove_from_releases(recording, artist.releases)
+
+    print(oh.cyan(f"Merged {len(removed)} near duplicate tracks"))
+    return [recording for recording in recordings if id(recording) not in removed]
+
+
+def remove_duplicate_lyrics(
+        tracks: [Track],
+        artist: Artist,
+        max_distance: int = LYRICS_DUPLICATE_DISTANCE,
+) -> [Track]:
+    """
+    Merge tracks whose lyrics are the same, or nearly the same, as another track's. Different recordings of a song
+    can slip through the title cleaning and return near identical lyrics, which would count the song more than once.
+    Each track's lyrics get a SimHash fingerprint, and tracks with fingerprints within `max_distance` bits of each
+    other are found through a SimHashIndex rather than comparing every pair.
+    The fingerprints are saved in the response cache, if it's enabled, for `skip_known_duplicate_lyrics`.
+    :param tracks: A list of Track objects with lyrics.
+    :param artist: The Artist linked to the Tracks, the number of tracks merged is added to its `lyrics_merged`.
+    :param max_distance: The most bits two fingerprints can differ by to be duplicates.
+    :return: The tracks with one track kept from each set of duplicate lyrics, chosen by `canonical_track_key`,
+        in their original order.
+    """
+    index = SimHashIndex(max_distance)
+    fingerprints = []
+    merged = set()
+    for track in sorted(tracks, key=canonical_track_key):
+        fingerprint = lyrics_fingerprint(track.lyrics)
+        canonical = index.find(fingerprint) if fingerprint else None
+        if canonical is None:
+            index.add(fingerprint, track)
+            fingerprints.append((track.mb_id, fingerprint, None))
+            continue
+        if flags.IS_VERBOSE:
+            print(oh.cyan(f"Removing {track} as it has the same lyrics as {canonical}"))
+        fingerprints.append((track.mb_id, fingerprint, canonical.mb_id))
+        merged.add(id(track))
+        remove_from_releases(track, artist.releases)
+
+    cache = get_response_cache()
+    if cache:
+        cache.set_lyrics_fingerprints(fingerprints)
+
+    artist.lyrics_merged += len(merged)
+    print(oh.cyan(f"Merged {len(merged)} tracks with duplicate lyrics"))
+    return [track for track in tracks if id(track) not in merged]
+
+
+def skip_known_duplicate_lyrics(tracks: [Track], artist: Artist) -> [Track]:
+    """
+    Remove tracks that an earlier run found to have the same lyrics as another of the tracks, using the duplicates
+    saved in the response cache by `remove_duplicate_lyrics`, so their lyrics don't need to be requested.
+    :param tracks: A list of Track objects, before their lyrics are requested.
+    :param artist: The Artist linked to the Tracks, the number of tracks skipped is added to its `lyrics_merged`
+        and `lyrics_attempted` so the coverage is the same as a run that requested and then merged them.
+    :return: The tracks that aren't known duplicates of another track being kept, in their original order.
+    """
+    known_duplicates = KnownDuplicateLyricsFilter(artist)
+    kept_tracks = known_duplicates.add(tracks)
+    known_duplicates.flush()
+    return kept_tracks
+
+
+class KnownDuplicateLyricsFilter:
+    def __init__(self, artist: Artist):
+        """
+        Applies `skip_known_duplicate_lyrics` to tracks as they arrive a page at a time, for the streaming pipeline.
+        A known duplicate is only skipped if the track it was merged into has already been kept, since a later page
+        might not have that track - any duplicates kept before it are merged by `remove_duplicate_lyrics` as usual.
+        :param artist: The Artist linked to the Tracks.
+        """
+        self.artist = artist
+        self.skipped = 0
+        self._cache = get_response_cache()
+        self._kept_ids = set()
+
+    def add(self, tracks: [Track]) -> [Track]:
+        """
+        Filter a batch of tracks before their lyrics are requested.
+        :param tracks: A list of Track objects, e.g. the tracks kept from a single page of recordings data.
+        :return: The tracks that aren't known duplicates of a kept track, in their original order.
+        """
+        duplicates = self._cache.get_lyrics_duplicates(track.mb_id for track in tracks) if self._cache else {}
+
+        # Go through the tracks in the order `remove_duplicate_lyrics` chooses them, so the track each duplicate was
+        # merged into is kept before the duplicate is checked
+        skipped = set()
+        for track in sorted(tracks, key=canonical_track_key):
+            if duplicates.get(track.mb_id) in self._kept_ids:
+                skipped.add(id(track))
+                remove_from_releases(track, self.artist.releases)
+            else:
+                self._kept_ids.add(track.mb_id)
+
+        # The skipped tracks had lyrics found when they were merged, so count them as a run without the cache would
+        self.skipped += len(skipped)
+        self.artist.lyrics_merged += len(skipped)
+        self.artist.lyrics_attempted += len(skipped)
+        return [track for track in tracks if id(track) not in skipped]
+
+    def flush(self) -> None:
+        """
+        Report the number of tracks skipped once every track has been added.
+        :return: None.
+        """
+        if self.skipped:
+            print(oh.cyan(f"Skipped {self.skipped} tracks known to have duplicate lyrics"))
+
+
+def canonical_track_key(track: Track) -> tuple:
+    """
+    Sort key for choosing which of a group of near duplicate tracks to keep, the track with the smallest key is kept.
+    Album tracks are preferred over singles, EPs and compilations, then the earliest release, then the track's name
+    so the same track is chosen whatever order the recordings arrived in.
+    :param track: Track object to get the key for.
+    :return: A tuple of whether the track isn't on an album, its release date, and its name.
+    """
+    # Dates are `%Y-%m-%d`, `%Y-%m` or just `%Y` so they sort as strings, releases without a date go last
+    return track.release.release_type != "Album", track.release.date or "9999", track.name, track.mb_id
+
+
+def normalise_title(name: str) -> str:
+    """
+    Normalise a track title for near duplicate matching, removing any parts marking it as another edition of the
+    same song (a bracketed or dashed part containing one of `TITLE_EDITION_KEYWORDS` or a year, and any
+    featured artists) before normalising it with `normalise_name`.
+    :param name: The title of the track.
+    :return: The normalised title, or the whole normalised title if every part of it marks an edition.
+    """
+
+    def remove_edition(match: re.Match) -> str:
+        words = normalise_name(next(part for part in match.groups() if part is not None)).split()
+        if any(word in TITLE_EDITION_KEYWORDS or _year_pattern.match(word) for word in words):
+            return ""
+        return match.group(0)
+
+    title = normalise_name(_featuring_pattern.sub("", _title_part_pattern.sub(remove_edition, name)))
+    return title or normalise_name(name)
+
+
+def title_sequence_numbers(title: str) -> (str,):
+    """
+    Get the numbers at the end of a normalised title that mark which of a series of songs it is, e.g. the `2` of
+    `another brick in the wall part 2`, so near duplicate matching never merges two parts of a song.
+    :param title: A title normalised with `normalise_title`.
+    :return: A tuple of the trailing numbers and roman numerals in the title, empty if it doesn't end in one.
+    """
+    words = title.split()
+    end = len(words)
+    # Keep at least one word so a title that's just a number, e.g. `1979`, isn't treated as a part of a series
+    while end > 1 and _sequence_number_pattern.match(words[end - 1]):
+        end -= 1
+    return tuple(words[end:])
+
+
+def normalise_name(name: str) -> str:
+    """
+    Normalise an artist name or song title so small differences in punctuation, accents and case don't stop
+    two names matching, e.g. `Beyoncé` and `beyonce`.
+    :param name: The artist name or song title.
+    :return: The name in lowercase without accents, apostrophes or any other punctuation.
+    """
+    decomposed_name = unicodedata.normalize("NFKD", name)
+    name = "".join(character for character in decomposed_name if not unicodedata.combining(character))
+    name = re.sub(r"['’]", "", name.casefold())
+    return " ".join(re.sub(r"[\W_]+", " ", name).split())
+
+
+def remove_from_releases(track: Track, releases: ReleaseRegistry) -> None:
     """
     When removing a duplicate track we want to also remove it from it's linked Release object, if a Release
     object has no more elements in its `tracks` attribute then we want to remove the Release object from
-    the list of known_releases entirely.
+    the registry of releases entirely.
     :param track: The Track object marked as duplicate that we are removing
+    :param releases: The registry of releases the track was added to, usually the Artist's `releases`.
     :return: None
     """
-    for release in known_releases:
-        if track in release.tracks:
-            # print(oh.fail(f"Removed {track.name} from {release.name} tracklist!"))
-            release.tracks.remove(track)
-            if len(release.tracks) == 0:
-                known_releases.remove(release)
+    releases.remove_track(track)
 
 
 def is_non_artist_song(track: Track, artist: Artist) -> bool:
@@ -108,8 +386,7 @@ def is_non_artist_song(track: Track, artist: Artist) -> bool:
     :param artist: Artist object linked to the track.
     :return: A boolean value representing whether or not the track is a non-artist song.
     """
-    track_artist_id = track.raw_data.get("artist-credit")[0].get("artist").get("id")
-    if track_artist_id != artist.mb_id:
+    if track.artist_id != artist.mb_id:
         return True
     return False
 
@@ -118,25 +395,11 @@ def is_re_release_or_instrumental(track: Track) -> bool:
     """
     Helper method to detect songs re-released as live or remixed versions,
     and instrumental tracks we don't need to find lyrics for.
-    :param track:
+    :param track: Track object to check.
     :return: A boolean value representing whether or not the track is a re-release, instrumental,
         demo, or any other kind of duplicate version of an existing song in the data.
     """
-    # Clean the names of the track and release, removing any parentheses
-    # and making them lowercase for comparison
-    track_name = re.sub("[()]", '', track.name.lower())
-    release_name = re.sub("[()]", '', track.release.name.lower())
-
-    # Split the track and release names into words, we only want whole word instances of these
-    # keywords to prevent removing valid song names like "Alive" or "Mixed Up"
-    track_name_words = track_name.split(" ")
-    release_name_words = release_name.split(" ")
-    for keyword in ["live", "mix", "remix", "cut", "take", "master", "mono", "deluxe", "demo", "version", "instrumental", "session", "acoustic", "rehearsal", "5.1"]:
-        if keyword in track_name_words:
-            return True
-        elif keyword in release_name_words:
-            return True
-    return False
+    return get_variant_classifier().is_variant(track)
 
 
 def remove_lyrics_credit(lyrics: str) -> str:
@@ -153,3 +416,76 @@ def remove_lyrics_credit(lyrics: str) -> str:
         local_lyrics = local_lyrics[first_escape_index:]
 
     return local_lyrics
+
+
+class IncrementalDuplicateFilter:
+    def __init__(self, artist: Artist):
+        """
+        Applies the same rules as `remove_duplicate_recordings` to tracks as they arrive a page at a time,
+        so tracks can be passed on to the lyrics requests before every page of recordings has been fetched.
+
+        Tracks that look like a remix, live, or instrumental version can only be removed once we know whether
+        the original song is in the data, so they are held back until `flush` is called after the last page.
+        :param artist: The Artist linked to the Tracks.
+        """
+        self.artist = artist
+        self.received = 0
+        self.removed = 0
+        # Every name by the artist we've seen and the IDs of the recordings with it, for finding the originals
+        self._seen_names = {}
+        self._accepted_names = set()
+        self._held_variants = []
+
+    def add(self, tracks: [Track]) -> [Track]:
+        """
+        Filter a batch of newly retrieved tracks.
+        :param tracks: A list of Track objects, e.g. from a single page of recordings data.
+        :return: The tracks that can be kept straight away.
+        """
+        accepted = []
+        for track in tracks:
+            self.received += 1
+            if is_non_artist_song(track, self.artist):
+                self._remove(track, oh.fail(f"{track} is not by the artist {self.artist.name} - removing."))
+                continue
+            self._seen_names.setdefault(track.name, set()).add(track.mb_id)
+
+            if is_re_release_or_instrumental(track):
+                self._held_variants.append(track)
+            elif self._accept(track):
+                accepted.append(track)
+        return accepted
+
+    def flush(self) -> [Track]:
+        """
+        Filter the held back remix/live/instrumental tracks once every track has been added.
+        :return: The held back tracks that aren't a version of another song in the data.
+        """
+        accepted = []
+        title_index = TitleIndex(self._seen_names)
+        for track in self._held_variants:
+            if self._has_original(track, title_index):
+                self._remove(track, oh.warning(f"Removing {track}! as it is likely a remix, instrumental, or live version."))
+            elif self._accept(track):
+                accepted.append(track)
+        self._held_variants = []
+
+        print(oh.cyan(f"Removed {self.removed} duplicates, remixes, or live tracks"))
+        return accepted
+
+    def _accept(self, track: Track) -> bool:
+        # If we have an exact match it's likely a single or EP re-release, so only keep the first one we see
+        if track.name in self._accepted_names:
+            self._remove(track, oh.cyan(f"Removing re-released track: {track}"))
+            return False
+        self._accepted_names.add(track.name)
+        return True
+
+    def _has_original(self, track: Track, title_index: TitleIndex) -> bool:
+        return any(self._seen_names[name] != {track.mb_id} for name in title_index.titles_in(track.name))
+
+    def _remove(self, track: Track, message: str) -> None:
+        if flags.IS_VERBOSE:
+            print(message)
+        self.removed += 1
+        remove_from_releases(track, self.artist.releases)
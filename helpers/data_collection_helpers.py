@@ -5,12 +5,37 @@ import backoff
 import musicbrainzngs
 
 import flags
-from .data_cleanup_helpers import remove_lyrics_credit, remove_duplicate_recordings
+from .data_cleanup_helpers import remove_duplicate_recordings
 from . import api_parser
-from .data import Artist, Track, known_releases
+from .cache import get_response_cache
+from .fast_json import loads
+from .metrics import get_metrics, record_retry
+from .concurrency import AdaptiveConcurrencyLimiter
+from .deadline import Deadline, DeadlineExceeded
+from .lyrics_providers import LyricsProvider, get_lyrics_provider
+from .rate_limiter import get_rate_limiter, parse_retry_after
+from .running_stats import RunningStatistics
+from .data import Artist, Track
 import helpers.output_helpers as oh
 
 
+USER_AGENT = "LyricsCounter/0.1"
+
+
+def create_session() -> aiohttp.ClientSession:
+    """
+    Create the session every API request is made with, so requests share one connection pool.
+    :return: A new aiohttp ClientSession.
+    """
+    # We use this accept header so the MusicBrainz API will return JSON data instead of XML,
+    # and the API asks every client to identify itself with a meaningful user agent.
+    headers = {"Accept": "application/json", "User-Agent": USER_AGENT}
+    # Without timeouts a stalled connection can hang a request (and the whole run) indefinitely. Timed out
+    # requests are retried like any other failed request, the run's deadline limits how long that goes on for.
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=flags.CONNECT_TIMEOUT, sock_read=flags.READ_TIMEOUT)
+    return aiohttp.ClientSession(headers=headers, timeout=timeout)
+
+
 def get_artist_data(artist_name: str) -> (Artist, str):
     """
     Given the name of an artist, search the MusicBrainz API for said artist - prompting the user
@@ -26,18 +51,79 @@ def get_artist_data(artist_name: str) -> (Artist, str):
     # Build a url from the artist name
     print(oh.header("Finding artist..."))
 
+    # Share the MusicBrainz rate limit with the recordings requests
+    get_rate_limiter("musicbrainz.org").acquire_sync()
     artist_data = musicbrainzngs.search_artists(
         limit=3,
         artist=artist_name,
     ).get('artist-list')
 
+    return build_artist(artist_data, timer_start)
+
+
+async def search_artist_data(session: aiohttp.ClientSession, artist_name: str, interactive: bool = True) -> (Artist, str):
+    """
+    Async version of `get_artist_data` that searches the MusicBrainz API using the given session, so the
+    search doesn't block the event loop and shares the session's connections with the other requests.
+    :param session: The session to make the API request with.
+    :param artist_name: The name of the artist to search for data on.
+    :param interactive: Whether the user can be prompted to choose between multiple results, if not the
+        top result is used.
+    :return: A tuple containing the new Artist object instantiated from the API data,
+        and a string to be passed as an error message.
+    """
+    from time import perf_counter
+    timer_start = perf_counter()
+
+    print(oh.header("Finding artist..."))
+
+    search_url = api_parser.build_artist_search_url(artist_name, limit=3)
+    search_data = await make_musicbrainz_request(session, search_url)
+    artist_data = search_data.get("artists") if search_data else None
+
+    return build_artist(artist_data, timer_start, interactive)
+
+
+async def lookup_artist_data(session: aiohttp.ClientSession, artist_id: str) -> (Artist, str):
+    """
+    Get an artist's data from the MusicBrainz API by their ID rather than searching by name.
+    :param session: The session to make the API request with.
+    :param artist_id: The id the artist is assigned in the MusicBrainz database.
+    :return: A tuple containing the new Artist object instantiated from the API data,
+        and a string to be passed as an error message.
+    """
+    from time import perf_counter
+    timer_start = perf_counter()
+
+    print(oh.header("Finding artist..."))
+
+    artist_data = await make_musicbrainz_request(session, api_parser.build_artist_lookup_url(artist_id))
+
+    return build_artist([artist_data] if artist_data else None, timer_start, interactive=False)
+
+
+def build_artist(artist_data: [dict], timer_start: float, interactive: bool = True) -> (Artist, str):
+    """
+    Build an Artist object from the results of an artist search, prompting the user
+    for a choice if multiple results are returned.
+    :param artist_data: List of JSON dicts returned by the artist search.
+    :param timer_start: The time the search was started, for performance output.
+    :param interactive: Whether the user can be prompted to choose between multiple results.
+    :return: A tuple containing the new Artist object instantiated from the API data,
+        and a string to be passed as an error message.
+    """
+    from time import perf_counter
+
     # If we get no data from the API, return an error message.
     if not artist_data:
         return None, oh.fail("No artist found!")
 
     # If we get a lot of results from a unique or common artist name (or a fragment of another artist name)
     # then err on the side of caution and ask the user which artist they were looking for.
-    artist = select_artist_from_multiple_choices(artist_data)
+    if interactive:
+        artist = select_artist_from_multiple_choices(artist_data)
+    else:
+        artist = artist_data[0]
 
     # Assign the data from the API into an Artist class for later reference
     artist_name = artist.get("name")
@@ -47,8 +133,9 @@ def get_artist_data(artist_name: str) -> (Artist, str):
     if artist.get("tags"):
         artist_tags = [tag.get("name") for tag in artist.get("tags")]
 
+    # Only keep every search result around when debugging, otherwise the chosen artist's data is all we need
     artist_object = Artist(
-        raw_data=artist_data,
+        raw_data=artist_data if flags.KEEP_RAW_DATA else artist,
         name=artist_name,
         mb_id=artist_id,
         description=artist_description,
@@ -126,10 +213,6 @@ def select_artist_from_multiple_choices(artist_data) -> dict:
     return chosen_artist
 
 
-request_counter = 0
-track_count = 0
-
-
 async def get_recordings_data(session: aiohttp.ClientSession, artist: Artist) -> ([Track], str):
     """
 
@@ -140,19 +223,15 @@ async def get_recordings_data(session: aiohttp.ClientSession, artist: Artist) ->
     from time import perf_counter
     timer_start = perf_counter()
 
+    metrics = get_metrics()
+    requests_before = metrics.request_count("recording")
+
     recordings = []
     # Since the MusicBrainz API limits search and browse requests to 100 entries per page, we need to make sequential
     # requests when an artist has more than 100 recordings listed in the database.
     #
     # To do this we offset the request data each iteration based on the number of tracks we know are in the list
     # (from count provided in the data) vs the number of tracks retrieved after each request.
-    #
-    # FIXME - This is a bit hacky, we use global vars here to more easily pass these vars between this
-    #  function and each individual async function.
-    global request_counter
-    request_counter = 0
-    global track_count
-    track_count = 0
 
     print(oh.header("Finding songs..."))
 
@@ -163,6 +242,7 @@ async def get_recordings_data(session: aiohttp.ClientSession, artist: Artist) ->
         return None, oh.fail("No songs found!")
 
     track_count = recording_data.get("count")
+    metrics.recordings_expected += track_count
 
     # If we need to make more than 1 request, batch all requests using asyncio
     if track_count >= 100:
@@ -193,6 +273,7 @@ async def get_recordings_data(session: aiohttp.ClientSession, artist: Artist) ->
     for track in combined_data:
         current_track = Track(
             raw_data=track,
+            releases=artist.releases,
         )
         recordings.append(current_track)
 
@@ -201,106 +282,336 @@ async def get_recordings_data(session: aiohttp.ClientSession, artist: Artist) ->
     print(oh.cyan(f"Found {len(recordings)} tracks"))
 
     if flags.PERFORMANCE_TIMING:
-        print(oh.blue(f"{len(recordings)} songs retrieved from API in {request_counter} requests in {timer_stop - timer_start} seconds"))
+        request_count = metrics.request_count("recording") - requests_before
+        print(oh.blue(f"{len(recordings)} songs retrieved from API in {request_count} requests in {timer_stop - timer_start} seconds"))
 
     return recordings, None
 
 
-# Use backoff to handle HTTP errors and retry since the optimisation
-# speed of the async requests can cause us to hit rate limits
-@backoff.on_exception(backoff.expo, aiohttp.web.HTTPException, max_tries=10)
-async def make_recordings_request(session: aiohttp.ClientSession, url: str) -> dict:
-    """"""
-    retry_statuses = [x for x in range(100, 600)]
-    retry_statuses.remove(200)
-    retry_statuses.remove(429)
+async def get_release_group_recordings_data(session: aiohttp.ClientSession, artist: Artist) -> ([Track], str):
+    """
+    Alternative to `get_recordings_data` that works from the artist's release groups rather than every recording.
+
+    Searching recordings returns every official release of every song, including all the re-releases we later
+    throw away as duplicates. Instead we browse the artist's album and EP releases, keep only the earliest
+    official release in each release group, and request just those tracklists.
+    :param session: The session to make API requests with.
+    :param artist: The Artist to find recordings for.
+    :return: A tuple containing a list of Track objects, and a string to pass as an error message.
+    """
+    from time import perf_counter
+    timer_start = perf_counter()
 
-    async with session.get(url) as response:
-        if response.status in retry_statuses:
-            if flags.IS_VERBOSE:
-                print(oh.warning(f"Response returned status {response.status}, retrying."))
-            raise aiohttp.web.HTTPException
-        recording_data = await response.json()
+    metrics = get_metrics()
+    requests_before = metrics.request_count("release")
 
-        global request_counter
-        request_counter += 1
+    print(oh.header("Finding songs..."))
 
+    # Browse every page of releases, the first page tells us how many releases there are
+    release_data = await make_recordings_request(session, api_parser.build_release_browse_url(artist.mb_id, 0))
+    if not release_data or not release_data.get("releases"):
+        return None, oh.fail("No songs found!")
+
+    release_count = release_data.get("release-count")
+    tasks = [
+        asyncio.ensure_future(make_recordings_request(session, api_parser.build_release_browse_url(artist.mb_id, offset)))
+        for offset in range(100, release_count, 100)
+    ]
+    release_pages = [release_data, *[page for page in await asyncio.gather(*tasks) if page]]
+
+    canonical_releases = select_canonical_releases(
+        [release for page in release_pages for release in page.get("releases")]
+    )
+
+    # Request the tracklist of each canonical release and build Tracks from them
+    tasks = [
+        asyncio.ensure_future(make_recordings_request(session, api_parser.build_release_lookup_url(release.get("id"))))
+        for release in canonical_releases
+    ]
+    recordings = []
+    for release_lookup in await asyncio.gather(*tasks):
+        if not release_lookup:
+            continue
+        for track_data in build_release_tracks_data(release_lookup):
+            recordings.append(Track(raw_data=track_data, releases=artist.releases))
+
+    timer_stop = perf_counter()
+
+    if not recordings:
+        return None, oh.fail("No songs found!")
+
+    print(oh.cyan(f"Found {len(recordings)} tracks on {len(canonical_releases)} releases"))
+
+    if flags.PERFORMANCE_TIMING:
+        request_count = metrics.request_count("release") - requests_before
+        print(oh.blue(f"{len(recordings)} songs retrieved from API in {request_count} requests in {timer_stop - timer_start} seconds"))
+
+    return recordings, None
+
+
+def select_canonical_releases(releases: [dict]) -> [dict]:
+    """
+    Pick one release to represent each release group, so each album or EP is only counted once no matter how
+    many times it has been re-released.
+    :param releases: List of release JSON dicts from the MusicBrainz API, including their release group.
+    :return: The earliest official release from each primary release group, in the order the groups were first seen.
+    """
+    canonical_releases = {}
+    for release in releases:
+        release_group = release.get("release-group") or {}
+        # Skip live albums, compilations, remix albums, etc. in the same way the recordings query does
+        if release_group.get("secondary-types"):
+            continue
+        group_id = release_group.get("id")
+        # Releases without a date sort after every dated release
+        release_date = release.get("date") or "9999"
+        current = canonical_releases.get(group_id)
+        if current is None or release_date < (current.get("date") or "9999"):
+            canonical_releases[group_id] = release
+    return list(canonical_releases.values())
+
+
+def build_release_tracks_data(release_data: dict) -> [dict]:
+    """
+    Convert a release lookup from the MusicBrainz API into recording dicts in the same shape the recordings search
+    returns, so Track objects can be built from either.
+    :param release_data: The JSON data for a release, including its recordings and release group.
+    :return: A list of recording dicts, one for each track on the release.
+    """
+    release = {
+        "id": release_data.get("id"),
+        "title": release_data.get("title"),
+        "date": release_data.get("date"),
+        "release-group": release_data.get("release-group"),
+    }
+    tracks_data = []
+    for medium in release_data.get("media") or []:
+        for track in medium.get("tracks") or []:
+            recording = track.get("recording") or {}
+            tracks_data.append({
+                "id": recording.get("id"),
+                "title": recording.get("title") or track.get("title"),
+                "artist-credit": recording.get("artist-credit") or release_data.get("artist-credit"),
+                "releases": [release],
+            })
+    if not flags.KEEP_RAW_DATA:
+        tracks_data = [trim_recording_data(track_data) for track_data in tracks_data]
+    return tracks_data
+
+
+def trim_recording_data(recording_data: dict) -> dict:
+    """
+    Strip a recording dict from the MusicBrainz API down to the fields Track and Release objects use, keeping the
+    same shape so the trimmed dict can be used in place of the full one. Each Track keeps its recording dict for
+    the whole run, so for artists with thousands of recordings the full payloads take up a lot of memory.
+    :param recording_data: The JSON data for a single recording.
+    :return: A new dict with the recording's title and id, the id of its first credited artist, and the title, id,
+        date and primary type of its first release.
+    """
+    trimmed_data = {
+        "id": recording_data.get("id"),
+        "title": recording_data.get("title"),
+        "artist-credit": [
+            {"artist": {"id": (credit.get("artist") or {}).get("id")}}
+            for credit in (recording_data.get("artist-credit") or [])[:1]
+        ],
+        "releases": [],
+    }
+    for release_data in (recording_data.get("releases") or [])[:1]:
+        trimmed_data["releases"].append({
+            "id": release_data.get("id"),
+            "title": release_data.get("title"),
+            "date": release_data.get("date"),
+            "release-group": {"primary-type": (release_data.get("release-group") or {}).get("primary-type")},
+        })
+    return trimmed_data
+
+
+async def make_recordings_request(session: aiohttp.ClientSession, url: str) -> dict:
+    """
+    Get a page of recordings data, either from the response cache or the MusicBrainz API.
+    :param session: The session to make the API request with.
+    :param url: The recordings url, built with `api_parser.build_recordings_query_url`.
+    :return: The JSON data for the page of recordings, with each recording trimmed to the fields we use unless
+        `flags.KEEP_RAW_DATA` is set.
+    """
+    # Serve the page from the response cache if we've requested it recently, the cached pages are trimmed
+    # so they can't be used when we want to keep the full payloads.
+    cache = get_response_cache()
+    if cache and not flags.KEEP_RAW_DATA:
+        is_cached, recording_data = cache.get("recordings", url)
+        if is_cached:
+            return recording_data
+
+    recording_data = await make_musicbrainz_request(session, url)
+    # Only trimmed pages are cached, and a missing page isn't cached so it's requested again next time
+    if recording_data is None or flags.KEEP_RAW_DATA:
         return recording_data
 
+    # Trim the page before caching it so the cache stores (and later decodes) less data too
+    if recording_data.get("recordings"):
+        recording_data["recordings"] = [trim_recording_data(recording) for recording in recording_data["recordings"]]
+
+    if cache:
+        cache.set("recordings", url, recording_data)
+
+    return recording_data
+
 
-# Use backoff to handle HTTP errors and retry since the async requests can cause us to hit rate limits
-@backoff.on_exception(backoff.expo, aiohttp.web.HTTPException, max_tries=10)
-async def make_lyrics_request(session: aiohttp.ClientSession, url: str, track: Track) -> Track:
-    """"""
+# Use backoff to retry failed requests, we don't need to wait between retries here since
+# the rate limiter paces every request (including retries) to what the MusicBrainz API allows.
+@backoff.on_exception(
+    backoff.constant,
+    (aiohttp.web.HTTPException, asyncio.TimeoutError),
+    interval=0,
+    jitter=None,
+    max_tries=10,
+    on_backoff=record_retry,
+)
+async def make_musicbrainz_request(session: aiohttp.ClientSession, url: str) -> dict:
+    """
+    Make a request to the MusicBrainz API, pacing it with the rate limiter shared by every MusicBrainz request.
+    :param session: The session to make the API request with, which should send an `Accept: application/json` header.
+    :param url: The MusicBrainz API url to request, built with `api_parser`.
+    :return: The JSON data returned by the API.
+    """
     retry_statuses = [x for x in range(100, 600)]
     retry_statuses.remove(200)
-    retry_statuses.remove(429)
-    retry_statuses.remove(404)
 
-    async with session.get(url) as response:
-        if response.status in retry_statuses:
-            if flags.IS_VERBOSE:
-                print(oh.warning(f"{track.name} returned status {response.status}, retrying."))
-            raise aiohttp.web.HTTPException
+    rate_limiter = get_rate_limiter(url)
+    if rate_limiter:
+        await rate_limiter.acquire()
 
-        # Disable the content_type check here since the lyrics API sends text/html for `no lyrics found` responses
-        # and application/json for valid responses.
-        if "application/json" in response.headers['content-type']:
-            lyrics_data = await response.json()
-        else:
+    async with get_metrics().measure(url) as measurement, session.get(url) as response:
+        measurement.status = response.status
+        # Lookups for an ID that isn't in the database won't succeed however many times we retry
+        if response.status == 404:
             if flags.IS_VERBOSE:
-                print(oh.fail(f"Can't retrieve lyrics for {track.name}: Response status {response.status}" + response.headers['content-type']))
+                print(oh.fail(f"Nothing found for {url}"))
             return None
-
-        lyrics = lyrics_data.get("lyrics")
-        error = lyrics_data.get("error")
-
-        # If we get no lyrics data from the API, show the user an error message and continue
-        if error:
+        if response.status in retry_statuses:
+            # If we've been rate limited, hold back every request to the API for as long as it asks us to
+            if response.status in (429, 503) and rate_limiter:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"), 1 / rate_limiter.rate)
+                rate_limiter.penalise(retry_after)
             if flags.IS_VERBOSE:
-                print(oh.fail(f"No lyrics found for {track.name}"))
-            return None
+                print(oh.warning(f"Response returned status {response.status}, retrying."))
+            raise aiohttp.web.HTTPException
+        # Read the body once and decode it ourselves, which is faster than `response.json()` with orjson installed
+        body = await response.read()
+        measurement.bytes_received = len(body)
+        return loads(body)
+
+
+async def make_lyrics_request(
+        session: aiohttp.ClientSession,
+        artist: Artist,
+        track: Track,
+        limiter: AdaptiveConcurrencyLimiter = None,
+        provider: LyricsProvider = None,
+) -> Track:
+    """
+    Get the lyrics for a track from the lyrics providers, and store them on the Track.
+    :param session: The session to make any API requests with.
+    :param artist: The Artist linked to the track.
+    :param track: The Track object to store the lyrics in.
+    :param limiter: The concurrency limiter shared by all lyrics requests, or None to make the request straight away.
+    :param provider: The lyrics provider to use, defaults to the providers set by the global flags.
+    :return: The Track object with its lyrics set, or None if no usable lyrics were found.
+    """
+    if provider is None:
+        provider = get_lyrics_provider()
 
-        # Remove a common lyrics header this API's sources sometimes have within the lyrics data
-        cleaned_lyrics = remove_lyrics_credit(lyrics)
+    cleaned_lyrics = await provider.get_lyrics(session, artist.name, track, limiter)
+    if not cleaned_lyrics:
+        return None
 
-        # Some songs will be instrumental even after filtering (not all instrumental songs have it in the title)
-        if cleaned_lyrics.lower().find("instrumental") != -1:
-            if flags.IS_VERBOSE:
-                print(oh.warning(f"{track.name} is an instrumental!"))
-            return None
+    # Some songs will be instrumental even after filtering (not all instrumental songs have it in the title)
+    if cleaned_lyrics.lower().find("instrumental") != -1:
+        if flags.IS_VERBOSE:
+            print(oh.warning(f"{track.name} is an instrumental!"))
+        return None
 
-        track.lyrics = cleaned_lyrics
+    track.lyrics = cleaned_lyrics
 
-        return track
+    return track
 
 
-async def get_song_lyrics(session: aiohttp.ClientSession, cleaned_recordings: [Track], artist: Artist) -> ([Track], str):
+async def get_song_lyrics(
+        session: aiohttp.ClientSession,
+        cleaned_recordings: [Track],
+        artist: Artist,
+        limiter: AdaptiveConcurrencyLimiter = None,
+        deadline: Deadline = None,
+) -> ([Track], str):
     """
-
-    :param session:
-    :param cleaned_recordings:
-    :param artist:
-    :return:
+    Request the lyrics for each cleaned track.
+    :param session: The session to make API requests with.
+    :param cleaned_recordings: The Track objects to find lyrics for.
+    :param artist: The Artist linked to the tracks, the number of tracks we requested lyrics for is stored on it.
+    :param limiter: The concurrency limiter for the lyrics requests, pass one in to share it between several
+        artists' requests, otherwise a new limiter is used.
+    :param deadline: The run's deadline, any requests still outstanding when it passes are cancelled and
+        only the lyrics found so far are returned.
+    :return: A tuple containing a list of Track objects with lyrics, and a string to pass as an error message.
     """
     from time import perf_counter
     timer_start = perf_counter()
     # List to hold async tasks
     tasks = []
+    # Rather than sending every request at once, let the limiter find how many the API can handle at a time
+    if limiter is None:
+        limiter = AdaptiveConcurrencyLimiter()
+    if deadline is None:
+        deadline = Deadline()
 
     print(oh.header("Finding lyrics..."))
 
     for track in cleaned_recordings:
-        # Make a query request to the lyrics API
-        url = api_parser.build_lyrics_url(artist.name, track.name)
-        tasks.append(asyncio.ensure_future(make_lyrics_request(session, url, track)))
-
-    recordings_with_lyrics = await asyncio.gather(*tasks)
+        # Request the lyrics from the lyrics providers
+        tasks.append(asyncio.ensure_future(make_lyrics_request(session, artist, track, limiter)))
+
+    # Added to rather than set, since tracks known to have duplicate lyrics were already counted when skipped
+    artist.lyrics_attempted += len(tasks)
+    running_statistics = RunningStatistics()
+
+    async def count_lyrics_as_found() -> None:
+        # Update the statistics as each request finishes, rather than once every request has
+        for next_lyrics in asyncio.as_completed(tasks):
+            track = await next_lyrics
+            if track and flags.LIVE_STATISTICS:
+                running_statistics.add(track)
+                print_running_statistics(running_statistics)
+
+    try:
+        await deadline.wait_for(count_lyrics_as_found())
+    except DeadlineExceeded:
+        # Out of time, so cancel the outstanding requests and carry on with the lyrics we already have
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        artist.deadline_reached = True
+        print(oh.warning(f"Deadline reached, cancelled {len(pending)} outstanding lyric API requests"))
+    finally:
+        # A request raising stops the counting, so don't leave the rest of the requests running
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if flags.LIVE_STATISTICS and running_statistics.count:
+            print()
+    # Keep the results in track order
+    recordings_with_lyrics = [task.result() for task in tasks if not task.cancelled()]
 
     timer_stop = perf_counter()
 
     if flags.PERFORMANCE_TIMING:
         print(oh.blue(f"{len(tasks)} lyric API requests made in {timer_stop - timer_start} seconds"))
+        print(oh.blue(
+            f"Lyrics request window settled at {limiter.window} concurrent requests "
+            f"({limiter.successes} healthy responses, {limiter.failures} congested)"
+        ))
 
     # Remove any null values
     recordings_with_lyrics = [i for i in recordings_with_lyrics if i]
@@ -309,9 +620,28 @@ async def get_song_lyrics(session: aiohttp.ClientSession, cleaned_recordings: [T
     if not recordings_with_lyrics:
         return None, oh.fail("No lyrics found!")
 
+    print_lyrics_found(len(recordings_with_lyrics), len(cleaned_recordings))
+
+    return recordings_with_lyrics, None
+
+
+def print_running_statistics(running_statistics: RunningStatistics) -> None:
+    """
+    Show the running average word count on a line that's overwritten as each track's lyrics are found.
+    :param running_statistics: The statistics for the tracks with lyrics found so far.
+    :return: None.
+    """
+    print("\r" + oh.cyan(running_statistics.summary()), end="", flush=True)
+
+
+def print_lyrics_found(found_num: int, cleaned_num: int) -> None:
+    """
+    Show the user how many of the cleaned tracks we found lyrics for.
+    :param found_num: The number of tracks lyrics were found for.
+    :param cleaned_num: The number of tracks we requested lyrics for.
+    :return: None.
+    """
     # Display colouring
-    found_num = len(recordings_with_lyrics)
-    cleaned_num = len(cleaned_recordings)
     found_func = oh.warning
 
     if found_num == cleaned_num:
@@ -322,5 +652,3 @@ async def get_song_lyrics(session: aiohttp.ClientSession, cleaned_recordings: [T
     found_lyrics_str = found_func(f"{found_num}")
     cleaned_lyrics_str = oh.green(f"{cleaned_num}")
     print(oh.cyan("Found lyrics for ") + f"{found_lyrics_str}/{cleaned_lyrics_str} " + oh.cyan("tracks"))
-
-    return recordings_with_lyrics, None
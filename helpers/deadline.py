@@ -0,0 +1,41 @@
+import asyncio
+from time import perf_counter
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a step of the analysis is cancelled because the run's deadline has passed."""
+
+
+class Deadline:
+    def __init__(self, seconds: float = None):
+        """
+        A time budget for a run, started when the object is created. Steps that would take the run past
+        the deadline are cancelled so the results collected so far can be used instead.
+        :param seconds: The number of seconds the run has, or None for no deadline.
+        """
+        self.expires = perf_counter() + seconds if seconds is not None else None
+
+    def remaining(self) -> float:
+        """The number of seconds left before the deadline, or None if there is no deadline."""
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - perf_counter())
+
+    @property
+    def expired(self) -> bool:
+        return self.expires is not None and perf_counter() >= self.expires
+
+    async def wait_for(self, awaitable):
+        """
+        Await something, cancelling it if the deadline passes first.
+        :param awaitable: The coroutine or future to await.
+        :return: The result of the awaitable.
+        :raises DeadlineExceeded: If the deadline passed before the awaitable finished.
+        """
+        try:
+            return await asyncio.wait_for(awaitable, self.remaining())
+        except asyncio.TimeoutError:
+            # Requests time out with the same exception, so only treat it as ours if we're out of time
+            if self.expired:
+                raise DeadlineExceeded from None
+            raise
@@ -0,0 +1,19 @@
+import json
+
+# orjson parses JSON several times faster than the standard library, but it's an optional dependency
+# so fall back to the json module if it isn't installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    """
+    Parse a JSON document with the fastest parser available.
+    :param data: The JSON document as bytes or a string.
+    :return: The parsed JSON data.
+    """
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,123 @@
+import asyncio
+from collections import deque
+from time import perf_counter
+
+from .metrics import get_metrics, percentile
+
+
+class RequestHedger:
+    def __init__(
+            self,
+            endpoint: str,
+            hedge_percentile: float = 0.95,
+            initial_delay: float = 2.0,
+            min_samples: int = 20,
+            max_samples: int = 500,
+            max_hedges_in_flight: int = 4,
+    ):
+        """
+        Cuts the tail latency of a set of requests by sending a second (hedge) copy of any request that's
+        taking longer than most requests do, then using whichever copy finishes first and cancelling the other.
+
+        The delay before hedging is the `hedge_percentile` of recent request latencies, so only the slowest few
+        percent of requests are ever hedged. The number of hedges in flight at once is capped so a slow API
+        isn't sent twice as many requests just as it starts to struggle.
+        :param endpoint: The name of the endpoint being requested, for recording the hedges in the run's metrics.
+        :param hedge_percentile: The percentile of request latencies to wait for before sending a hedge.
+        :param initial_delay: The delay before sending a hedge until `min_samples` latencies have been seen.
+        :param min_samples: The number of latencies to see before using their percentile as the delay.
+        :param max_samples: The number of most recent latencies the percentile is taken from.
+        :param max_hedges_in_flight: The most hedges that can be in flight at once, requests that are slow while
+            this many hedges are in flight just wait for their first copy.
+        """
+        self.endpoint = endpoint
+        self.hedge_percentile = hedge_percentile
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.max_hedges_in_flight = max_hedges_in_flight
+        self._latencies = deque(maxlen=max_samples)
+        self.hedges_in_flight = 0
+
+    @property
+    def delay(self) -> float:
+        """The number of seconds to wait for a request before sending a hedge."""
+        if len(self._latencies) < self.min_samples:
+            return self.initial_delay
+        return percentile(sorted(self._latencies), self.hedge_percentile)
+
+    async def request(self, make_request):
+        """
+        Make a request, hedging it if it's slow.
+        :param make_request: A function taking a callback and returning a new coroutine that makes the request,
+            calling the callback once the request is actually sent, e.g. after waiting for a concurrency limiter's
+            slot. Called again to make the hedge.
+        :return: The result of whichever copy of the request finished first.
+        """
+        endpoint_metrics = get_metrics().endpoint(self.endpoint)
+        endpoint_metrics.hedgeable_requests += 1
+
+        primary = _RequestCopy(make_request, self._latencies)
+        try:
+            # Time spent queueing for a slot isn't the API being slow, so the delay starts once the request is sent
+            await asyncio.wait({primary.task, primary.sent}, return_when=asyncio.FIRST_COMPLETED)
+            done, _pending = await asyncio.wait({primary.task}, timeout=self.delay)
+        except asyncio.CancelledError:
+            primary.task.cancel()
+            raise
+        if done or self.hedges_in_flight >= self.max_hedges_in_flight:
+            return await primary.task
+
+        endpoint_metrics.hedges += 1
+        self.hedges_in_flight += 1
+        hedge = _RequestCopy(make_request, self._latencies)
+        pending = {primary.task, hedge.task}
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # If the first copy to finish failed, give the other copy the chance to succeed
+                winner = next((task for task in done if not task.exception()), None)
+                if winner or not pending:
+                    break
+        finally:
+            self.hedges_in_flight -= 1
+            if primary.task in pending:
+                # The slow request we hedged took at least this long, leaving it out would make the delay too short
+                primary.record_latency()
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if winner is None:
+            # Both copies failed, so raise the same exception the request would have without hedging
+            return primary.task.result()
+        if winner is hedge.task:
+            endpoint_metrics.hedge_wins += 1
+        return winner.result()
+
+
+class _RequestCopy:
+    def __init__(self, make_request, latencies: deque):
+        """
+        One copy of a hedged request, recording its latency from when it was sent to when it finished.
+        :param make_request: The hedged request's function, called with a callback marking the request as sent.
+        :param latencies: Where to record the latency once the copy finishes.
+        """
+        self.latencies = latencies
+        self.start_time = None
+        self.sent = asyncio.get_running_loop().create_future()
+        self.task = asyncio.ensure_future(make_request(self.mark_sent))
+        self.task.add_done_callback(self._finished)
+
+    def mark_sent(self) -> None:
+        # Retries call this again, but the latency is from the first time the request was sent
+        if self.start_time is None:
+            self.start_time = perf_counter()
+            self.sent.set_result(None)
+
+    def record_latency(self) -> None:
+        if self.start_time is not None:
+            self.latencies.append(perf_counter() - self.start_time)
+
+    def _finished(self, task: asyncio.Future) -> None:
+        if not task.cancelled():
+            self.record_latency()
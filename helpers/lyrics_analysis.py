@@ -0,0 +1,58 @@
+import re
+import string
+from collections import Counter
+
+# Punctuation stripped from the ends of words when counting the vocabulary, so `love,` and `Love` are the same word
+_word_punctuation = string.punctuation + "“”‘’…"
+# Matches each line with a word on it, from its first word to the end of the line
+_line_pattern = re.compile(r"\S[^\n]*")
+
+
+class LyricsAnalysis:
+    __slots__ = ("word_count", "unique_word_count", "line_count", "top_words")
+
+    def __init__(self, word_count: int, unique_word_count: int, line_count: int, top_words: [(str, int)]):
+        """
+        Metrics for a song's lyrics, calculated by `analyse_lyrics`.
+        :param word_count: The number of words in the lyrics.
+        :param unique_word_count: The number of different words used, ignoring case and surrounding punctuation.
+        :param line_count: The number of lines with words on them.
+        :param top_words: The most frequently used words and how many times each is used, most frequent first.
+        """
+        self.word_count = word_count
+        self.unique_word_count = unique_word_count
+        self.line_count = line_count
+        self.top_words = top_words
+
+
+def analyse_lyrics(lyrics: str, top_n: int = 10) -> LyricsAnalysis:
+    """
+    Calculate the metrics for a song's lyrics. Words are split on runs of whitespace, so repeated spaces, blank lines
+    between verses and \\r\\n line endings aren't counted as words. The lyrics are lowercased and split once, and the
+    vocabulary is built from the distinct words rather than every word. Counting how often each word is used is the
+    slowest part, so it's only done when the top words are wanted, otherwise a set of the distinct words is enough.
+    :param lyrics: The lyrics of the song.
+    :param top_n: The number of most frequent words to include, 0 to skip finding them.
+    :return: A LyricsAnalysis object with the metrics for the lyrics.
+    """
+    words = lyrics.lower().split()
+    line_count = len(_line_pattern.findall(lyrics))
+
+    if not top_n:
+        vocabulary = {word.strip(_word_punctuation) for word in set(words)}
+        vocabulary.discard("")
+        return LyricsAnalysis(
+            word_count=len(words), unique_word_count=len(vocabulary), line_count=line_count, top_words=[]
+        )
+
+    vocabulary = Counter()
+    for word, count in Counter(words).items():
+        word = word.strip(_word_punctuation)
+        if word:
+            vocabulary[word] += count
+    return LyricsAnalysis(
+        word_count=len(words),
+        unique_word_count=len(vocabulary),
+        line_count=line_count,
+        top_words=vocabulary.most_common(top_n),
+    )
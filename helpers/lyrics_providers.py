@@ -0,0 +1,327 @@
+import asyncio
+import os
+import sqlite3
+from collections import Counter
+
+import aiohttp
+import aiohttp.web
+import backoff
+
+import flags
+from flags import LOCAL_CORPUS, LYRICS_OVH
+from . import api_parser
+from .cache import get_response_cache
+from .concurrency import AdaptiveConcurrencyLimiter, LimiterSlot
+from .data import Track
+from .data_cleanup_helpers import normalise_name, remove_lyrics_credit
+from .fast_json import loads
+from .hedging import RequestHedger
+from .metrics import get_metrics, record_retry
+import helpers.output_helpers as oh
+
+
+class LyricsProvider:
+    """A source of song lyrics. Subclasses implement `get_lyrics` for a single lyrics API or corpus."""
+    name = ""
+
+    async def get_lyrics(
+            self,
+            session: aiohttp.ClientSession,
+            artist_name: str,
+            track: Track,
+            limiter: AdaptiveConcurrencyLimiter = None,
+    ) -> str:
+        """
+        Find the lyrics for a track.
+        :param session: The session to make any API requests with.
+        :param artist_name: The name of the Artist linked to the track.
+        :param track: The Track object to find lyrics for.
+        :param limiter: The concurrency limiter shared by all lyrics API requests.
+        :return: The lyrics, cleaned of anything the source adds that isn't part of the song, or None if
+            the provider has no lyrics for the track.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class LyricsOvhProvider(LyricsProvider):
+    name = LYRICS_OVH
+
+    def __init__(self, hedger: RequestHedger = None):
+        """
+        Lyrics from the lyrics.ovh API, with responses stored in the response cache.
+        :param hedger: The hedger to send a second copy of slow requests with, or None to never hedge requests.
+        """
+        self.hedger = hedger
+
+    async def get_lyrics(
+            self,
+            session: aiohttp.ClientSession,
+            artist_name: str,
+            track: Track,
+            limiter: AdaptiveConcurrencyLimiter = None,
+    ) -> str:
+        url = api_parser.build_lyrics_url(artist_name, track.name)
+
+        cache = get_response_cache()
+        is_cached = False
+        lyrics_data = None
+        if cache:
+            is_cached, lyrics_data = cache.get("lyrics", url)
+
+        if not is_cached:
+            if self.hedger:
+                lyrics_data = await self.hedger.request(
+                    lambda on_sent: fetch_lyrics_data(session, url, track, limiter, on_sent)
+                )
+            else:
+                lyrics_data = await fetch_lyrics_data(session, url, track, limiter)
+            # Negative results are cached too, so we don't keep asking for songs the API has no lyrics for
+            if cache:
+                cache.set("lyrics", url, lyrics_data)
+
+        if not lyrics_data:
+            return None
+
+        # Remove a common lyrics header this API's sources sometimes have within the lyrics data
+        return remove_lyrics_credit(lyrics_data.get("lyrics"))
+
+
+# Use backoff to handle HTTP errors and timeouts and retry since the async requests can cause us to hit rate limits
+@backoff.on_exception(
+    backoff.expo, (aiohttp.web.HTTPException, asyncio.TimeoutError), max_tries=10, on_backoff=record_retry
+)
+async def fetch_lyrics_data(
+        session: aiohttp.ClientSession,
+        url: str,
+        track: Track,
+        limiter: AdaptiveConcurrencyLimiter = None,
+        on_sent=None,
+) -> dict:
+    """
+    Request the lyrics data for a track from the lyrics.ovh API.
+    :param session: The session to make the API request with.
+    :param url: The lyrics API url for the track, built with `api_parser.build_lyrics_url`.
+    :param track: The Track object the lyrics are for, used for output messages.
+    :param limiter: The concurrency limiter to wait for a slot in before making the request.
+    :param on_sent: A function with no arguments to call once a slot is held and the request is being sent.
+    :return: The JSON data returned by the API, or None if the API has no lyrics for the track.
+    """
+    retry_statuses = [x for x in range(100, 600)]
+    retry_statuses.remove(200)
+    retry_statuses.remove(404)
+
+    async with LimiterSlot(limiter) as slot, get_metrics().measure(url) as measurement:
+        if on_sent:
+            on_sent()
+        async with session.get(url) as response:
+            measurement.status = response.status
+            if response.status in retry_statuses:
+                # Rate limiting and server errors mean we're sending more requests than the API can handle
+                if response.status == 429 or response.status >= 500:
+                    slot.mark_congested()
+                if flags.IS_VERBOSE:
+                    print(oh.warning(f"{track.name} returned status {response.status}, retrying."))
+                raise aiohttp.web.HTTPException
+
+            # Disable the content_type check here since the lyrics API sends text/html for `no lyrics found` responses
+            # and application/json for valid responses.
+            if "application/json" in response.headers['content-type']:
+                body = await response.read()
+                measurement.bytes_received = len(body)
+                lyrics_data = loads(body)
+            else:
+                if flags.IS_VERBOSE:
+                    print(oh.fail(f"Can't retrieve lyrics for {track.name}: Response status {response.status}" + response.headers['content-type']))
+                return None
+
+            # If we get no lyrics data from the API, show the user an error message and continue
+            if lyrics_data.get("error"):
+                if flags.IS_VERBOSE:
+                    print(oh.fail(f"No lyrics found for {track.name}"))
+                return None
+
+            return lyrics_data
+
+
+class LocalCorpusProvider(LyricsProvider):
+    name = LOCAL_CORPUS
+
+    def __init__(self, path: str):
+        """
+        Lyrics from a corpus on disk, matched on the normalised artist name and song title so no network
+        requests are needed. The corpus can be either:
+            - a directory with a subdirectory for each artist holding a `<song title>.txt` file of lyrics per song.
+            - a SQLite database with a `lyrics` table of `artist`, `title` and `lyrics` columns. An index of the
+              normalised names is added to the database the first time it's used (or kept in memory if the
+              database is read-only), drop the `lyrics_index` table to rebuild it after changing the corpus.
+        :param path: The path of the corpus directory or SQLite database.
+        """
+        self.path = path
+        self.connection = None
+        self._lyrics_paths = None
+        if os.path.isdir(path):
+            self._lyrics_paths = self._index_directory(path)
+        else:
+            self.connection = self._open_database(path)
+
+    @staticmethod
+    def _index_directory(path: str) -> dict:
+        lyrics_paths = {}
+        for artist_entry in os.scandir(path):
+            if not artist_entry.is_dir():
+                continue
+            artist_key = normalise_name(artist_entry.name)
+            for song_entry in os.scandir(artist_entry.path):
+                title, extension = os.path.splitext(song_entry.name)
+                if extension == ".txt" and song_entry.is_file():
+                    lyrics_paths.setdefault((artist_key, normalise_name(title)), song_entry.path)
+        return lyrics_paths
+
+    @staticmethod
+    def _open_database(path: str) -> sqlite3.Connection:
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"No lyrics corpus found at {path}")
+        connection = sqlite3.connect(path)
+        connection.create_function("normalise_name", 1, normalise_name, deterministic=True)
+
+        index_exists = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lyrics_index'"
+        ).fetchone()
+        if not index_exists:
+            create_index = (
+                "CREATE {temp} TABLE lyrics_index ("
+                "artist_key TEXT NOT NULL, "
+                "title_key TEXT NOT NULL, "
+                "lyrics_rowid INTEGER NOT NULL, "
+                "PRIMARY KEY (artist_key, title_key)) WITHOUT ROWID"
+            )
+            try:
+                connection.execute(create_index.format(temp=""))
+            except sqlite3.OperationalError:
+                # We can't write to the corpus, so build the index in memory for this run instead
+                connection.execute(create_index.format(temp="TEMP"))
+            with connection:
+                connection.execute(
+                    "INSERT OR IGNORE INTO lyrics_index "
+                    "SELECT normalise_name(artist), normalise_name(title), rowid FROM lyrics "
+                    "WHERE lyrics IS NOT NULL ORDER BY rowid"
+                )
+        return connection
+
+    def lookup(self, artist_name: str, title: str) -> str:
+        """
+        Find the lyrics for a song in the corpus.
+        :param artist_name: The name of the artist.
+        :param title: The title of the song.
+        :return: The lyrics, or None if the song isn't in the corpus.
+        """
+        key = (normalise_name(artist_name), normalise_name(title))
+        if self._lyrics_paths is not None:
+            lyrics_path = self._lyrics_paths.get(key)
+            if lyrics_path is None:
+                return None
+            with open(lyrics_path, encoding="utf-8") as lyrics_file:
+                return lyrics_file.read()
+
+        row = self.connection.execute(
+            "SELECT lyrics.lyrics FROM lyrics_index JOIN lyrics ON lyrics.rowid = lyrics_index.lyrics_rowid "
+            "WHERE lyrics_index.artist_key = ? AND lyrics_index.title_key = ?",
+            key,
+        ).fetchone()
+        return row[0] if row else None
+
+    async def get_lyrics(
+            self,
+            session: aiohttp.ClientSession,
+            artist_name: str,
+            track: Track,
+            limiter: AdaptiveConcurrencyLimiter = None,
+    ) -> str:
+        return self.lookup(artist_name, track.name)
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class FallbackLyricsProvider(LyricsProvider):
+    name = "fallback"
+
+    def __init__(self, providers: [LyricsProvider]):
+        """
+        Tries each provider in order until one has lyrics for the track, e.g. a local corpus first
+        and then the lyrics API for any songs missing from the corpus.
+        :param providers: The providers to try, in order.
+        """
+        self.providers = providers
+        # The number of tracks each provider found lyrics for
+        self.found = Counter()
+
+    async def get_lyrics(
+            self,
+            session: aiohttp.ClientSession,
+            artist_name: str,
+            track: Track,
+            limiter: AdaptiveConcurrencyLimiter = None,
+    ) -> str:
+        for provider in self.providers:
+            lyrics = await provider.get_lyrics(session, artist_name, track, limiter)
+            if lyrics:
+                self.found[provider.name] += 1
+                return lyrics
+        return None
+
+    def close(self) -> None:
+        for provider in self.providers:
+            provider.close()
+
+
+def create_lyrics_provider(provider_names: [str], corpus_path: str = None) -> FallbackLyricsProvider:
+    """
+    Build the chain of lyrics providers to use.
+    :param provider_names: The names of the providers to try in order, from `PROVIDER_NAMES`.
+    :param corpus_path: The path of the local lyrics corpus, required if the local provider is used.
+    :return: A FallbackLyricsProvider trying each provider in order.
+    """
+    providers = []
+    for provider_name in provider_names:
+        if provider_name == LYRICS_OVH:
+            providers.append(LyricsOvhProvider(RequestHedger("lyrics") if flags.HEDGE_REQUESTS else None))
+        elif provider_name == LOCAL_CORPUS:
+            if not corpus_path:
+                raise ValueError("The local lyrics provider needs a corpus path")
+            providers.append(LocalCorpusProvider(corpus_path))
+        else:
+            raise ValueError(f"Unknown lyrics provider `{provider_name}`")
+    return FallbackLyricsProvider(providers)
+
+
+_lyrics_provider = None
+
+
+def get_lyrics_provider() -> FallbackLyricsProvider:
+    """
+    Get the lyrics providers shared by every lyrics request, set up from `flags.LYRICS_PROVIDERS` the first time.
+    With no providers set the local corpus is tried before the lyrics API if `flags.LYRICS_CORPUS` is set,
+    otherwise only the lyrics API is used.
+    :return: The shared FallbackLyricsProvider object.
+    """
+    global _lyrics_provider
+    if _lyrics_provider is None:
+        provider_names = flags.LYRICS_PROVIDERS
+        if not provider_names:
+            provider_names = [LOCAL_CORPUS, LYRICS_OVH] if flags.LYRICS_CORPUS else [LYRICS_OVH]
+        _lyrics_provider = create_lyrics_provider(provider_names, flags.LYRICS_CORPUS)
+    return _lyrics_provider
+
+
+def close_lyrics_provider() -> None:
+    """Close the shared lyrics providers if they have been set up."""
+    global _lyrics_provider
+    if _lyrics_provider is not None:
+        _lyrics_provider.close()
+        _lyrics_provider = None
@@ -0,0 +1,327 @@
+import json
+import math
+from collections import Counter, deque
+from time import perf_counter
+from urllib.parse import urlsplit
+
+# Upper bounds (in seconds) of the latency histogram buckets in the Prometheus output
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# The most points of in-flight concurrency to include in the JSON summary
+MAX_TIMELINE_POINTS = 500
+# The number of most recent latencies the percentiles are taken from, so a long running server's memory doesn't grow
+MAX_LATENCY_SAMPLES = 10000
+
+
+def endpoint_for_url(url: str) -> str:
+    """
+    Get the name metrics for a url are grouped under.
+    :param url: A request url built by `api_parser`.
+    :return: `lyrics` for the lyrics API, otherwise the MusicBrainz entity being requested e.g. `recording`.
+    """
+    parts = urlsplit(url)
+    if parts.hostname and "lyrics" in parts.hostname:
+        return "lyrics"
+    path = parts.path.split("/")
+    # MusicBrainz urls look like /ws/2/<entity>/...
+    if len(path) > 3 and path[1] == "ws":
+        return path[3]
+    return parts.hostname or "unknown"
+
+
+def percentile(sorted_values: [float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list of values."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def reduce_timeline(timeline: [(float, int)], points: int) -> [(float, int)]:
+    """
+    Reduce a concurrency timeline to at most `points` evenly spaced points by taking the highest concurrency seen in
+    each interval.
+    :param timeline: A list of (seconds since the start of the run, requests in flight) tuples, oldest first.
+    :param points: The most points to reduce the timeline to.
+    :return: The reduced list of (seconds, requests in flight) tuples.
+    """
+    if len(timeline) <= points:
+        return list(timeline)
+
+    interval = timeline[-1][0] / points
+    reduced = {}
+    for seconds, in_flight in timeline:
+        point = min(int(seconds / interval), points - 1) if interval else 0
+        reduced[point] = max(reduced.get(point, 0), in_flight)
+    return [(point * interval, in_flight) for point, in_flight in sorted(reduced.items())]
+
+
+class EndpointMetrics:
+    def __init__(self):
+        """Totals for every request made to a single endpoint."""
+        self.requests = 0
+        self.statuses = Counter()
+        self.retries = 0
+        self.bytes_received = 0
+        # Every latency is counted in the histogram, only the most recent are kept for the percentiles
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency_count = 0
+        self.latency_sum = 0.0
+        self.latency_max = None
+        self.latencies = deque(maxlen=MAX_LATENCY_SAMPLES)
+        # Requests made through a RequestHedger, how many of them were hedged, and how many hedges finished first
+        self.hedgeable_requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record_latency(self, latency: float) -> None:
+        for bucket, upper_bound in enumerate(LATENCY_BUCKETS):
+            if latency <= upper_bound:
+                self.latency_buckets[bucket] += 1
+                break
+        self.latency_count += 1
+        self.latency_sum += latency
+        self.latency_max = latency if self.latency_max is None else max(self.latency_max, latency)
+        self.latencies.append(latency)
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedges / self.hedgeable_requests if self.hedgeable_requests else None
+
+    @property
+    def hedge_win_rate(self) -> float:
+        return self.hedge_wins / self.hedges if self.hedges else None
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        summary = {
+            "requests": self.requests,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items(), key=str)},
+            "retries": self.retries,
+            "bytes_received": self.bytes_received,
+            "latency_seconds": {
+                "p50": percentile(latencies, 0.5),
+                "p95": percentile(latencies, 0.95),
+                "p99": percentile(latencies, 0.99),
+                "max": self.latency_max,
+                "mean": self.latency_sum / self.latency_count if self.latency_count else None,
+            },
+        }
+        if self.hedgeable_requests:
+            summary["hedging"] = {
+                "requests": self.hedgeable_requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": self.hedge_rate,
+                "win_rate": self.hedge_win_rate,
+            }
+        return summary
+
+
+class NetworkMetrics:
+    def __init__(self):
+        """
+        Collects metrics on every API request made during a run: request counts, status codes, retries, bytes
+        received and latencies for each endpoint, along with how many requests were in flight over time.
+        """
+        self.endpoints = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.recordings_expected = 0
+        self._start_time = perf_counter()
+        self._concurrency_timeline = [(0.0, 0)]
+        # The in-flight count multiplied by how long it lasted, added up as it changes so the timeline can be reduced
+        self._in_flight_seconds = 0.0
+        self._last_change = 0.0
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        if name not in self.endpoints:
+            self.endpoints[name] = EndpointMetrics()
+        return self.endpoints[name]
+
+    def measure(self, url: str) -> "RequestMeasurement":
+        """
+        Measure a single request, used as a context manager around the request.
+        :param url: The url being requested.
+        :return: A RequestMeasurement object to set the response status and size on.
+        """
+        return RequestMeasurement(self, endpoint_for_url(url))
+
+    def request_count(self, *endpoint_names: str) -> int:
+        """The number of requests made to the given endpoints, or to every endpoint if none are given."""
+        names = endpoint_names or self.endpoints.keys()
+        return sum(self.endpoints[name].requests for name in names if name in self.endpoints)
+
+    def record_retry(self, url: str) -> None:
+        self.endpoint(endpoint_for_url(url)).retries += 1
+
+    def _change_in_flight(self, change: int) -> None:
+        seconds = perf_counter() - self._start_time
+        self._in_flight_seconds += self.in_flight * (seconds - self._last_change)
+        self._last_change = seconds
+
+        self.in_flight += change
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self._concurrency_timeline.append((seconds, self.in_flight))
+        if len(self._concurrency_timeline) >= 2 * MAX_TIMELINE_POINTS:
+            self._concurrency_timeline = reduce_timeline(self._concurrency_timeline, MAX_TIMELINE_POINTS)
+
+    def concurrency_timeline(self) -> [(float, int)]:
+        """
+        The number of requests in flight over time, reduced to at most `MAX_TIMELINE_POINTS` evenly spaced
+        points by taking the highest concurrency seen in each interval.
+        :return: A list of (seconds since the start of the run, requests in flight) tuples.
+        """
+        return reduce_timeline(self._concurrency_timeline, MAX_TIMELINE_POINTS)
+
+    def average_in_flight(self) -> float:
+        """The average number of requests in flight over the run, weighted by how long each level lasted."""
+        duration = perf_counter() - self._start_time
+        if duration <= 0:
+            return 0.0
+        total = self._in_flight_seconds + self.in_flight * (duration - self._last_change)
+        return total / duration
+
+    def summary(self) -> dict:
+        """A JSON serialisable summary of every metric collected."""
+        return {
+            "duration_seconds": perf_counter() - self._start_time,
+            "recordings_expected": self.recordings_expected,
+            "endpoints": {name: endpoint.summary() for name, endpoint in sorted(self.endpoints.items())},
+            "concurrency": {
+                "max_in_flight": self.max_in_flight,
+                "average_in_flight": self.average_in_flight(),
+                "timeline": self.concurrency_timeline(),
+            },
+        }
+
+    def to_prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format, for the node exporter's textfile collector."""
+        lines = [
+            "# HELP lyrics_avg_requests_total Requests made to each API endpoint by response status.",
+            "# TYPE lyrics_avg_requests_total counter",
+        ]
+        for name, endpoint in sorted(self.endpoints.items()):
+            for status, count in sorted(endpoint.statuses.items(), key=str):
+                lines.append(f'lyrics_avg_requests_total{{endpoint="{name}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP lyrics_avg_retries_total Requests to each API endpoint that were retried.",
+            "# TYPE lyrics_avg_retries_total counter",
+        ]
+        for name, endpoint in sorted(self.endpoints.items()):
+            lines.append(f'lyrics_avg_retries_total{{endpoint="{name}"}} {endpoint.retries}')
+
+        lines += [
+            "# HELP lyrics_avg_received_bytes_total Response body bytes received from each API endpoint.",
+            "# TYPE lyrics_avg_received_bytes_total counter",
+        ]
+        for name, endpoint in sorted(self.endpoints.items()):
+            lines.append(f'lyrics_avg_received_bytes_total{{endpoint="{name}"}} {endpoint.bytes_received}')
+
+        lines += [
+            "# HELP lyrics_avg_hedged_requests_total Slow requests to each API endpoint that a hedge request was sent for.",
+            "# TYPE lyrics_avg_hedged_requests_total counter",
+        ]
+        for name, endpoint in sorted(self.endpoints.items()):
+            lines.append(f'lyrics_avg_hedged_requests_total{{endpoint="{name}"}} {endpoint.hedges}')
+
+        lines += [
+            "# HELP lyrics_avg_hedge_wins_total Hedge requests to each API endpoint that finished before the original.",
+            "# TYPE lyrics_avg_hedge_wins_total counter",
+        ]
+        for name, endpoint in sorted(self.endpoints.items()):
+            lines.append(f'lyrics_avg_hedge_wins_total{{endpoint="{name}"}} {endpoint.hedge_wins}')
+
+        lines += [
+            "# HELP lyrics_avg_request_duration_seconds Time taken by requests to each API endpoint.",
+            "# TYPE lyrics_avg_request_duration_seconds histogram",
+        ]
+        for name, endpoint in sorted(self.endpoints.items()):
+            count = 0
+            for bucket, bucket_count in zip(LATENCY_BUCKETS, endpoint.latency_buckets):
+                # Prometheus buckets are cumulative, each counts every latency up to its upper bound
+                count += bucket_count
+                lines.append(f'lyrics_avg_request_duration_seconds_bucket{{endpoint="{name}",le="{bucket}"}} {count}')
+            lines.append(f'lyrics_avg_request_duration_seconds_bucket{{endpoint="{name}",le="+Inf"}} {endpoint.latency_count}')
+            lines.append(f'lyrics_avg_request_duration_seconds_sum{{endpoint="{name}"}} {endpoint.latency_sum}')
+            lines.append(f'lyrics_avg_request_duration_seconds_count{{endpoint="{name}"}} {endpoint.latency_count}')
+
+        lines += [
+            "# HELP lyrics_avg_max_in_flight_requests The most API requests in flight at once during the run.",
+            "# TYPE lyrics_avg_max_in_flight_requests gauge",
+            f"lyrics_avg_max_in_flight_requests {self.max_in_flight}",
+            "# HELP lyrics_avg_average_in_flight_requests The time-weighted average of API requests in flight.",
+            "# TYPE lyrics_avg_average_in_flight_requests gauge",
+            f"lyrics_avg_average_in_flight_requests {self.average_in_flight()}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path_prefix: str) -> None:
+        """
+        Write the metrics to `<path_prefix>.json` and `<path_prefix>.prom`.
+        :param path_prefix: The path to write the files to, without an extension.
+        :return: None.
+        """
+        with open(f"{path_prefix}.json", "w", encoding="utf-8") as json_file:
+            json.dump(self.summary(), json_file, indent=2)
+        with open(f"{path_prefix}.prom", "w", encoding="utf-8") as prometheus_file:
+            prometheus_file.write(self.to_prometheus())
+
+
+class RequestMeasurement:
+    def __init__(self, metrics: NetworkMetrics, endpoint: str):
+        """
+        Measures a single request. Set `status` and `bytes_received` once the response arrives, if the request
+        raises an exception the name of the exception is recorded as its status instead.
+        :param metrics: The metrics collector to record the request in.
+        :param endpoint: The name of the endpoint being requested.
+        """
+        self.metrics = metrics
+        self.endpoint = endpoint
+        self.status = None
+        self.bytes_received = 0
+        self._start_time = None
+
+    def __enter__(self) -> "RequestMeasurement":
+        self.metrics._change_in_flight(1)
+        self._start_time = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        latency = perf_counter() - self._start_time
+        self.metrics._change_in_flight(-1)
+
+        if self.status is None:
+            self.status = exc_type.__name__ if exc_type else "unknown"
+        endpoint = self.metrics.endpoint(self.endpoint)
+        endpoint.requests += 1
+        endpoint.statuses[self.status] += 1
+        endpoint.bytes_received += self.bytes_received
+        endpoint.record_latency(latency)
+
+    async def __aenter__(self) -> "RequestMeasurement":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        self.__exit__(exc_type, exc, traceback)
+
+
+_metrics = NetworkMetrics()
+
+
+def get_metrics() -> NetworkMetrics:
+    """Get the metrics collector shared by every request in the current run."""
+    return _metrics
+
+
+def reset_metrics() -> NetworkMetrics:
+    """Start collecting metrics for a new run, discarding anything collected so far."""
+    global _metrics
+    _metrics = NetworkMetrics()
+    return _metrics
+
+
+def record_retry(details: dict) -> None:
+    """`on_backoff` handler for the backoff decorators, records a retry for the url the request was made to."""
+    url = details.get("kwargs", {}).get("url") or details.get("args")[1]
+    get_metrics().record_retry(url)
@@ -0,0 +1,101 @@
+import zlib
+
+import numpy as np
+
+# The hash functions are taken modulo this Mersenne prime, small enough that a hash times a multiplier fits in 64 bits
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def shingle(text: str, size: int = 3) -> {str}:
+    """
+    Split some text into its overlapping runs of characters, padded so the start and end of the text
+    count towards its shingles as much as the middle does.
+    :param text: The text to shingle, usually an already normalised title.
+    :param size: The number of characters in each shingle.
+    :return: A set of the text's shingles.
+    """
+    padded_text = f"^{text}$"
+    if len(padded_text) <= size:
+        return {padded_text}
+    return {padded_text[start:start + size] for start in range(len(padded_text) - size + 1)}
+
+
+def jaccard_similarity(first: set, second: set) -> float:
+    """The number of items two sets share, as a proportion of the number of items in either of them."""
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+class MinHashLSH:
+    def __init__(self, threshold: float = 0.8, permutations: int = 128, bands: int = 16, seed: int = 1):
+        """
+        Groups near duplicate sets of shingles without comparing every pair of them. Each set gets a MinHash
+        signature, where the chance of two signatures agreeing at any position is the sets' Jaccard similarity,
+        then the signatures are split into bands and only sets with an identical band are compared.
+
+        With the default 16 bands of 8 rows, pairs with a similarity of 0.9 share a band 99.99% of the time, pairs
+        with a similarity of 0.8 95% of the time, and pairs with a similarity of 0.5 only 6% of the time, so titles
+        that only share a common word or two are rarely compared. Every candidate pair is checked against the exact
+        similarity, so the bands only decide which pairs are compared, not which are grouped.
+        :param threshold: The Jaccard similarity at which two sets are near duplicates.
+        :param permutations: The number of hash functions in each signature.
+        :param bands: The number of bands the signatures are split into, must divide `permutations`.
+        :param seed: The seed for the random hash functions, so the groups are the same for every run.
+        """
+        if permutations % bands:
+            raise ValueError(f"{bands} bands don't divide a signature of {permutations} permutations")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = permutations // bands
+        rng = np.random.default_rng(seed)
+        self._multipliers = rng.integers(1, _MERSENNE_PRIME, size=permutations, dtype=np.uint64)
+        self._increments = rng.integers(0, _MERSENNE_PRIME, size=permutations, dtype=np.uint64)
+
+    def signature(self, shingles: {str}) -> np.ndarray:
+        """
+        Calculate the MinHash signature of a set of shingles.
+        :param shingles: A non-empty set of shingles.
+        :return: An array of the smallest hash of the shingles under each of the hash functions.
+        """
+        # crc32 rather than hash() so the signatures don't change between runs
+        hashes = np.fromiter(
+            (zlib.crc32(item.encode()) % _MERSENNE_PRIME for item in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        permuted = (self._multipliers[:, np.newaxis] * hashes + self._increments[:, np.newaxis]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def group(self, shingle_sets: [{str}]) -> [int]:
+        """
+        Group near duplicate sets of shingles. Groups are transitive, if A is a near duplicate of B and B is of C
+        then all three are in one group even if A and C aren't similar enough themselves.
+        :param shingle_sets: The sets of shingles to group.
+        :return: The group of each set, as the position of the first set in its group.
+        """
+        groups = list(range(len(shingle_sets)))
+
+        def find(item: int) -> int:
+            while groups[item] != item:
+                groups[item] = groups[groups[item]]
+                item = groups[item]
+            return item
+
+        buckets = {}
+        for item, shingles in enumerate(shingle_sets):
+            signature = self.signature(shingles)
+            for band in range(self.bands):
+                band_hash = (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                buckets.setdefault(band_hash, []).append(item)
+
+        compared = set()
+        for bucket in buckets.values():
+            for position, first in enumerate(bucket):
+                for second in bucket[position + 1:]:
+                    if (first, second) in compared:
+                        continue
+                    compared.add((first, second))
+                    if jaccard_similarity(shingle_sets[first], shingle_sets[second]) >= self.threshold:
+                        first_group, second_group = find(first), find(second)
+                        # Keep the earliest set as the group's label so the labels don't depend on the buckets
+                        groups[max(first_group, second_group)] = min(first_group, second_group)
+        return [find(item) for item in range(len(groups))]
@@ -48,3 +48,10 @@ def separator(size: int = 128, single: bool = False) -> str:
         return "-" * size
     else:
         return "=" * size
+
+
+def plain(input_string: str) -> str:
+    """Remove any colour/formatting codes from a string, e.g. for writing it to a file."""
+    for code in (HEADER, OKBLUE, OKCYAN, OKGREEN, WARNING, FAIL, ENDC, BOLD, UNDERLINE):
+        input_string = input_string.replace(code, "")
+    return input_string
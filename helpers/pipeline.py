@@ -0,0 +1,210 @@
+import asyncio
+import aiohttp
+from time import perf_counter
+
+import flags
+from . import api_parser
+from .concurrency import AdaptiveConcurrencyLimiter
+from .data import Artist, Track
+from .deadline import Deadline, DeadlineExceeded
+from .metrics import get_metrics
+from .data_cleanup_helpers import IncrementalDuplicateFilter, KnownDuplicateLyricsFilter
+from .data_collection_helpers import (
+    make_recordings_request,
+    make_lyrics_request,
+    print_lyrics_found,
+    print_running_statistics,
+)
+from .running_stats import RunningStatistics
+import helpers.output_helpers as oh
+
+
+class PipelineStats:
+    def __init__(self):
+        """Running totals for a streaming pipeline run, updated as each page and lyrics response arrives."""
+        self.pages = 0
+        self.tracks_found = 0
+        self.tracks_queued = 0
+        self.recordings_with_lyrics = []
+        self.running_statistics = RunningStatistics()
+
+    def add_lyrics(self, track: Track) -> None:
+        self.recordings_with_lyrics.append(track)
+        if flags.LIVE_STATISTICS:
+            self.running_statistics.add(track)
+            print_running_statistics(self.running_statistics)
+
+
+async def stream_song_lyrics(
+        session: aiohttp.ClientSession,
+        artist: Artist,
+        limiter: AdaptiveConcurrencyLimiter = None,
+        deadline: Deadline = None,
+) -> ([Track], str):
+    """
+    Find the lyrics for every song by an Artist, requesting lyrics for the tracks on each page of recordings
+    as soon as that page arrives rather than waiting for every page first. This overlaps the recordings and
+    lyrics requests, which are otherwise made one stage after the other.
+
+    Pages are turned into Track objects and filtered for duplicates as they arrive, then put on a queue that a pool
+    of lyrics workers takes tracks from, with the number of lyrics requests in flight set by an adaptive limiter.
+    :param session: The session to make API requests with.
+    :param artist: The Artist to find lyrics for.
+    :param limiter: The concurrency limiter for the lyrics requests, otherwise a new limiter is used.
+    :param deadline: The run's deadline, when it passes every outstanding request is cancelled and only the
+        lyrics found so far are returned.
+    :return: A tuple containing a list of Track objects with lyrics, and a string to pass as an error message.
+    """
+    timer_start = perf_counter()
+    if deadline is None:
+        deadline = Deadline()
+
+    print(oh.header("Finding songs and lyrics..."))
+
+    # Make an initial request to find the number of tracks
+    recordings_url = api_parser.build_recordings_query_url(artist.mb_id, 0)
+    try:
+        first_page = await deadline.wait_for(make_recordings_request(session, recordings_url))
+    except DeadlineExceeded:
+        return None, oh.fail("Deadline reached before any songs were found!")
+    if not first_page:
+        return None, oh.fail("No songs found!")
+
+    track_queue = asyncio.Queue()
+    if limiter is None:
+        limiter = AdaptiveConcurrencyLimiter()
+    stats = PipelineStats()
+
+    # The limiter decides how many requests are actually in flight, so start enough workers to fill its largest window
+    workers = [
+        asyncio.ensure_future(lyrics_worker(session, artist, track_queue, limiter, stats))
+        for _ in range(limiter.max_window)
+    ]
+
+    async def run_pipeline() -> None:
+        await produce_tracks(session, artist, first_page, track_queue, stats)
+        # Tell each worker there are no more tracks coming, then wait for them to finish the queue
+        for _ in workers:
+            track_queue.put_nowait(None)
+        await asyncio.gather(*workers)
+
+    try:
+        await deadline.wait_for(run_pipeline())
+    except DeadlineExceeded:
+        # Out of time, so carry on with the lyrics we already have
+        artist.deadline_reached = True
+        print(oh.warning("Deadline reached, cancelled the outstanding song and lyric API requests"))
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if flags.LIVE_STATISTICS and stats.running_statistics.count:
+            print()
+    artist.lyrics_attempted += stats.tracks_queued
+
+    timer_stop = perf_counter()
+
+    print(oh.cyan(f"Found {stats.tracks_found} tracks"))
+
+    if flags.PERFORMANCE_TIMING:
+        print(oh.blue(
+            f"{stats.tracks_found} songs from {stats.pages} pages and {stats.tracks_queued} lyric API requests "
+            f"made in {timer_stop - timer_start} seconds"
+        ))
+        print(oh.blue(
+            f"Lyrics request window settled at {limiter.window} concurrent requests "
+            f"({limiter.successes} healthy responses, {limiter.failures} congested)"
+        ))
+
+    # If we get no data from the API, return an error message.
+    if not stats.recordings_with_lyrics:
+        return None, oh.fail("No lyrics found!")
+
+    print_lyrics_found(len(stats.recordings_with_lyrics), stats.tracks_queued)
+
+    return stats.recordings_with_lyrics, None
+
+
+async def produce_tracks(
+        session: aiohttp.ClientSession,
+        artist: Artist,
+        first_page: dict,
+        track_queue: asyncio.Queue,
+        stats: PipelineStats,
+) -> None:
+    """
+    Request every remaining page of recordings for an Artist, putting the tracks that survive duplicate
+    filtering on the queue as each page arrives. With `flags.DEDUPE_LYRICS` tracks known to have the same lyrics as
+    a queued track are skipped too.
+    :param session: The session to make API requests with.
+    :param artist: The Artist to find recordings for.
+    :param first_page: The first page of recordings data, which gives the total number of recordings.
+    :param track_queue: The queue to put Track objects on for the lyrics workers.
+    :param stats: The running totals for this pipeline run.
+    :return: None.
+    """
+    duplicate_filter = IncrementalDuplicateFilter(artist)
+    known_duplicates = KnownDuplicateLyricsFilter(artist) if flags.DEDUPE_LYRICS else None
+
+    def queue_tracks(tracks: [Track]) -> None:
+        if known_duplicates:
+            tracks = known_duplicates.add(tracks)
+        for track in tracks:
+            track_queue.put_nowait(track)
+        stats.tracks_queued += len(tracks)
+
+    def queue_page(page: dict) -> None:
+        tracks = [Track(raw_data=item, releases=artist.releases) for item in page.get("recordings")]
+        stats.pages += 1
+        stats.tracks_found += len(tracks)
+        queue_tracks(duplicate_filter.add(tracks))
+
+    queue_page(first_page)
+
+    # The MusicBrainz API returns at most 100 recordings a page, so request the rest of the pages by offset
+    track_count = first_page.get("count")
+    get_metrics().recordings_expected += track_count
+    tasks = [
+        asyncio.ensure_future(make_recordings_request(
+            session, api_parser.build_recordings_query_url(artist.mb_id, offset)
+        ))
+        for offset in range(100, track_count, 100)
+    ]
+    try:
+        for next_page in asyncio.as_completed(tasks):
+            page = await next_page
+            if page:
+                queue_page(page)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    # Now we've seen every track we can decide on the remix/live/instrumental versions
+    queue_tracks(duplicate_filter.flush())
+    if known_duplicates:
+        known_duplicates.flush()
+
+
+async def lyrics_worker(
+        session: aiohttp.ClientSession,
+        artist: Artist,
+        track_queue: asyncio.Queue,
+        limiter: AdaptiveConcurrencyLimiter,
+        stats: PipelineStats,
+) -> None:
+    """
+    Take tracks off the queue and request their lyrics until a None is taken off the queue.
+    :param session: The session to make API requests with.
+    :param artist: The Artist linked to the tracks.
+    :param track_queue: The queue of Track objects to find lyrics for.
+    :param limiter: The concurrency limiter shared by all lyrics requests.
+    :param stats: The running totals to add each track with lyrics to.
+    :return: None.
+    """
+    while True:
+        track = await track_queue.get()
+        if track is None:
+            return
+        track_with_lyrics = await make_lyrics_request(session, artist, track, limiter)
+        if track_with_lyrics:
+            stats.add_lyrics(track_with_lyrics)
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# The number of requests per second each host allows, MusicBrainz documents a limit of 1 request per second.
+# See https://musicbrainz.org/doc/MusicBrainz_API/Rate_Limiting
+HOST_RATE_LIMITS = {
+    "musicbrainz.org": 1.0,
+}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        Token bucket rate limiter shared between the sync and async request code for a single host.
+
+        Rather than polling for tokens we keep track of the time the next token is available, so each
+        caller reserves its own slot and waits exactly as long as it needs to, in the order they arrived.
+        :param rate: The number of requests allowed per second.
+        :param capacity: The number of requests that can be made at once before pacing kicks in.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._interval = 1 / rate
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+        # A threading lock rather than an asyncio one since the sync artist search can run outside the event loop
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Reserve the next available request slot.
+        :return: The number of seconds the caller needs to wait before making its request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            burst_allowance = (self.capacity - 1) * self._interval
+            start = max(now, self._next_slot - burst_allowance, self._blocked_until)
+            self._next_slot = max(self._next_slot, start) + self._interval
+            return start - now
+
+    def _remaining_block(self) -> float:
+        with self._lock:
+            return max(0.0, self._blocked_until - time.monotonic())
+
+    async def acquire(self) -> None:
+        """Wait until a request can be made without breaking the host's rate limit."""
+        await asyncio.sleep(self._reserve())
+        # If the server told us to back off while we were waiting, wait for that too
+        while self._remaining_block():
+            await asyncio.sleep(self._remaining_block())
+
+    def acquire_sync(self) -> None:
+        """Blocking version of `acquire` for the synchronous musicbrainzngs requests."""
+        time.sleep(self._reserve())
+        while self._remaining_block():
+            time.sleep(self._remaining_block())
+
+    def penalise(self, retry_after: float) -> None:
+        """
+        Stop any requests being made for the given time, used when the server responds with a Retry-After header.
+        :param retry_after: The number of seconds to wait before the next request.
+        """
+        with self._lock:
+            until = time.monotonic() + retry_after
+            self._blocked_until = max(self._blocked_until, until)
+            self._next_slot = max(self._next_slot, until)
+
+
+_rate_limiters = {}
+
+
+def get_rate_limiter(url: str) -> TokenBucket:
+    """
+    Get the rate limiter shared by every request to the host of a url.
+    :param url: The url (or host name) a request is being made to.
+    :return: The TokenBucket for the host, or None if the host has no known rate limit.
+    """
+    host = urlsplit(url).hostname if "://" in url else url
+    if host not in HOST_RATE_LIMITS:
+        return None
+    if host not in _rate_limiters:
+        _rate_limiters[host] = TokenBucket(HOST_RATE_LIMITS[host])
+    return _rate_limiters[host]
+
+
+def parse_retry_after(value: str, default: float) -> float:
+    """
+    Parse the value of a Retry-After header, which can be given as a number of seconds or as an HTTP date.
+    :param value: The header value, or None if the header wasn't sent.
+    :param default: The number of seconds to return if the header is missing or invalid.
+    :return: The number of seconds to wait before retrying.
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max(0.0, retry_date.timestamp() - time.time())
@@ -0,0 +1,42 @@
+import math
+
+from .data import Track
+
+
+class RunningStatistics:
+    __slots__ = ("count", "mean", "_m2")
+
+    def __init__(self):
+        """
+        The average word count and its standard deviation, updated one track at a time as lyrics are found so they
+        can be shown while the rest of the lyrics are still being requested. They're kept with Welford's method,
+        which stays accurate over any number of tracks without keeping any of them.
+        """
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, track: Track) -> None:
+        """
+        Add a track with lyrics to the statistics.
+        :param track: The Track object, only its word count is kept.
+        :return: None.
+        """
+        word_count = track.word_count
+        self.count += 1
+        delta = word_count - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (word_count - self.mean)
+
+    @property
+    def variance(self) -> float:
+        """The population variance of the word counts, the same as numpy.var."""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std_dev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def summary(self) -> str:
+        """A one line summary of the running average, for showing progress while lyrics are found."""
+        return f"Average of {self.mean:.0f} ± {self.std_dev:.0f} words after {self.count} tracks"
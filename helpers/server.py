@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+from .analysis import DEADLINE_REACHED, NOT_FOUND, UPSTREAM_ERROR, analyse_artist, is_mb_id
+from .cache import close_response_cache
+from .concurrency import AdaptiveConcurrencyLimiter
+from .data_collection_helpers import create_session
+from .lyrics_providers import close_lyrics_provider
+import helpers.output_helpers as oh
+
+# The status to respond with for each reason an analysis can fail
+FAILURE_STATUSES = {NOT_FOUND: 404, UPSTREAM_ERROR: 502, DEADLINE_REACHED: 504}
+
+# How long (in seconds) an artist's statistics are served from memory before the artist is analysed again
+DEFAULT_RESULT_TTL = 60 * 60
+# The most artists kept in memory before the results are cleared, so a long running server can't grow forever
+MAX_CACHED_RESULTS = 10000
+
+
+class ArtistResults:
+    def __init__(self, ttl: float = DEFAULT_RESULT_TTL):
+        """
+        The statistics of recently analysed artists, so repeat requests for an artist are answered without analysing
+        them again. Requests for an artist that's already being analysed wait for that analysis to finish rather
+        than starting another one.
+        :param ttl: The number of seconds an artist's statistics are kept for.
+        """
+        self.ttl = ttl
+        self._results = {}
+        self._analyses = {}
+
+    async def get(self, mb_id: str, analyse) -> dict:
+        """
+        Get an artist's statistics, analysing the artist if they haven't been recently.
+        :param mb_id: The artist's MusicBrainz ID.
+        :param analyse: A coroutine function taking the MusicBrainz ID and returning the artist's statistics dict,
+            with an `error` message if the analysis failed. Failed analyses aren't kept.
+        :return: The artist's statistics dict.
+        """
+        cached = self._results.get(mb_id)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+
+        analysis = self._analyses.get(mb_id)
+        if analysis is None:
+            analysis = self._analyses[mb_id] = asyncio.ensure_future(analyse(mb_id))
+            analysis.add_done_callback(lambda _: self._analyses.pop(mb_id, None))
+        # A client giving up shouldn't cancel the analysis for everyone else waiting on it
+        result = await asyncio.shield(analysis)
+
+        if "error" not in result:
+            if len(self._results) >= MAX_CACHED_RESULTS:
+                self._results.clear()
+            self._results[mb_id] = (time.monotonic(), result)
+        return result
+
+
+class ArtistAverageService:
+    def __init__(self, result_ttl: float = DEFAULT_RESULT_TTL):
+        """
+        Answers requests for artists' statistics. One session, connection pool, and lyrics concurrency limiter are
+        shared by every request for as long as the service runs, along with the response cache, lyrics providers,
+        and the statistics of recently analysed artists.
+        :param result_ttl: The number of seconds an artist's statistics are served from memory for.
+        """
+        self.results = ArtistResults(result_ttl)
+        self.session = None
+        self.lyrics_limiter = None
+
+    async def open(self, app: web.Application) -> None:
+        self.session = create_session()
+        self.lyrics_limiter = AdaptiveConcurrencyLimiter()
+
+    async def close(self, app: web.Application) -> None:
+        await self.session.close()
+        close_response_cache()
+        close_lyrics_provider()
+
+    async def get_artist_average(self, request: web.Request) -> web.Response:
+        """
+        Respond with the statistics shown by `calculate_output` for an artist, as a JSON object with the same keys as
+        the batch mode's output. Responds with a 400 if the ID isn't a MusicBrainz ID. If the artist couldn't be analysed
+        the `error` message is sent with a 404 if they don't exist or have no lyrics, a 502 if a request to an API
+        failed, or a 504 if the deadline passed first.
+        :param request: The request, with the artist's MusicBrainz ID in the path.
+        :return: The JSON response.
+        """
+        mb_id = request.match_info["mbid"].lower()
+        if not is_mb_id(mb_id):
+            return web.json_response({"query": mb_id, "error": "Not a MusicBrainz ID"}, status=400)
+
+        result = await self.results.get(mb_id, self.analyse)
+        status = FAILURE_STATUSES[result["failure"]] if "error" in result else 200
+        return web.json_response(result, status=status)
+
+    async def analyse(self, mb_id: str) -> dict:
+        return await analyse_artist(self.session, mb_id, self.lyrics_limiter)
+
+
+def create_app(result_ttl: float = DEFAULT_RESULT_TTL) -> web.Application:
+    """
+    Create the web app serving artists' statistics as JSON at `GET /artists/{mbid}/average`.
+    :param result_ttl: The number of seconds an artist's statistics are served from memory for.
+    :return: The aiohttp web Application.
+    """
+    service = ArtistAverageService(result_ttl)
+    app = web.Application()
+    app.router.add_get("/artists/{mbid}/average", service.get_artist_average)
+    app.on_startup.append(service.open)
+    app.on_cleanup.append(service.close)
+    return app
+
+
+def run_server(host: str, port: int) -> None:
+    """
+    Serve artists' statistics until the process is stopped.
+    :param host: The interface to listen on.
+    :param port: The port to listen on.
+    :return: None.
+    """
+    print(oh.header(f"Serving artist statistics at http://{host}:{port}/artists/{{mbid}}/average"))
+    web.run_app(create_app(), host=host, port=port, print=None)
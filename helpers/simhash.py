@@ -0,0 +1,83 @@
+import hashlib
+import string
+from collections import Counter
+
+import numpy as np
+
+FINGERPRINT_BITS = 64
+# Fingerprints are indexed by each of these equal blocks of their bits, see SimHashIndex
+INDEX_BLOCKS = 4
+_BLOCK_BITS = FINGERPRINT_BITS // INDEX_BLOCKS
+_BLOCK_MASK = (1 << _BLOCK_BITS) - 1
+_bit_positions = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+
+
+def hamming_distance(first: int, second: int) -> int:
+    """The number of bits that differ between two fingerprints."""
+    return bin(first ^ second).count("1")
+
+
+def lyrics_fingerprint(lyrics: str) -> int:
+    """
+    Calculate the SimHash fingerprint of a song's lyrics. Each pair of neighbouring words is hashed, and each bit
+    of the fingerprint is set if more of the pairs (weighted by how often they appear) have that bit set than not.
+    Lyrics that only differ by a few words, or in case, punctuation and line breaks, get fingerprints that only
+    differ by a few bits, unlike a normal hash.
+    :param lyrics: The lyrics of the song.
+    :return: The 64 bit fingerprint, 0 if the lyrics have no words.
+    """
+    words = [word for word in (word.strip(string.punctuation).lower() for word in lyrics.split()) if word]
+    # Songs of a single word don't have any pairs, so use the words themselves
+    features = Counter(zip(words, words[1:])) if len(words) > 1 else Counter((word,) for word in words)
+    if not features:
+        return 0
+
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(" ".join(feature).encode(), digest_size=8).digest(), "little")
+         for feature in features),
+        dtype=np.uint64,
+        count=len(features),
+    )
+    weights = np.fromiter(features.values(), dtype=np.int64, count=len(features))
+    bits = ((hashes[:, np.newaxis] >> _bit_positions) & np.uint64(1)).astype(np.int64)
+    votes = (weights[:, np.newaxis] * (2 * bits - 1)).sum(axis=0)
+    return sum(1 << bit for bit in np.flatnonzero(votes > 0).tolist())
+
+
+class SimHashIndex:
+    def __init__(self, max_distance: int = 3):
+        """
+        Finds fingerprints within a small Hamming distance of each other without comparing every pair. Each
+        fingerprint is split into 4 blocks of 16 bits and stored in a bucket for each block. Two fingerprints
+        differing by at most 3 bits can't have a differing bit in every one of the 4 blocks, so they always share
+        at least one bucket, and only fingerprints in the same buckets need to be compared.
+        :param max_distance: The most bits two fingerprints can differ by to be duplicates, less than 4.
+        """
+        if max_distance >= INDEX_BLOCKS:
+            raise ValueError(f"{INDEX_BLOCKS} blocks can only find fingerprints within {INDEX_BLOCKS - 1} bits")
+        self.max_distance = max_distance
+        self._buckets = {}
+
+    def add(self, fingerprint: int, item) -> None:
+        """
+        Add an item to the index.
+        :param fingerprint: The item's fingerprint.
+        :param item: The item to return when a near duplicate of it is looked up.
+        :return: None.
+        """
+        for block in range(INDEX_BLOCKS):
+            bucket = (block, (fingerprint >> (block * _BLOCK_BITS)) & _BLOCK_MASK)
+            self._buckets.setdefault(bucket, []).append((fingerprint, item))
+
+    def find(self, fingerprint: int):
+        """
+        Find an item added with a fingerprint within `max_distance` bits of a fingerprint.
+        :param fingerprint: The fingerprint to look up.
+        :return: The item, or None if no item is close enough.
+        """
+        for block in range(INDEX_BLOCKS):
+            bucket = (block, (fingerprint >> (block * _BLOCK_BITS)) & _BLOCK_MASK)
+            for candidate, item in self._buckets.get(bucket, ()):
+                if hamming_distance(fingerprint, candidate) <= self.max_distance:
+                    return item
+        return None
@@ -0,0 +1,115 @@
+import numpy as np
+
+from .data import Track
+
+# Release group primary types in the MusicBrainz database, a track's release type is stored as its index in here
+RELEASE_TYPES = ("Album", "Single", "EP", "Broadcast", "Other")
+_release_type_codes = {release_type: code for code, release_type in enumerate(RELEASE_TYPES)}
+UNKNOWN_RELEASE_TYPE = -1
+UNKNOWN_YEAR = 0
+
+
+def parse_release_year(date: str) -> int:
+    """
+    Get the year from a release date, which can be a full `%Y-%m-%d` date, just a year, or missing.
+    :param date: The release date string from the MusicBrainz API.
+    :return: The year as an integer, or `UNKNOWN_YEAR` if the release has no date.
+    """
+    if date and date[0:4].isdigit():
+        return int(date[0:4])
+    return UNKNOWN_YEAR
+
+
+class TrackTable:
+    def __init__(self, tracks: [Track]):
+        """
+        The tracks with lyrics for an artist stored as columns of NumPy arrays, built once lyrics collection has
+        finished so the statistics and graphs can be calculated with vectorised operations instead of looping
+        over the Track objects for each one.
+        :param tracks: The Track objects with lyrics.
+        """
+        self.tracks = list(tracks)
+        track_count = len(self.tracks)
+        # The position of each row's Track object in `tracks`, so sorted or filtered rows can be mapped back
+        self.indices = np.arange(track_count)
+        self.word_counts = np.fromiter((track.word_count for track in self.tracks), dtype=np.int64, count=track_count)
+        self.unique_word_counts = np.fromiter(
+            (track.unique_word_count for track in self.tracks), dtype=np.int64, count=track_count
+        )
+        self.line_counts = np.fromiter((track.line_count for track in self.tracks), dtype=np.int64, count=track_count)
+
+        self.years = np.empty(track_count, dtype=np.int32)
+        self.release_types = np.empty(track_count, dtype=np.int8)
+        # Tracks on the same release share a Release object, so only parse each release once
+        release_columns = {}
+        for row, track in enumerate(self.tracks):
+            release = track.release
+            columns = release_columns.get(id(release))
+            if columns is None:
+                columns = release_columns[id(release)] = (
+                    parse_release_year(release.date),
+                    _release_type_codes.get(release.release_type, UNKNOWN_RELEASE_TYPE),
+                )
+            self.years[row], self.release_types[row] = columns
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def statistics(self) -> dict:
+        """
+        Calculate the statistics shown by `calculate_output`.
+        :return: A dict of the number of tracks, the average word count, standard deviation, variance,
+            the names and word counts of the shortest and longest tracks, the median and 90th percentile word
+            counts, and the average number of unique words and lines.
+        """
+        word_counts = self.word_counts
+        # argmin and argmax return the first track with the fewest/most words, in the order the tracks were found
+        min_index = int(np.argmin(word_counts))
+        max_index = int(np.argmax(word_counts))
+
+        return {
+            "track_count": len(self),
+            # Integer division keeps this exact for large totals, the same as truncating the exact mean
+            "average_word_count": int(word_counts.sum()) // len(self),
+            "std_dev": float(np.std(word_counts)),
+            "variance": float(np.var(word_counts)),
+            "min_word_count": int(word_counts[min_index]),
+            "min_track": self.tracks[min_index].name,
+            "max_word_count": int(word_counts[max_index]),
+            "max_track": self.tracks[max_index].name,
+            "median_word_count": float(np.median(word_counts)),
+            "p90_word_count": float(np.percentile(word_counts, 90)),
+            "average_unique_word_count": int(self.unique_word_counts.sum()) // len(self),
+            "average_line_count": int(self.line_counts.sum()) // len(self),
+        }
+
+    def dated_rows_by_year(self) -> np.ndarray:
+        """
+        Get the rows of the tracks that have a release date, oldest first.
+        :return: An array of row indices, sorted by release year and then the order the tracks were found.
+        """
+        dated_rows = self.indices[self.years != UNKNOWN_YEAR]
+        return dated_rows[np.argsort(self.years[dated_rows], kind="stable")]
+
+    def yearly_word_count_quartiles(self) -> (np.ndarray, np.ndarray, np.ndarray, np.ndarray):
+        """
+        Summarise the word counts of the tracks released each year, for graphs with too many tracks to show each one.
+        The word counts are sorted by year then word count once, so each year's quartiles can be picked out of its
+        run of the sorted counts without looping over the years.
+        :return: A tuple of arrays of the years with dated tracks, oldest first, and the lower quartile, median, and
+            upper quartile of each year's word counts, interpolated the same as numpy.percentile.
+        """
+        dated = self.years != UNKNOWN_YEAR
+        years = self.years[dated]
+        word_counts = self.word_counts[dated]
+        order = np.lexsort((word_counts, years))
+        years, word_counts = years[order], word_counts[order]
+        unique_years, starts, sizes = np.unique(years, return_index=True, return_counts=True)
+
+        def quantile(fraction: float) -> np.ndarray:
+            positions = starts + fraction * (sizes - 1)
+            lower = np.floor(positions).astype(np.int64)
+            upper = np.minimum(lower + 1, starts + sizes - 1)
+            return word_counts[lower] + (word_counts[upper] - word_counts[lower]) * (positions - lower)
+
+        return unique_years, quantile(0.25), quantile(0.5), quantile(0.75)
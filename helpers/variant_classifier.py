@@ -0,0 +1,77 @@
+import flags
+from .data import Release, Track
+
+# The most verdicts kept in each cache before it's cleared, so a long batch of artists can't grow it forever
+MAX_CACHED_VERDICTS = 100000
+
+
+class VariantClassifier:
+    def __init__(self, keywords=flags.DEFAULT_VARIANT_KEYWORDS):
+        """
+        Detects songs re-released as live or remixed versions, and instrumental tracks we don't need to find lyrics
+        for, from whole word keywords in the track's name or its release's name.
+
+        The keywords are matched against the words of a name once it's lowercased and had its parentheses removed,
+        so only whole word instances count, which prevents removing valid song names like "Alive" or "Mixed Up".
+        Verdicts are cached per track name and per release MBID, since the same names and releases are checked
+        over and over while removing duplicates.
+        :param keywords: The single word keywords marking a variant, matched case-insensitively.
+        """
+        self.keywords = frozenset(keyword.lower() for keyword in keywords)
+        self._name_verdicts = {}
+        self._release_verdicts = {}
+
+    def is_variant(self, track: Track) -> bool:
+        """
+        Check whether a track is a re-release, instrumental, demo, or any other kind of duplicate version of a song.
+        :param track: Track object to check.
+        :return: True if the track's name or its release's name contains one of the keywords.
+        """
+        return self.is_variant_name(track.name) or self.is_variant_release(track.release)
+
+    def is_variant_name(self, name: str) -> bool:
+        """
+        Check whether a track or release name contains one of the keywords.
+        :param name: The name to check.
+        :return: True if one of the name's words is a keyword.
+        """
+        verdict = self._name_verdicts.get(name)
+        if verdict is None:
+            if len(self._name_verdicts) >= MAX_CACHED_VERDICTS:
+                self._name_verdicts.clear()
+            words = name.lower().replace("(", "").replace(")", "").split(" ")
+            verdict = self._name_verdicts[name] = not self.keywords.isdisjoint(words)
+        return verdict
+
+    def is_variant_release(self, release: Release) -> bool:
+        """
+        Check whether a release's name contains one of the keywords.
+        :param release: The Release object to check.
+        :return: True if one of the words in the release's name is a keyword.
+        """
+        verdict = self._release_verdicts.get(release.mb_id)
+        if verdict is None:
+            if len(self._release_verdicts) >= MAX_CACHED_VERDICTS:
+                self._release_verdicts.clear()
+            verdict = self._release_verdicts[release.mb_id] = self.is_variant_name(release.name)
+        return verdict
+
+
+_variant_classifier = None
+
+
+def get_variant_classifier() -> VariantClassifier:
+    """
+    Get the variant classifier shared by the duplicate filters, set up from `flags.VARIANT_KEYWORDS` the first time.
+    :return: The shared VariantClassifier object, using the default keywords if none are set.
+    """
+    global _variant_classifier
+    if _variant_classifier is None:
+        _variant_classifier = VariantClassifier(flags.VARIANT_KEYWORDS or flags.DEFAULT_VARIANT_KEYWORDS)
+    return _variant_classifier
+
+
+def reset_variant_classifier() -> None:
+    """Discard the shared variant classifier, so the next one is set up from the current flags."""
+    global _variant_classifier
+    _variant_classifier = None
@@ -1,55 +1,70 @@
 from sys import stderr
 from time import perf_counter
 import argparse
-import aiohttp
-import asyncio
-import musicbrainzngs
 
 import flags
-from helpers.data_collection_helpers import get_artist_data, get_recordings_data, get_song_lyrics
-from helpers.data_cleanup_helpers import remove_duplicate_recordings
-from helpers.calculation_helpers import calculate_output, plot_data
+
+# The file types the graph can be saved as
+GRAPH_FORMATS = (".png", ".svg", ".pdf")
 
 
 async def main():
+    # The network and plotting stacks take most of the startup time, so they're only imported once they're needed
+    from helpers.data_collection_helpers import search_artist_data, create_session
+    from helpers.analysis import collect_lyrics
+    from helpers.deadline import Deadline
+    from helpers.calculation_helpers import calculate_output, plot_data, plot_terminal
+    from helpers.track_table import TrackTable
+    from helpers.cache import get_response_cache
+    from helpers.metrics import get_metrics
+    from helpers.lyrics_providers import get_lyrics_provider
+
     # Await a user input for the artist name
     artist_name_query = input("Enter artist name: ")
 
     timer_start = perf_counter()
+    deadline = Deadline(flags.DEADLINE)
 
-    # We use this accept header so the MusicBrainz API will return JSON data instead of XML
-    headers = {"Accept": "application/json"}
-    async with aiohttp.ClientSession(headers=headers) as session:
+    async with create_session() as session:
         # Get the artist data from the API
-        artist, err = get_artist_data(artist_name_query)
-        if handle_error(err):
-            return
-
-        # Get the recording data from the API using the artist ID
-        recordings, err = await get_recordings_data(session, artist)
+        artist, err = await search_artist_data(session, artist_name_query)
         if handle_error(err):
             return
 
-        # Clean the data by removing any duplicate songs/singles/remixes/re-releases/etc.
-        cleaned_recordings = remove_duplicate_recordings(recordings, artist)
-
-        # For each song we have, get the lyrics and store them in the class
-        recordings_with_lyrics, err = await get_song_lyrics(session, cleaned_recordings, artist)
+        # Find the artist's songs, clean out the duplicates, and get the lyrics for each one
+        recordings_with_lyrics, err = await collect_lyrics(session, artist, deadline=deadline)
         if handle_error(err):
             return
 
         # Calculate the average number of words over all lyrics we retrieved
-        average_word_count, err = calculate_output(recordings_with_lyrics, artist)
+        track_table = TrackTable(recordings_with_lyrics)
+        average_word_count, err = calculate_output(track_table, artist)
         if handle_error(err):
             return
 
         timer_stop = perf_counter()
 
         if flags.PERFORMANCE_TIMING:
+            cache = get_response_cache()
+            if cache:
+                print(f"Response cache: {cache.hits} hits, {cache.misses} misses")
+            lyrics_metrics = get_metrics().endpoint("lyrics")
+            if lyrics_metrics.hedges:
+                print(
+                    f"Hedged {lyrics_metrics.hedges} of {lyrics_metrics.hedgeable_requests} lyric API requests "
+                    f"({lyrics_metrics.hedge_rate:.1%}), the hedge finished first for {lyrics_metrics.hedge_wins} "
+                    f"({lyrics_metrics.hedge_win_rate:.1%})"
+                )
+            lyrics_found = get_lyrics_provider().found
+            print("Lyrics found by provider: " + ", ".join(f"{name} {count}" for name, count in lyrics_found.items()))
             print(f"Elapsed time: {timer_stop - timer_start}s\n\n")
 
+        if flags.GRAPH_OUT:
+            plot_data(track_table, average_word_count, artist, flags.GRAPH_OUT)
+        if flags.TERMINAL_GRAPH:
+            plot_terminal(track_table, average_word_count, artist)
         if flags.SHOW_GRAPH:
-            plot_data(recordings_with_lyrics, average_word_count, artist)
+            plot_data(track_table, average_word_count, artist)
 
 
 def handle_error(err: str) -> bool:
@@ -65,11 +80,12 @@ def handle_error(err: str) -> bool:
     return False
 
 
-if __name__ == "__main__":
-    # Setting a useragent is required to use the python API
-    musicbrainzngs.set_useragent("LyricsCounter", "0.1")
-
-    # Setup arguments
+def build_arg_parser() -> argparse.ArgumentParser:
+    """
+    Set up the command line arguments, without importing any of the modules the analysis itself needs so
+    `--help` and argument errors are shown straight away.
+    :return: The ArgumentParser for the program's arguments.
+    """
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "-v", "--verbose",
@@ -101,9 +117,174 @@ if __name__ == "__main__":
         action="store_true",
         default=False
     )
-    # TODO - add arg to compare 2 artists
+    parser.add_argument(
+        "--graph-out",
+        metavar="FILE",
+        help="save the graph to FILE (.png, .svg, or .pdf) without opening a window",
+        default="",
+    )
+    parser.add_argument(
+        "--terminal-graph",
+        help="draw the graph as text in the terminal",
+        action="store_true",
+        default=False
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="directory to store cached API responses in",
+        default=flags.DEFAULT_CACHE_DIR,
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="always request fresh data from the APIs instead of using cached responses",
+        action="store_true",
+        default=False
+    )
+    # Only the recordings search returns results a page at a time, so it can't be streamed with the release groups
+    collection_group = parser.add_mutually_exclusive_group()
+    collection_group.add_argument(
+        "--stream",
+        help="request lyrics for each page of songs as it arrives instead of waiting for every page first",
+        action="store_true",
+        default=False
+    )
+    collection_group.add_argument(
+        "--release-groups",
+        help="only collect songs from the earliest official release of each album and EP",
+        action="store_true",
+        default=False
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="analyse every artist name or MusicBrainz ID listed in FILE (one per line, `-` for stdin) "
+             "and output one line of JSON statistics per artist",
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="ARTIST",
+        nargs="+",
+        help="analyse two or more artist names or MusicBrainz IDs at once and show their statistics side by side",
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="PORT",
+        help="run a web server on PORT answering GET /artists/{mbid}/average with an artist's statistics as JSON",
+        type=int,
+    )
+    parser.add_argument(
+        "--host",
+        help="the interface the web server listens on",
+        default="127.0.0.1",
+    )
+    parser.add_argument(
+        "--batch-concurrency",
+        help="the number of artists to analyse at once in batch mode",
+        type=int,
+        default=4,
+    )
+    parser.add_argument(
+        "--metrics-out",
+        metavar="PREFIX",
+        help="write network metrics for the run to PREFIX.json and PREFIX.prom (Prometheus text format)",
+    )
+    parser.add_argument(
+        "--deadline",
+        metavar="SECONDS",
+        help="stop requesting lyrics after SECONDS and show the results for the lyrics found so far",
+        type=float,
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        metavar="SECONDS",
+        help="the number of seconds to wait for a connection to an API before retrying",
+        type=float,
+        default=flags.CONNECT_TIMEOUT,
+    )
+    parser.add_argument(
+        "--read-timeout",
+        metavar="SECONDS",
+        help="the number of seconds to wait for data from an API before retrying",
+        type=float,
+        default=flags.READ_TIMEOUT,
+    )
+    parser.add_argument(
+        "--lyrics-corpus",
+        metavar="PATH",
+        help="a directory or SQLite database of lyrics to look songs up in before using the lyrics API",
+        default="",
+    )
+    parser.add_argument(
+        "--lyrics-providers",
+        metavar="NAMES",
+        help=f"comma separated list of lyrics providers to try in order, from: {', '.join(flags.PROVIDER_NAMES)}",
+        type=lambda names: [name.strip() for name in names.split(",") if name.strip()],
+        default=[],
+    )
+    parser.add_argument(
+        "--hedge",
+        help="send a second copy of any lyrics request slower than 95%% of requests, using whichever finishes first",
+        action="store_true",
+        default=False
+    )
+    parser.add_argument(
+        "--variant-keywords",
+        metavar="KEYWORDS",
+        help="comma separated list of words marking a track or release as a remix, live, or other version of a song, "
+             f"replacing the defaults: {','.join(flags.DEFAULT_VARIANT_KEYWORDS)}",
+        type=lambda keywords: [keyword.strip().lower() for keyword in keywords.split(",") if keyword.strip()],
+        default=[],
+    )
+    parser.add_argument(
+        "--near-duplicates",
+        help="also merge tracks with nearly the same title, e.g. `Song - 2011 Remaster` or `Song (Radio Edit)`, "
+             "keeping the earliest album track",
+        action="store_true",
+        default=False
+    )
+    parser.add_argument(
+        "--dedupe-lyrics",
+        help="count tracks with the same or nearly the same lyrics once, remembering them in the cache so their "
+             "lyrics aren't requested next time",
+        action="store_true",
+        default=False
+    )
+    parser.add_argument(
+        "--live-stats",
+        help="show the running average word count and standard deviation as each song's lyrics are found",
+        action="store_true",
+        default=False
+    )
+    parser.add_argument(
+        "--debug-raw",
+        help="keep the full API responses in memory instead of only the fields used, for debugging",
+        action="store_true",
+        default=False
+    )
+    return parser
 
+
+if __name__ == "__main__":
+    # Setup arguments
+    parser = build_arg_parser()
     args = parser.parse_args()
+    for provider_name in args.lyrics_providers:
+        if provider_name not in flags.PROVIDER_NAMES:
+            parser.error(f"unknown lyrics provider `{provider_name}`, choose from: {', '.join(flags.PROVIDER_NAMES)}")
+    if flags.LOCAL_CORPUS in args.lyrics_providers and not args.lyrics_corpus:
+        parser.error("the local lyrics provider needs a corpus, set with --lyrics-corpus")
+    if args.near_duplicates and args.stream:
+        parser.error("--near-duplicates needs every track to choose which to keep, so can't be used with --stream")
+    if args.compare and len(args.compare) < 2:
+        parser.error("--compare needs at least two artists")
+    # Port 0 asks the OS for a free port, so --serve is checked against None rather than for being truthy
+    if sum((bool(args.batch), bool(args.compare), args.serve is not None)) > 1:
+        parser.error("only one of --batch, --compare, and --serve can be used at a time")
+    if args.graph_out and not args.graph_out.lower().endswith(GRAPH_FORMATS):
+        parser.error(f"--graph-out must be one of these file types: {', '.join(GRAPH_FORMATS)}")
+    for keyword in args.variant_keywords:
+        if len(keyword.split()) > 1:
+            parser.error(f"variant keyword `{keyword}` must be a single word")
 
     # Set the global flags
     flags.IS_VERBOSE = args.verbose
@@ -111,6 +292,51 @@ if __name__ == "__main__":
     flags.PERFORMANCE_TIMING = args.performance
     flags.SHOW_STATISTICS = args.statistics
     flags.SHOW_GRAPH = args.graph
+    flags.GRAPH_OUT = args.graph_out
+    flags.TERMINAL_GRAPH = args.terminal_graph
+    flags.USE_CACHE = not args.no_cache
+    flags.CACHE_DIR = args.cache_dir
+    flags.STREAM_PIPELINE = args.stream
+    flags.RELEASE_GROUPS = args.release_groups
+    flags.KEEP_RAW_DATA = args.debug_raw
+    flags.DEADLINE = args.deadline
+    flags.CONNECT_TIMEOUT = args.connect_timeout
+    flags.READ_TIMEOUT = args.read_timeout
+    flags.LYRICS_CORPUS = args.lyrics_corpus
+    flags.LYRICS_PROVIDERS = args.lyrics_providers
+    flags.HEDGE_REQUESTS = args.hedge
+    flags.VARIANT_KEYWORDS = args.variant_keywords
+    flags.NEAR_DUPLICATES = args.near_duplicates
+    flags.DEDUPE_LYRICS = args.dedupe_lyrics
+    flags.LIVE_STATISTICS = args.live_stats
+
+    import asyncio
+    import musicbrainzngs
+    from helpers.batch import read_batch_queries, run_batch
+    from helpers.compare import run_comparison
+    from helpers.server import run_server
+    from helpers.cache import close_response_cache
+    from helpers.metrics import get_metrics
+    from helpers.lyrics_providers import close_lyrics_provider
+
+    # Setting a useragent is required to use the python API
+    musicbrainzngs.set_useragent("LyricsCounter", "0.1")
+    # We pace MusicBrainz requests with our own rate limiter so the artist search and recordings
+    # requests share one budget, so disable the library's separate limiter.
+    musicbrainzngs.set_rate_limit(False)
 
     # Main program
-    asyncio.run(main())
+    try:
+        if args.batch:
+            asyncio.run(run_batch(read_batch_queries(args.batch), args.batch_concurrency))
+        elif args.compare:
+            asyncio.run(run_comparison(args.compare))
+        elif args.serve is not None:
+            run_server(args.host, args.serve)
+        else:
+            asyncio.run(main())
+    finally:
+        close_response_cache()
+        close_lyrics_provider()
+        if args.metrics_out:
+            get_metrics().write(args.metrics_out)
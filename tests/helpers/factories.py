@@ -0,0 +1,43 @@
+from helpers.data import ReleaseRegistry, Track
+
+ARTIST_ID = "b7ffd2af-418f-4be2-bdd1-22f8b48613da"
+
+
+def make_track(
+        mb_id: str,
+        name: str = None,
+        release_name: str = "Album",
+        artist_id: str = ARTIST_ID,
+        releases: ReleaseRegistry = None,
+        release_type: str = "Album",
+        date: str = "1994-03-08",
+        release_id: str = None,
+        word_count: int = None,
+) -> Track:
+    """
+    Build a Track object from the subset of the recordings data the helpers look at.
+    :param mb_id: The recording's MBID.
+    :param name: The track's title, `Song <mb_id>` if not given.
+    :param release_name: The title of the track's release.
+    :param artist_id: The MBID of the first artist credited on the track.
+    :param releases: The registry to add the track's release to, tracks on releases with the same ID share a Release.
+    :param release_type: The primary type of the release's release group.
+    :param date: The release's date.
+    :param release_id: The release's MBID, `release-<release_name>` if not given.
+    :param word_count: If given, the track's lyrics are set to this many words from a small vocabulary.
+    :return: The Track object.
+    """
+    track = Track(releases=releases, raw_data={
+        "id": mb_id,
+        "title": name if name is not None else f"Song {mb_id}",
+        "artist-credit": [{"artist": {"id": artist_id}}],
+        "releases": [{
+            "id": release_id or f"release-{release_name}",
+            "title": release_name,
+            "date": date,
+            "release-group": {"primary-type": release_type},
+        }],
+    })
+    if word_count is not None:
+        track.lyrics = " ".join(f"word{index % 7}" for index in range(word_count))
+    return track
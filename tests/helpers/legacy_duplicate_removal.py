@@ -0,0 +1,47 @@
+import flags
+from helpers.data import Artist, Track
+from helpers.data_cleanup_helpers import is_non_artist_song, is_re_release_or_instrumental
+
+
+def legacy_remove_duplicate_recordings(raw_recordings_data: [Track], artist: Artist) -> [Track]:
+    """
+    The original `remove_duplicate_recordings` that compared every pair of recordings, kept as the oracle for the
+    title index version. It checks and removes recordings from the output list by identity, as the original did when
+    tracks had no `__eq__` of their own, so repeated recordings of the same MBID are told apart. It only changes the
+    original to use the artist's registry of releases, and shares the current `is_re_release_or_instrumental`.
+    :param raw_recordings_data: A list of Track objects to check for duplicates.
+    :param artist: The Artist linked to the Tracks.
+    :return: Cleaned list of Track objects containing each non-duplicate track.
+    """
+    output_data = raw_recordings_data.copy()
+
+    def remove(track: Track) -> None:
+        # `list.remove` compares with `==`, so find the exact object instead
+        for index, output_track in enumerate(output_data):
+            if output_track is track:
+                del output_data[index]
+                artist.releases.remove_track(track)
+                return
+
+    for recording in raw_recordings_data:
+        if is_non_artist_song(recording, artist):
+            if flags.IS_VERBOSE:
+                remove(recording)
+            continue
+
+        search_term = recording.name
+
+        # Find any recordings with similar names
+        similar_recordings = [
+            track for track in raw_recordings_data
+            if track.name.find(search_term) != -1 and track.mb_id != recording.mb_id
+        ]
+
+        # Look for instrumental, live, remix, etc. track variants
+        for sim in similar_recordings:
+            if is_re_release_or_instrumental(sim):
+                remove(sim)
+            elif sim.name == recording.name and flags.IS_VERBOSE:
+                remove(sim)
+
+    return output_data
@@ -0,0 +1,49 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import aiohttp
+
+import flags
+from helpers.analysis import DEADLINE_REACHED, NOT_FOUND, UPSTREAM_ERROR, analyse_artist_tracks
+from helpers.data import Artist
+
+from .factories import ARTIST_ID
+
+
+class TestAnalyseArtistTracks(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        deadline = flags.DEADLINE
+        self.addCleanup(setattr, flags, "DEADLINE", deadline)
+
+    async def analyse(self, resolve_artist=None, collect_lyrics=None) -> tuple:
+        async def found_artist(session, query, interactive):
+            return Artist("", "Nine Inch Nails", ARTIST_ID, ""), None
+
+        with patch("helpers.analysis.resolve_artist", resolve_artist or found_artist), \
+                patch("helpers.analysis.collect_lyrics", collect_lyrics):
+            return await analyse_artist_tracks(None, ARTIST_ID)
+
+    async def test_not_found(self) -> None:
+        async def resolve_artist(session, query, interactive):
+            return None, "No artist found!"
+
+        self.assertEqual(await self.analyse(resolve_artist), (None, None, "No artist found!", NOT_FOUND))
+
+    async def test_upstream_error(self) -> None:
+        """Assert that a request running out of retries is reported as an upstream failure, not a missing artist."""
+        async def collect_lyrics(session, artist, limiter, deadline):
+            raise aiohttp.ClientConnectionError("Cannot connect to host")
+
+        _, _, err, failure = await self.analyse(collect_lyrics=collect_lyrics)
+        self.assertEqual(err, "ClientConnectionError: Cannot connect to host")
+        self.assertEqual(failure, UPSTREAM_ERROR)
+
+    async def test_deadline_reached(self) -> None:
+        """Assert that finding nothing before the deadline passes is reported as the deadline being reached."""
+        flags.DEADLINE = 0
+
+        async def collect_lyrics(session, artist, limiter, deadline):
+            return None, "No lyrics found!"
+
+        _, _, _, failure = await self.analyse(collect_lyrics=collect_lyrics)
+        self.assertEqual(failure, DEADLINE_REACHED)
@@ -1,7 +1,7 @@
 from unittest import TestCase
 from unittest.mock import patch
 import requests
-from helpers.api_parser import build_recordings_query_url, build_lyrics_url, sanitise_url_string
+from helpers.api_parser import build_artist_search_url, build_recordings_query_url, build_lyrics_url, sanitise_url_string
 
 
 class TestAPISetup(TestCase):
@@ -49,6 +49,15 @@ class TestAPISetup(TestCase):
         self.assertEqual(self.response.status_code, 200)
 
 
+class TestArtistSearchQueryGeneration(TestCase):
+    def test_artist_search_url_escapes_query(self) -> None:
+        """Assert that Lucene special characters in an artist name are escaped and the query is url encoded."""
+        self.assertEqual(
+            build_artist_search_url("AC/DC", limit=5),
+            "https://musicbrainz.org/ws/2/artist/?query=artist%3A%28AC%5C%2FDC%29&limit=5"
+        )
+
+
 class TestRecordingsQueryGeneration(TestAPISetup):
     def setUp(self) -> None:
         super().setUp()
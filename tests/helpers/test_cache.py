@@ -0,0 +1,105 @@
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from helpers.cache import FINGERPRINT_SIZE, ResponseCache
+
+
+class TestResponseCache(TestCase):
+    def setUp(self) -> None:
+        """Create a cache in a temporary directory so each test starts empty."""
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.cache_dir.name)
+
+    def test_missing_url_is_a_miss(self) -> None:
+        """Assert that looking up a url we haven't stored returns a miss."""
+        self.assertEqual(self.cache.get("lyrics", "https://example.com/missing"), (False, None))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_stored_response_is_returned(self) -> None:
+        """Assert that a stored response is returned unchanged for the same url and endpoint."""
+        data = {"count": 1, "recordings": [{"id": "abc", "title": "Song"}]}
+        self.cache.set("recordings", "https://example.com/page", data)
+        self.assertEqual(self.cache.get("recordings", "https://example.com/page"), (True, data))
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_negative_response_is_cached(self) -> None:
+        """Assert that a `no lyrics found` result is stored as a hit with no data."""
+        self.cache.set("lyrics", "https://example.com/no-lyrics", None)
+        self.assertEqual(self.cache.get("lyrics", "https://example.com/no-lyrics"), (True, None))
+
+    def test_expired_response_is_a_miss(self) -> None:
+        """Assert that entries older than their endpoint's TTL are no longer returned."""
+        with patch("helpers.cache.time.time", return_value=1000):
+            self.cache.set("lyrics", "https://example.com/old", {"lyrics": "la la la"})
+        with patch("helpers.cache.time.time", return_value=1000 + self.cache.ttls["lyrics"] + 1):
+            self.assertEqual(self.cache.get("lyrics", "https://example.com/old"), (False, None))
+
+    def test_cache_evicts_least_recently_used_entries(self) -> None:
+        """Assert that writing past `max_size` evicts the least recently used entries first."""
+        self.cache.max_size = 100
+        self.cache.set("lyrics", "https://example.com/1", {"lyrics": "a" * 30})
+        self.cache.set("lyrics", "https://example.com/2", {"lyrics": "b" * 30})
+        # Read the first entry so the second becomes the least recently used
+        self.cache.get("lyrics", "https://example.com/1")
+        self.cache.set("lyrics", "https://example.com/3", {"lyrics": "c" * 30})
+
+        self.assertTrue(self.cache.get("lyrics", "https://example.com/1")[0])
+        self.assertFalse(self.cache.get("lyrics", "https://example.com/2")[0])
+        self.assertTrue(self.cache.get("lyrics", "https://example.com/3")[0])
+
+    def test_cache_persists_between_instances(self) -> None:
+        """Assert that responses stored by one run are available to the next."""
+        self.cache.set("lyrics", "https://example.com/song", {"lyrics": "words"})
+        self.cache.close()
+        self.cache = ResponseCache(self.cache_dir.name)
+        self.assertEqual(self.cache.get("lyrics", "https://example.com/song"), (True, {"lyrics": "words"}))
+
+    def test_lyrics_duplicates(self) -> None:
+        """Assert that only recordings stored as a duplicate of another are returned, with full 64 bit fingerprints."""
+        self.cache.set_lyrics_fingerprints([("a", (1 << 64) - 1, None), ("b", 1 << 63, "a"), ("c", 5, "a")])
+        self.assertEqual(self.cache.get_lyrics_duplicates(["a", "b", "missing"]), {"b": "a"})
+        self.assertEqual(self.cache.get_lyrics_duplicates([f"id-{index}" for index in range(2000)] + ["c"]), {"c": "a"})
+
+    def test_lyrics_fingerprints_expire(self) -> None:
+        """Assert that fingerprints expire with the lyrics, and are removed when the cache evicts expired entries."""
+        with patch("helpers.cache.time.time", return_value=1000):
+            self.cache.set_lyrics_fingerprints([("b", 1, "a")])
+        with patch("helpers.cache.time.time", return_value=1000 + self.cache.ttls["lyrics"] + 1):
+            self.assertEqual(self.cache.get_lyrics_duplicates(["b"]), {})
+            self.cache.evict()
+        self.assertEqual(self.cache.connection.execute("SELECT COUNT(*) FROM lyrics_fingerprints").fetchone()[0], 0)
+
+    def test_lyrics_fingerprints_are_evicted_with_responses(self) -> None:
+        """Assert that fingerprints count towards `max_size`, and the least recently used of either are evicted."""
+        self.cache.max_size = FINGERPRINT_SIZE * 3
+        with patch("helpers.cache.time.time", return_value=1000):
+            self.cache.set_lyrics_fingerprints([("b", 1, "a")])
+        with patch("helpers.cache.time.time", return_value=1001):
+            self.cache.set_lyrics_fingerprints([("c", 2, "a")])
+        with patch("helpers.cache.time.time", return_value=1002):
+            # Reading the first fingerprint makes the second the least recently used
+            self.cache.get_lyrics_duplicates(["b"])
+        with patch("helpers.cache.time.time", return_value=1003):
+            self.cache.set("lyrics", "https://example.com/1", {"lyrics": "a" * FINGERPRINT_SIZE})
+        with patch("helpers.cache.time.time", return_value=1004):
+            self.assertEqual(self.cache.get_lyrics_duplicates(["b", "c"]), {"b": "a"})
+            self.assertTrue(self.cache.get("lyrics", "https://example.com/1")[0])
+
+    def test_old_lyrics_fingerprints_table_is_upgraded(self) -> None:
+        """Assert that a cache made before fingerprints expired can still be opened, and its fingerprints are stale."""
+        self.cache.connection.execute("DROP TABLE lyrics_fingerprints")
+        self.cache.connection.execute(
+            "CREATE TABLE lyrics_fingerprints (recording_id TEXT PRIMARY KEY, fingerprint INTEGER NOT NULL, "
+            "duplicate_of TEXT)"
+        )
+        self.cache.connection.execute("INSERT INTO lyrics_fingerprints VALUES ('b', 1, 'a')")
+        self.cache.close()
+        self.cache = ResponseCache(self.cache_dir.name)
+        self.assertEqual(self.cache.get_lyrics_duplicates(["b"]), {})
+        self.cache.set_lyrics_fingerprints([("b", 1, "a")])
+        self.assertEqual(self.cache.get_lyrics_duplicates(["b"]), {"b": "a"})
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self.cache_dir.cleanup()
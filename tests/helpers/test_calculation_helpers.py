@@ -0,0 +1,91 @@
+import contextlib
+import io
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from helpers.calculation_helpers import format_comparison, plot_comparison, plot_data, plot_terminal
+from helpers.data import Artist, ReleaseRegistry, Track
+from helpers.track_table import TrackTable
+import helpers.output_helpers as oh
+
+
+def make_table(track_count: int) -> TrackTable:
+    releases = ReleaseRegistry()
+    tracks = []
+    for index in range(track_count):
+        year = 1989 + index % 30
+        track = Track(releases=releases, raw_data={
+            "id": str(index),
+            "title": f"Song {index}",
+            "artist-credit": [{"artist": {"id": "artist"}}],
+            "releases": [{"id": str(year), "title": "Album", "date": f"{year}-03-08",
+                          "release-group": {"primary-type": "Album"}}],
+        })
+        track.word_count = 50 + (index * 37) % 400
+        tracks.append(track)
+    return TrackTable(tracks)
+
+
+class TestGraphs(TestCase):
+    def setUp(self) -> None:
+        self.artist = Artist("", "Nine Inch Nails", "artist", "")
+
+    def test_graph_is_saved_without_a_window(self) -> None:
+        """Assert that saving a graph, of every song or of each year's quartiles, never shows a window."""
+        with tempfile.TemporaryDirectory() as directory, patch("matplotlib.pyplot.show") as show:
+            for track_count, file_name in ((50, "graph.png"), (5000, "graph.svg")):
+                output_path = os.path.join(directory, file_name)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    plot_data(make_table(track_count), 200, self.artist, output_path)
+                self.assertGreater(os.path.getsize(output_path), 0)
+            show.assert_not_called()
+
+    def test_undated_tracks_are_not_plotted(self) -> None:
+        table = make_table(3)
+        table.years[:] = 0
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            plot_data(table, 200, self.artist, "unused.png")
+            plot_terminal(table, 200, self.artist)
+        self.assertFalse(os.path.exists("unused.png"))
+        self.assertEqual(output.getvalue().count("None of the tracks have a release date to plot!"), 2)
+
+    def test_terminal_graph(self) -> None:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            plot_terminal(make_table(50), 200, self.artist)
+        self.assertIn("Word count of Nine Inch Nails songs over time.", output.getvalue())
+
+    def test_comparison_graph(self) -> None:
+        """Assert that several artists are drawn on one graph, with each artist named in the legend."""
+        artist_tracks = [(self.artist, make_table(50), 200), (Artist("", "Radiohead", "r", ""), make_table(5000), 220)]
+        with contextlib.redirect_stdout(io.StringIO()), \
+                patch("matplotlib.figure.Figure.savefig", autospec=True) as savefig:
+            plot_comparison(artist_tracks, "graph.png")
+
+        fig, output_path = savefig.call_args[0]
+        self.assertEqual(output_path, "graph.png")
+        ax = fig.axes[0]
+        self.assertEqual(ax.get_title(), "Word count of Nine Inch Nails and Radiohead songs over time.")
+        self.assertEqual([text.get_text() for text in ax.get_legend().get_texts()], [
+            "Nine Inch Nails", "Nine Inch Nails average",
+            "Radiohead interquartile range", "Radiohead median", "Radiohead average",
+        ])
+
+
+class TestComparisonTable(TestCase):
+    def test_artists_are_side_by_side(self) -> None:
+        """Assert that each artist gets a column of their statistics, lined up on the right."""
+        table = make_table(5)
+        results = []
+        for name in ("Nine Inch Nails", "Tool"):
+            results.append({"artist": name, **table.statistics(), "lyrics_found": 5, "lyrics_attempted": 6})
+        lines = oh.plain(format_comparison(results)).splitlines()
+
+        self.assertEqual(lines[0].split(), ["Nine", "Inch", "Nails", "Tool"])
+        self.assertEqual(lines[1].split(), ["Songs", "5", "5"])
+        self.assertTrue(lines[-1].startswith("Lyrics found"))
+        self.assertTrue(lines[-1].endswith("5/6"))
+        self.assertEqual(len({len(line) for line in lines}), 1)
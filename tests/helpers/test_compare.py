@@ -0,0 +1,42 @@
+import asyncio
+import contextlib
+import io
+from time import perf_counter
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from helpers.analysis import NOT_FOUND
+from helpers.compare import run_comparison
+from helpers.data import Artist
+
+from .test_calculation_helpers import make_table
+
+
+@contextlib.asynccontextmanager
+async def fake_session():
+    yield None
+
+
+class TestCompare(IsolatedAsyncioTestCase):
+    async def test_artists_are_analysed_concurrently(self) -> None:
+        """Assert that comparing artists takes about as long as the slowest one, and an artist that can't be
+        analysed is reported without stopping the others being compared."""
+        async def analyse_artist_tracks(session, query, limiter):
+            await asyncio.sleep(0.2)
+            if query == "Missing":
+                return None, None, "No artist found!", NOT_FOUND
+            return Artist("", query, query, ""), make_table(10), None, None
+
+        output = io.StringIO()
+        errors = io.StringIO()
+        with patch("helpers.compare.analyse_artist_tracks", analyse_artist_tracks), \
+                patch("helpers.compare.create_session", fake_session), \
+                contextlib.redirect_stdout(output), contextlib.redirect_stderr(errors):
+            timer_start = perf_counter()
+            await run_comparison(["Nine Inch Nails", "Missing", "Radiohead"])
+            seconds = perf_counter() - timer_start
+
+        self.assertLess(seconds, 0.4)
+        table_header = next(line for line in output.getvalue().splitlines() if "Nine Inch Nails" in line)
+        self.assertLess(table_header.index("Nine Inch Nails"), table_header.index("Radiohead"))
+        self.assertIn("Couldn't analyse Missing", errors.getvalue())
@@ -0,0 +1,66 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from helpers.concurrency import AdaptiveConcurrencyLimiter, LimiterSlot
+
+
+class TestAdaptiveConcurrencyLimiter(IsolatedAsyncioTestCase):
+    async def test_in_flight_requests_never_exceed_window(self) -> None:
+        """Assert that no more than `window` requests are ever in flight at once."""
+        limiter = AdaptiveConcurrencyLimiter(initial_window=3, max_window=3)
+        max_in_flight = 0
+
+        async def request():
+            nonlocal max_in_flight
+            async with limiter.slot():
+                max_in_flight = max(max_in_flight, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[request() for _ in range(20)])
+        self.assertEqual(max_in_flight, 3)
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_window_grows_with_healthy_responses(self) -> None:
+        """Assert that a full window of healthy responses grows the window by roughly one."""
+        # These responses take almost no time, so timer jitter alone could make one look too slow to grow the window
+        limiter = AdaptiveConcurrencyLimiter(initial_window=4, latency_tolerance=float("inf"))
+        for _ in range(4):
+            async with limiter.slot():
+                pass
+        self.assertEqual(limiter.window, 4)
+        async with limiter.slot():
+            pass
+        self.assertEqual(limiter.window, 5)
+
+    async def test_window_shrinks_on_congestion(self) -> None:
+        """Assert that a congested response halves the window."""
+        limiter = AdaptiveConcurrencyLimiter(initial_window=16)
+        async with limiter.slot() as slot:
+            slot.mark_congested()
+        self.assertEqual(limiter.window, 8)
+
+    async def test_timeouts_count_as_congestion(self) -> None:
+        """Assert that a request that times out shrinks the window."""
+        limiter = AdaptiveConcurrencyLimiter(initial_window=16)
+        with self.assertRaises(asyncio.TimeoutError):
+            async with limiter.slot():
+                raise asyncio.TimeoutError
+        self.assertEqual(limiter.window, 8)
+
+    async def test_burst_of_failures_only_shrinks_once(self) -> None:
+        """Assert that requests sent under the same window failing together only shrink the window once."""
+        limiter = AdaptiveConcurrencyLimiter(initial_window=16)
+
+        async def congested_request():
+            async with limiter.slot() as slot:
+                await asyncio.sleep(0.01)
+                slot.mark_congested()
+
+        await asyncio.gather(*[congested_request() for _ in range(8)])
+        self.assertEqual(limiter.window, 8)
+        self.assertEqual(limiter.failures, 8)
+
+    async def test_slot_without_limiter_does_nothing(self) -> None:
+        """Assert that a slot can be used without a limiter."""
+        async with LimiterSlot(None) as slot:
+            slot.mark_congested()
@@ -0,0 +1,73 @@
+from unittest import TestCase
+
+from helpers.data import ReleaseRegistry, Track
+
+
+def make_recording_data(mb_id: str, release_id: str = "release", release_name: str = "Album") -> dict:
+    return {
+        "id": mb_id,
+        "title": f"Song {mb_id}",
+        "artist-credit": [{"artist": {"id": "artist"}}],
+        "releases": [{"id": release_id, "title": release_name, "date": "2000", "release-group": {"primary-type": "Album"}}],
+    }
+
+
+class TestReleaseRegistry(TestCase):
+    def setUp(self) -> None:
+        self.releases = ReleaseRegistry()
+
+    def test_tracks_on_the_same_release_share_it(self) -> None:
+        """Assert that tracks with the same release MBID are added to one Release object, in order."""
+        first = Track(make_recording_data("1"), self.releases)
+        second = Track(make_recording_data("2"), self.releases)
+        other = Track(make_recording_data("3", release_id="other", release_name="Other"), self.releases)
+
+        self.assertIs(first.release, second.release)
+        self.assertEqual(list(first.release.tracks), [first, second])
+        self.assertEqual(len(self.releases), 2)
+        self.assertIs(self.releases.get("other"), other.release)
+
+    def test_releases_are_removed_with_their_last_track(self) -> None:
+        """Assert that a release is only removed from the registry once all of its tracks are removed."""
+        first = Track(make_recording_data("1"), self.releases)
+        second = Track(make_recording_data("2"), self.releases)
+
+        self.releases.remove_track(first)
+        self.assertEqual(list(second.release.tracks), [second])
+        self.assertIn(second.release, self.releases)
+
+        self.releases.remove_track(second)
+        self.assertNotIn(second.release, self.releases)
+        self.assertEqual(len(self.releases), 0)
+
+    def test_same_recording_twice_on_a_release(self) -> None:
+        """Assert that a recording appearing twice on a release is kept twice, and removing one keeps the other."""
+        first = Track(make_recording_data("1"), self.releases)
+        second = Track(make_recording_data("1"), self.releases)
+        self.assertEqual(list(first.release.tracks), [first, second])
+        self.releases.remove_track(first)
+        self.assertEqual(list(second.release.tracks), [second])
+        self.assertIn(second.release, self.releases)
+
+    def test_registries_are_independent(self) -> None:
+        """Assert that tracks added to different registries don't share releases, so analyses can run side by side."""
+        first = Track(make_recording_data("1"), self.releases)
+        second = Track(make_recording_data("1"), ReleaseRegistry())
+        self.assertIsNot(first.release, second.release)
+        self.assertEqual(list(second.release.tracks), [second])
+
+
+class TestTrack(TestCase):
+    def test_tracks_are_equal_by_identity(self) -> None:
+        """Assert that two tracks for the same recording are still different tracks."""
+        first = Track(make_recording_data("1"))
+        same_recording = Track(make_recording_data("1", release_id="other"))
+        self.assertNotEqual(first, same_recording)
+        self.assertEqual(len({first, same_recording, first}), 2)
+
+    def test_repeated_strings_are_shared(self) -> None:
+        """Assert that release details repeated across tracks are stored once."""
+        first = Track(make_recording_data("1", release_id="a", release_name="".join(["Al", "bum"])))
+        second = Track(make_recording_data("2", release_id="b", release_name="".join(["Al", "bum"])))
+        self.assertIs(first.release.name, second.release.name)
+        self.assertFalse(hasattr(first, "__dict__"))
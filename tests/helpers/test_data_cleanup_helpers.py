@@ -0,0 +1,299 @@
+import contextlib
+import io
+import random
+import tempfile
+from unittest import TestCase
+
+import flags
+from helpers.cache import close_response_cache
+from helpers.calculation_helpers import calculate_coverage
+from helpers.data import Artist, Track, ReleaseRegistry
+from helpers.data_cleanup_helpers import (
+    IncrementalDuplicateFilter,
+    KnownDuplicateLyricsFilter,
+    TitleIndex,
+    normalise_name,
+    normalise_title,
+    remove_duplicate_recordings,
+    remove_duplicate_lyrics,
+    remove_near_duplicate_recordings,
+    skip_known_duplicate_lyrics,
+    title_sequence_numbers,
+)
+from helpers.track_table import TrackTable
+from .factories import ARTIST_ID, make_track
+from .legacy_duplicate_removal import legacy_remove_duplicate_recordings
+
+
+class TestIncrementalDuplicateFilter(TestCase):
+    def setUp(self) -> None:
+        self.artist = Artist("", "Nine Inch Nails", ARTIST_ID, "")
+        self.duplicate_filter = IncrementalDuplicateFilter(self.artist)
+
+    def test_original_tracks_are_accepted_straight_away(self) -> None:
+        """Assert that tracks that aren't a version of another song are passed on as soon as they are added."""
+        tracks = [make_track("1", "Closer"), make_track("2", "Hurt")]
+        self.assertEqual(self.duplicate_filter.add(tracks), tracks)
+
+    def test_non_artist_tracks_are_removed(self) -> None:
+        """Assert that tracks credited to a different artist are removed."""
+        self.assertEqual(self.duplicate_filter.add([make_track("1", "Closer", artist_id="other")]), [])
+        self.assertEqual(self.duplicate_filter.removed, 1)
+
+    def test_re_released_tracks_are_removed(self) -> None:
+        """Assert that only the first track with a given name is kept."""
+        first_page = self.duplicate_filter.add([make_track("1", "Closer")])
+        second_page = self.duplicate_filter.add([make_track("2", "Closer", release_name="Closer to God")])
+        self.assertEqual([track.mb_id for track in first_page + second_page], ["1"])
+
+    def test_variants_are_held_until_flush(self) -> None:
+        """Assert that a live version is removed when its original arrives on a later page."""
+        self.assertEqual(self.duplicate_filter.add([make_track("1", "Closer (live)")]), [])
+        self.duplicate_filter.add([make_track("2", "Closer")])
+        self.assertEqual(self.duplicate_filter.flush(), [])
+        self.assertEqual(self.duplicate_filter.removed, 1)
+
+    def test_removed_tracks_are_removed_from_their_release(self) -> None:
+        """Assert that removing the only track on a release removes the release from the artist's releases."""
+        track = make_track("1", "Closer", artist_id="other", releases=self.artist.releases)
+        self.assertIn(track.release, self.artist.releases)
+        self.duplicate_filter.add([track])
+        self.assertNotIn(track.release, self.artist.releases)
+
+    def test_variants_without_an_original_are_kept(self) -> None:
+        """Assert that a variant is kept if the original song isn't in the data."""
+        variant = make_track("1", "Closer (live)")
+        self.duplicate_filter.add([variant, make_track("2", "Hurt")])
+        self.assertEqual(self.duplicate_filter.flush(), [variant])
+
+
+def make_golden_recordings(releases: ReleaseRegistry) -> [Track]:
+    return [
+        make_track("1", "Closer", releases=releases),
+        make_track("2", "Closer", release_name="Closer", releases=releases),
+        make_track("3", "Closer (live)", release_name="And All That Could Have Been", releases=releases),
+        make_track("4", "Closer to God", release_name="Closer to God", releases=releases),
+        make_track("5", "Hurt", artist_id="other", releases=releases),
+        make_track("6", "Hurt (demo)", release_name="Demos", releases=releases),
+        make_track("7", "Hurt", releases=releases),
+        make_track("8", "Alive", releases=releases),
+        make_track("9", "Mixed Up", release_name="Remix", releases=releases),
+        make_track("1", "Closer", release_name="Closer", releases=releases),
+        make_track("10", "The Perfect Drug", release_name="Lost Highway", releases=releases),
+        make_track("11", "Perfect", release_name="Deluxe Edition", releases=releases),
+    ]
+
+
+class TestRemoveDuplicateRecordings(TestCase):
+    def setUp(self) -> None:
+        self.artist = Artist("", "Nine Inch Nails", ARTIST_ID, "")
+        self.is_verbose = flags.IS_VERBOSE
+
+    def tearDown(self) -> None:
+        flags.IS_VERBOSE = self.is_verbose
+
+    def remove_duplicates(self, remove, recordings: [Track], artist: Artist) -> [Track]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return remove(recordings, artist)
+
+    def test_golden_decisions(self) -> None:
+        """Assert that the recordings removed from a fixed discography are the ones the original loop removed."""
+        flags.IS_VERBOSE = False
+        kept = self.remove_duplicates(remove_duplicate_recordings, make_golden_recordings(self.artist.releases),
+                                      self.artist)
+        self.assertEqual([track.mb_id for track in kept], ["1", "2", "4", "5", "7", "8", "9", "1", "10", "11"])
+        self.assertNotIn("release-Demos", [release.mb_id for release in self.artist.releases])
+
+    def test_golden_decisions_verbose(self) -> None:
+        """Assert that verbose mode also removes other artists' tracks and exact re-releases, which removes every
+        copy of a song since each copy is a re-release of the others."""
+        flags.IS_VERBOSE = True
+        kept = self.remove_duplicates(remove_duplicate_recordings, make_golden_recordings(self.artist.releases),
+                                      self.artist)
+        self.assertEqual([track.mb_id for track in kept], ["4", "7", "8", "9", "10", "11"])
+
+    def test_decisions_match_the_original_loop(self) -> None:
+        """Assert that seeded random discographies, with repeated recordings and names inside other names, have the
+        same recordings removed from the list and from their releases as the original loop."""
+        names = ["", "A", "Ab", "Abc", "Ab (live)", "b (demo)", "Abc remix", "xAbx", "Ab version 2", "Live"]
+        release_names = ["Album", "Live", "Ab", "Mix Tape"]
+        # A fixed set of seeds, enough to cover repeated recordings being matched in both modes
+        for seed in range(40):
+            flags.IS_VERBOSE = seed % 2 == 0
+            results = []
+            for remove in (legacy_remove_duplicate_recordings, remove_duplicate_recordings):
+                rng = random.Random(seed)
+                artist = Artist("", "Nine Inch Nails", ARTIST_ID, "")
+                recordings = [
+                    make_track(str(rng.randrange(12)), rng.choice(names), rng.choice(release_names),
+                               ARTIST_ID if rng.random() > 0.2 else "other", artist.releases)
+                    for _ in range(rng.randint(0, 25))
+                ]
+                kept = self.remove_duplicates(remove, recordings, artist)
+                results.append((
+                    # Repeated recordings of an MBID are equal, so compare which objects were kept by identity
+                    [[index for index, recording in enumerate(recordings) if recording is track] for track in kept],
+                    [(release.mb_id, [track.mb_id for track in release.tracks]) for release in artist.releases],
+                ))
+            legacy_result, result = results
+            self.assertEqual(result[0], legacy_result[0], f"seed {seed}")
+            self.assertEqual(result[1], legacy_result[1], f"seed {seed}")
+
+
+class TestTitleIndex(TestCase):
+    def test_titles_in(self) -> None:
+        """Assert that titles are found anywhere in the text, including short and overlapping titles."""
+        index = TitleIndex(["", "I", "Closer", "Close", "lose", "Hurt"])
+        self.assertEqual(index.titles_in("Closer (live)"), {"", "Closer", "Close", "lose"})
+        self.assertEqual(index.titles_in("I Do Not Want This"), {"", "I"})
+        self.assertEqual(index.titles_in("Clo"), {""})
+
+
+class TestRemoveNearDuplicateRecordings(TestCase):
+    def setUp(self) -> None:
+        self.artist = Artist("", "Nine Inch Nails", ARTIST_ID, "")
+
+    def remove_near_duplicates(self, recordings: [Track]) -> [str]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return [track.mb_id for track in remove_near_duplicate_recordings(recordings, self.artist)]
+
+    def test_normalise_name(self) -> None:
+        """Assert that names differing only in case, accents and punctuation are normalised to the same name."""
+        self.assertEqual(normalise_name("Beyoncé"), normalise_name("beyonce"))
+        self.assertEqual(normalise_name("Don't Stop Me Now"), "dont stop me now")
+        self.assertEqual(normalise_name("AC/DC"), normalise_name("ac dc"))
+        self.assertEqual(normalise_name("  Hurt   (Quiet) "), "hurt quiet")
+
+    def test_normalise_title(self) -> None:
+        """Assert that the parts of a title marking an edition are removed, but other parts are kept."""
+        self.assertEqual(normalise_title("Song - 2011 Remaster"), "song")
+        self.assertEqual(normalise_title("Song (Radio Edit)"), "song")
+        self.assertEqual(normalise_title("Song [feat. X]"), "song")
+        self.assertEqual(normalise_title("Song ft. X & Y"), "song")
+        self.assertEqual(normalise_title("Beyoncé's Song"), "beyonces song")
+        self.assertEqual(normalise_title("Song (Part 2)"), "song part 2")
+        self.assertEqual(normalise_title("The Feat of Strength"), "the feat of strength")
+        self.assertEqual(normalise_title("(Live)"), "live")
+
+    def test_editions_are_merged_into_the_earliest_album_track(self) -> None:
+        """Assert that every edition of a song is merged into the album track, even when a single came out first."""
+        kept = self.remove_near_duplicates([
+            make_track("1", "Song (Radio Edit)", "Song", release_type="Single", date="1993"),
+            make_track("2", "Song - 2011 Remaster", "Remasters", date="2011-05-01"),
+            make_track("3", "Song", "Debut", date="1994-03-08", releases=self.artist.releases),
+            make_track("4", "Song [feat. X]", "Collaborations", release_type="EP", date="1990"),
+            make_track("5", "Other Song", "Debut", date="1994-03-08"),
+        ])
+        self.assertEqual(kept, ["3", "5"])
+
+    def test_removed_tracks_are_removed_from_their_release(self) -> None:
+        """Assert that a release left without any tracks once its near duplicates are removed is removed too."""
+        self.remove_near_duplicates([
+            make_track("1", "Song", "Debut", releases=self.artist.releases),
+            make_track("2", "Song (Mono)", "Mono Mixes", date="2001", releases=self.artist.releases),
+        ])
+        self.assertEqual([release.name for release in self.artist.releases], ["Debut"])
+
+    def test_undated_tracks_are_not_preferred(self) -> None:
+        """Assert that a dated edition of a song is kept over one without a release date."""
+        kept = self.remove_near_duplicates([
+            make_track("1", "Song", "Unknown", date=None),
+            make_track("2", "Song (Remastered)", "Remasters", date="2011"),
+        ])
+        self.assertEqual(kept, ["2"])
+
+    def test_different_songs_are_kept(self) -> None:
+        """Assert that songs with short titles that only share a word or two aren't merged."""
+        kept = self.remove_near_duplicates([
+            make_track("1", "Part 1"), make_track("2", "Part 2"), make_track("3", "Closer"),
+            make_track("4", "Closer to God"),
+        ])
+        self.assertEqual(kept, ["1", "2", "3", "4"])
+
+    def test_numbered_parts_with_a_long_shared_title_are_kept(self) -> None:
+        """Assert that the parts of a song aren't merged even though most of their title is the same, while the
+        editions of each part still are."""
+        kept = self.remove_near_duplicates([
+            make_track("1", "Another Brick in the Wall, Part 1"),
+            make_track("2", "Another Brick in the Wall (Part 2)"),
+            make_track("3", "Another Brick in the Wall, Part 3"),
+            make_track("4", "Another Brick in the Wall, Part 2 - 2011 Remaster", date="2011"),
+            make_track("5", "Symphony IV"),
+            make_track("6", "Symphony V"),
+        ])
+        self.assertEqual(kept, ["1", "2", "3", "5", "6"])
+
+    def test_title_sequence_numbers(self) -> None:
+        """Assert that only the numbers and roman numerals at the end of a title are returned."""
+        self.assertEqual(title_sequence_numbers("another brick in the wall part 2"), ("2",))
+        self.assertEqual(title_sequence_numbers("symphony iv"), ("iv",))
+        self.assertEqual(title_sequence_numbers("who am i"), ("i",))
+        self.assertEqual(title_sequence_numbers("chapter 3 2"), ("3", "2"))
+        self.assertEqual(title_sequence_numbers("99 problems"), ())
+        self.assertEqual(title_sequence_numbers("1979"), ())
+        self.assertEqual(title_sequence_numbers("the mix"), ())
+
+
+class TestDuplicateLyrics(TestCase):
+    def setUp(self) -> None:
+        self.artist = Artist("", "Nine Inch Nails", ARTIST_ID, "")
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.use_cache, self.cache_dir_flag = flags.USE_CACHE, flags.CACHE_DIR
+        flags.USE_CACHE, flags.CACHE_DIR = True, self.cache_dir.name
+
+    def tearDown(self) -> None:
+        close_response_cache()
+        flags.USE_CACHE, flags.CACHE_DIR = self.use_cache, self.cache_dir_flag
+        self.cache_dir.cleanup()
+
+    def make_tracks(self) -> [Track]:
+        tracks = [
+            make_track("1", "Hurt (Single Version)", "Hurt", release_type="Single", date="1995"),
+            make_track("2", "Hurt", "The Downward Spiral", date="1994-03-08"),
+            make_track("3", "Closer", "The Downward Spiral", date="1994-03-08"),
+        ]
+        tracks[0].lyrics = "I hurt myself today\r\nTo see if I still feel"
+        tracks[1].lyrics = "I hurt myself today\nto see if I still feel!"
+        tracks[2].lyrics = "You let me violate you\r\nYou let me desecrate you"
+        return tracks
+
+    def test_duplicate_lyrics_are_merged_into_the_album_track(self) -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            kept = remove_duplicate_lyrics(self.make_tracks(), self.artist)
+        self.assertEqual([track.mb_id for track in kept], ["2", "3"])
+        self.assertEqual(self.artist.lyrics_merged, 1)
+
+    def test_known_duplicates_are_skipped_next_run(self) -> None:
+        """Assert that a duplicate found by one run isn't requested by the next, as long as its original is kept."""
+        with contextlib.redirect_stdout(io.StringIO()):
+            remove_duplicate_lyrics(self.make_tracks(), self.artist)
+            tracks = self.make_tracks()
+            self.assertEqual([track.mb_id for track in skip_known_duplicate_lyrics(tracks, self.artist)], ["2", "3"])
+            self.assertEqual([track.mb_id for track in skip_known_duplicate_lyrics(tracks[:1], self.artist)], ["1"])
+
+    def test_known_duplicates_are_skipped_a_page_at_a_time(self) -> None:
+        """Assert that streamed duplicates are only skipped once the track they were merged into has been kept."""
+        with contextlib.redirect_stdout(io.StringIO()):
+            remove_duplicate_lyrics(self.make_tracks(), self.artist)
+            single, album_track, other_track = self.make_tracks()
+
+            known_duplicates = KnownDuplicateLyricsFilter(self.artist)
+            self.assertEqual(known_duplicates.add([single]), [single])
+            self.assertEqual(known_duplicates.add([album_track, other_track]), [album_track, other_track])
+            self.assertEqual(known_duplicates.add(self.make_tracks()[:1]), [])
+        self.assertEqual(known_duplicates.skipped, 1)
+
+    def test_known_duplicates_keep_the_same_coverage(self) -> None:
+        """Assert that a run skipping the duplicates found by an earlier run reports the same coverage as that run."""
+        coverages = []
+        for _ in range(2):
+            artist = Artist("", "Nine Inch Nails", ARTIST_ID, "")
+            with contextlib.redirect_stdout(io.StringIO()):
+                tracks = skip_known_duplicate_lyrics(self.make_tracks(), artist)
+                # The same as `get_song_lyrics` counts the tracks it requests lyrics for
+                artist.lyrics_attempted += len(tracks)
+                tracks = remove_duplicate_lyrics(tracks, artist)
+            coverages.append(calculate_coverage(TrackTable(tracks), artist))
+        cold_coverage, warm_coverage = coverages
+        self.assertEqual(cold_coverage["lyrics_attempted"], 3)
+        self.assertEqual(warm_coverage, cold_coverage)
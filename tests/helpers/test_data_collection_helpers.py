@@ -3,10 +3,19 @@ import asynctest
 from asynctest import CoroutineMock, patch
 import musicbrainzngs
 
+import flags
 import helpers.data
 import helpers.output_helpers as oh
+from helpers.metrics import get_metrics, reset_metrics
 from helpers.data import Artist, Track
-from helpers.data_collection_helpers import get_artist_data, get_recordings_data
+from helpers.data_collection_helpers import (
+    get_artist_data,
+    get_recordings_data,
+    make_recordings_request,
+    select_canonical_releases,
+    build_release_tracks_data,
+    trim_recording_data,
+)
 
 
 class TestGetArtistData(asynctest.TestCase):
@@ -114,7 +123,6 @@ class TestGetSongData(asynctest.TestCase):
         self.assertEqual(song_data, (None, oh.fail("No songs found!")))
 
     # Collect all tracks by Artist in batches of 100 per request
-    @patch('helpers.data_collection_helpers.track_count', 30)
     @patch('helpers.api_parser.build_recordings_query_url')
     @patch('aiohttp.ClientSession.get')
     async def test_artists_with_less_than_100_songs_only_make_1_request(
@@ -126,18 +134,20 @@ class TestGetSongData(asynctest.TestCase):
         only one request is made."""
         # We need to change the return value attributes within the __aenter__ method here because
         # within the function we're testing the ClientSession object is used with a context manager.
-        mock_get.return_value.__aenter__.return_value.json = CoroutineMock()
-        # Set the session to return a similar dict to the reponses we expect, with a low count so only one
+        # Set the session to return a similar response to the ones we expect, with a low count so only one
         # request will be made.
-        mock_get.return_value.__aenter__.return_value.json.return_value = {"count": 30, "recordings": {}}
+        mock_get.return_value.__aenter__.return_value.read = CoroutineMock(
+            return_value=b'{"count": 30, "recordings": []}'
+        )
+        mock_get.return_value.__aenter__.return_value.status = 200
         mock_build_url.return_value = ""
 
         artist, _error = get_artist_data("Archspire")
+        reset_metrics()
         _recording_data, _error = await get_recordings_data(self.session, artist)
 
-        self.assertEqual(helpers.data_collection_helpers.request_counter, 1)
+        self.assertEqual(get_metrics().request_count(), 1)
 
-    @patch('helpers.data_collection_helpers.track_count', 30)
     @patch('helpers.api_parser.build_recordings_query_url')
     @patch('aiohttp.ClientSession.get')
     async def test_large_track_lists_make_the_expected_number_of_requests(
@@ -150,27 +160,134 @@ class TestGetSongData(asynctest.TestCase):
         the total number of tracks / 100."""
         # We need to change the return value attributes within the __aenter__ method here because
         # within the function we're testing the ClientSession object is used with a context manager.
-        mock_get.return_value.__aenter__.return_value.json = CoroutineMock()
-        # Set the session to return a similar dict to the reponses we expect, with a low count so only one
+        # Set the session to return a similar response to the ones we expect, with a low count so only one
         # request will be made.
-        mock_get.return_value.__aenter__.return_value.json.return_value = {"count": 350, "recordings": {}}
+        mock_get.return_value.__aenter__.return_value.read = CoroutineMock(
+            return_value=b'{"count": 350, "recordings": []}'
+        )
+        mock_get.return_value.__aenter__.return_value.status = 200
         mock_build_url.return_value = ""
 
         artist, _error = get_artist_data("Archspire")
+        reset_metrics()
         _recording_data, _error = await get_recordings_data(self.session, artist)
 
-        self.assertEqual(helpers.data_collection_helpers.request_counter, 4)
+        self.assertEqual(get_metrics().request_count(), 4)
 
     async def test_all_tracks_retrieved(self) -> None:
         """Assert the number of Track objects instantiated for the Artist is equal to
         the track count given in the data."""
         artist, _error = get_artist_data("Beck")
+        reset_metrics()
         recording_data, _error = await get_recordings_data(self.session, artist)
         self.assertEqual(
-            helpers.data_collection_helpers.track_count,
+            get_metrics().recordings_expected,
             len(recording_data)
         )
 
     async def tearDown(self) -> None:
         # Close the session once we're done testing to prevent a memory leak
         await self.session.close()
+
+
+class TestReleaseGroupCollection(asynctest.TestCase):
+
+    def test_earliest_release_is_chosen_for_each_group(self) -> None:
+        """Assert that only the earliest dated release in each release group is kept, and undated releases
+        are only chosen if there is no dated release in the group."""
+        releases = [
+            {"id": "reissue", "date": "2005-01-01", "release-group": {"id": "downward-spiral"}},
+            {"id": "original", "date": "1994-03-08", "release-group": {"id": "downward-spiral"}},
+            {"id": "undated", "date": "", "release-group": {"id": "downward-spiral"}},
+            {"id": "only-undated", "release-group": {"id": "broken"}},
+        ]
+        canonical = select_canonical_releases(releases)
+        self.assertEqual([release.get("id") for release in canonical], ["original", "only-undated"])
+
+    def test_secondary_release_groups_are_skipped(self) -> None:
+        """Assert that live albums, compilations, etc. are not chosen."""
+        releases = [{"id": "live", "date": "1994", "release-group": {"id": "and-all-that", "secondary-types": ["Live"]}}]
+        self.assertEqual(select_canonical_releases(releases), [])
+
+    def test_release_tracks_match_the_recordings_search_format(self) -> None:
+        """Assert that tracks built from a release lookup can be used to build Track objects."""
+        release_data = {
+            "id": "original",
+            "title": "The Downward Spiral",
+            "date": "1994-03-08",
+            "release-group": {"id": "downward-spiral", "primary-type": "Album"},
+            "artist-credit": [{"artist": {"id": "b7ffd2af-418f-4be2-bdd1-22f8b48613da"}}],
+            "media": [{"tracks": [{"title": "Hurt", "recording": {"id": "hurt", "title": "Hurt"}}]}],
+        }
+        tracks = [Track(raw_data=track_data) for track_data in build_release_tracks_data(release_data)]
+        self.assertEqual(len(tracks), 1)
+        self.assertEqual(tracks[0].name, "Hurt")
+        self.assertEqual(tracks[0].release.name, "The Downward Spiral")
+        self.assertEqual(tracks[0].release.release_type, "Album")
+        self.assertEqual(tracks[0].artist_id, "b7ffd2af-418f-4be2-bdd1-22f8b48613da")
+
+
+class TestRecordingTrimming(asynctest.TestCase):
+
+    def test_trimmed_recordings_keep_the_fields_we_use(self) -> None:
+        """Assert that trimming a recording drops the fields we don't use but still builds the same Track."""
+        recording_data = {
+            "id": "hurt",
+            "title": "Hurt",
+            "length": 373000,
+            "artist-credit": [
+                {"name": "Nine Inch Nails", "artist": {"id": "b7ffd2af-418f-4be2-bdd1-22f8b48613da", "name": "Nine Inch Nails"}},
+            ],
+            "releases": [
+                {
+                    "id": "original",
+                    "title": "The Downward Spiral",
+                    "date": "1994-03-08",
+                    "country": "US",
+                    "release-group": {"id": "downward-spiral", "primary-type": "Album"},
+                },
+                {"id": "reissue", "title": "The Downward Spiral", "release-group": {"primary-type": "Album"}},
+            ],
+        }
+        trimmed_data = trim_recording_data(recording_data)
+        self.assertEqual(trimmed_data, {
+            "id": "hurt",
+            "title": "Hurt",
+            "artist-credit": [{"artist": {"id": "b7ffd2af-418f-4be2-bdd1-22f8b48613da"}}],
+            "releases": [{
+                "id": "original",
+                "title": "The Downward Spiral",
+                "date": "1994-03-08",
+                "release-group": {"primary-type": "Album"},
+            }],
+        })
+        track = Track(raw_data=trimmed_data)
+        self.assertEqual(track.name, "Hurt")
+        self.assertEqual(str(track.release), "The Downward Spiral - Album (1994-03-08)")
+
+    @patch('helpers.data_collection_helpers.get_response_cache')
+    @patch('helpers.data_collection_helpers.make_musicbrainz_request', new_callable=CoroutineMock)
+    async def test_only_trimmed_pages_are_cached(self, mock_request, mock_get_response_cache) -> None:
+        """Assert that a page of recordings is cached trimmed, and pages that are missing or kept in full aren't."""
+        cache = mock_get_response_cache.return_value
+        cache.get.return_value = (False, None)
+        url = "https://musicbrainz.org/ws/2/recording/?query=arid:1"
+
+        mock_request.return_value = {"recordings": [{"id": "hurt", "title": "Hurt", "length": 373000}]}
+        page = await make_recordings_request(None, url)
+        self.assertEqual(page["recordings"], [{"id": "hurt", "title": "Hurt", "artist-credit": [], "releases": []}])
+        cache.set.assert_called_once_with("recordings", url, page)
+
+        cache.set.reset_mock()
+        mock_request.return_value = None
+        self.assertIsNone(await make_recordings_request(None, url))
+        cache.set.assert_not_called()
+
+        mock_request.return_value = {"recordings": [{"id": "hurt", "title": "Hurt", "length": 373000}]}
+        keep_raw_data, flags.KEEP_RAW_DATA = flags.KEEP_RAW_DATA, True
+        try:
+            page = await make_recordings_request(None, url)
+        finally:
+            flags.KEEP_RAW_DATA = keep_raw_data
+        self.assertEqual(page["recordings"][0]["length"], 373000)
+        cache.set.assert_not_called()
@@ -0,0 +1,81 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from helpers.data import Artist
+from helpers.deadline import Deadline, DeadlineExceeded
+from helpers.data_collection_helpers import get_song_lyrics
+from helpers.calculation_helpers import calculate_coverage
+from helpers.track_table import TrackTable
+from .factories import make_track
+
+
+class TestDeadline(IsolatedAsyncioTestCase):
+    async def test_no_deadline_never_expires(self) -> None:
+        """Assert that a deadline without a time limit has no remaining time and never expires."""
+        deadline = Deadline()
+        self.assertIsNone(deadline.remaining())
+        self.assertFalse(deadline.expired)
+        self.assertEqual(await deadline.wait_for(asyncio.sleep(0, result=1)), 1)
+
+    async def test_slow_steps_are_cancelled(self) -> None:
+        """Assert that waiting on something that outlasts the deadline cancels it and raises DeadlineExceeded."""
+        deadline = Deadline(0.01)
+        with self.assertRaises(DeadlineExceeded):
+            await deadline.wait_for(asyncio.sleep(10))
+        self.assertTrue(deadline.expired)
+        self.assertEqual(deadline.remaining(), 0)
+
+    async def test_request_timeouts_are_not_mistaken_for_the_deadline(self) -> None:
+        """Assert that a timeout raised by the awaited step is passed on while there is still time left."""
+        async def timed_out_request():
+            raise asyncio.TimeoutError
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await Deadline(10).wait_for(timed_out_request())
+
+    async def test_lyrics_found_before_the_deadline_are_kept(self) -> None:
+        """Assert that lyrics requests still outstanding at the deadline are cancelled, and the lyrics found
+        before it are returned along with how many tracks were attempted."""
+        async def make_lyrics_request(session, artist, track, limiter):
+            if track.mb_id == "slow":
+                await asyncio.sleep(10)
+            track.lyrics = "some words"
+            return track
+
+        artist = Artist("", "Artist", "artist", "")
+        tracks = [make_track("1"), make_track("slow"), make_track("2")]
+        with patch("helpers.data_collection_helpers.make_lyrics_request", make_lyrics_request):
+            recordings_with_lyrics, err = await get_song_lyrics(None, tracks, artist, deadline=Deadline(0.05))
+
+        self.assertIsNone(err)
+        self.assertEqual([track.mb_id for track in recordings_with_lyrics], ["1", "2"])
+        self.assertEqual(calculate_coverage(TrackTable(recordings_with_lyrics), artist), {
+            "lyrics_found": 2,
+            "lyrics_attempted": 3,
+            "coverage": 2 / 3,
+            "partial": True,
+            "lyrics_merged": 0,
+        })
+
+    async def test_failed_request_waits_for_the_rest_to_be_cancelled(self) -> None:
+        """Assert that when a lyrics request raises, the outstanding requests have finished cancelling before the
+        exception is passed on."""
+        cleaned_up = []
+
+        async def make_lyrics_request(session, artist, track, limiter):
+            if track.mb_id == "broken":
+                raise ValueError
+            try:
+                await asyncio.sleep(10)
+            finally:
+                # Releasing a request's connection and limiter slot takes an await
+                await asyncio.sleep(0)
+                cleaned_up.append(track.mb_id)
+
+        artist = Artist("", "Artist", "artist", "")
+        tracks = [make_track("1"), make_track("broken"), make_track("2")]
+        with patch("helpers.data_collection_helpers.make_lyrics_request", make_lyrics_request):
+            with self.assertRaises(ValueError):
+                await get_song_lyrics(None, tracks, artist)
+        self.assertEqual(cleaned_up, ["1", "2"])
@@ -0,0 +1,114 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from helpers.concurrency import AdaptiveConcurrencyLimiter, LimiterSlot
+from helpers.hedging import RequestHedger
+from helpers.metrics import get_metrics, reset_metrics
+
+
+class TestRequestHedger(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        reset_metrics()
+
+    async def test_fast_requests_are_not_hedged(self) -> None:
+        """Assert that a request finishing before the hedge delay is only made once."""
+        hedger = RequestHedger("lyrics", initial_delay=1)
+        calls = 0
+
+        async def request(on_sent):
+            on_sent()
+            nonlocal calls
+            calls += 1
+            return "lyrics"
+
+        self.assertEqual(await hedger.request(request), "lyrics")
+        self.assertEqual(calls, 1)
+        self.assertEqual(get_metrics().endpoint("lyrics").hedges, 0)
+
+    async def test_slow_request_is_hedged_and_the_loser_cancelled(self) -> None:
+        """Assert that a hedge is sent for a slow request, its result is used if it finishes first,
+        and the original request is cancelled."""
+        hedger = RequestHedger("lyrics", initial_delay=0.01)
+        delays = [10, 0]
+        cancelled = []
+
+        async def request(on_sent):
+            on_sent()
+            delay = delays.pop(0)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return delay
+
+        self.assertEqual(await hedger.request(request), 0)
+        self.assertEqual(cancelled, [10])
+        lyrics_metrics = get_metrics().endpoint("lyrics")
+        self.assertEqual((lyrics_metrics.hedges, lyrics_metrics.hedge_wins), (1, 1))
+        self.assertEqual(lyrics_metrics.hedge_win_rate, 1)
+        self.assertEqual(hedger.hedges_in_flight, 0)
+        # Both the winning hedge and the slow request it replaced are counted towards the delay
+        self.assertEqual(len(hedger._latencies), 2)
+
+    async def test_failed_copy_waits_for_the_other(self) -> None:
+        """Assert that if the first copy to finish fails, the result of the other copy is used instead."""
+        hedger = RequestHedger("lyrics", initial_delay=0.01)
+        attempts = []
+
+        async def request(on_sent):
+            on_sent()
+            attempts.append(len(attempts))
+            if len(attempts) == 1:
+                await asyncio.sleep(0.05)
+                return "original"
+            raise asyncio.TimeoutError
+
+        self.assertEqual(await hedger.request(request), "original")
+        self.assertEqual(get_metrics().endpoint("lyrics").hedge_wins, 0)
+
+    async def test_hedges_in_flight_are_capped(self) -> None:
+        """Assert that no more than `max_hedges_in_flight` hedges are sent at once."""
+        hedger = RequestHedger("lyrics", initial_delay=0.01, max_hedges_in_flight=2)
+        max_hedges_in_flight = 0
+
+        async def request(on_sent):
+            on_sent()
+            nonlocal max_hedges_in_flight
+            max_hedges_in_flight = max(max_hedges_in_flight, hedger.hedges_in_flight)
+            await asyncio.sleep(0.05)
+
+        await asyncio.gather(*[hedger.request(request) for _ in range(10)])
+        self.assertEqual(max_hedges_in_flight, 2)
+        self.assertEqual(get_metrics().endpoint("lyrics").hedges, 2)
+
+    async def test_time_queueing_for_a_slot_is_not_hedged(self) -> None:
+        """Assert that a request that's only slow because it waited for a limiter slot isn't hedged,
+        and the request that's slow once it's been sent is."""
+        hedger = RequestHedger("lyrics", initial_delay=0.3)
+        limiter = AdaptiveConcurrencyLimiter(initial_window=2, max_window=2)
+        durations = {"first": [0.2], "second": [0.2], "queued": [0.2], "slow": [5, 0]}
+        sent = []
+
+        async def request(name, on_sent):
+            async with LimiterSlot(limiter):
+                on_sent()
+                sent.append(name)
+                await asyncio.sleep(durations[name].pop(0))
+            return name
+
+        results = await asyncio.gather(*[
+            hedger.request(lambda on_sent, name=name: request(name, on_sent)) for name in durations
+        ])
+        self.assertEqual(results, list(durations))
+        self.assertEqual([name for name in durations if sent.count(name) > 1], ["slow"])
+        self.assertEqual(get_metrics().endpoint("lyrics").hedges, 1)
+        # The queued request's latency is from when it was sent, not when it started waiting for a slot
+        self.assertTrue(all(latency < 0.3 for latency in list(hedger._latencies)[:3]))
+
+    async def test_delay_adapts_to_observed_latency(self) -> None:
+        """Assert that once enough latencies have been seen the delay is their percentile."""
+        hedger = RequestHedger("lyrics", initial_delay=5, min_samples=20)
+        self.assertEqual(hedger.delay, 5)
+        hedger._latencies.extend(i / 100 for i in range(1, 101))
+        self.assertEqual(hedger.delay, 0.95)
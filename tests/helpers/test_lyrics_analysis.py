@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from helpers.data import Track
+from helpers.lyrics_analysis import analyse_lyrics
+
+
+class TestAnalyseLyrics(TestCase):
+    def test_metrics(self) -> None:
+        """Assert that the words, unique words and lines are counted, ignoring case and punctuation for uniqueness."""
+        analysis = analyse_lyrics("Hello, hello\nI don't know why you say goodbye\nI say hello!", top_n=2)
+        self.assertEqual(analysis.word_count, 12)
+        self.assertEqual(analysis.unique_word_count, 8)
+        self.assertEqual(analysis.line_count, 3)
+        self.assertEqual(analysis.top_words, [("hello", 3), ("i", 2)])
+
+    def test_whitespace_is_not_counted_as_words(self) -> None:
+        """Assert that repeated spaces, blank lines between verses and \\r\\n line endings don't inflate the counts."""
+        lyrics = "\r\n  First  line \r\n\r\n\r\nSecond line\t here  \r\n"
+        analysis = analyse_lyrics(lyrics)
+        self.assertEqual(analysis.word_count, 5)
+        self.assertEqual(analysis.line_count, 2)
+
+    def test_punctuation_only_tokens(self) -> None:
+        """Assert that a token with no letters still counts as a word, but isn't part of the vocabulary."""
+        analysis = analyse_lyrics("Wait - what?")
+        self.assertEqual(analysis.word_count, 3)
+        self.assertEqual(analysis.unique_word_count, 2)
+        self.assertEqual(analysis.line_count, 1)
+
+    def test_empty_lyrics(self) -> None:
+        analysis = analyse_lyrics(" \n\n ")
+        self.assertEqual((analysis.word_count, analysis.unique_word_count, analysis.line_count), (0, 0, 0))
+        self.assertEqual(analysis.top_words, [])
+
+    def test_top_words_can_be_skipped(self) -> None:
+        """Assert that skipping the top words, which counts the vocabulary without counting each word's uses,
+        gives the same counts as finding them."""
+        self.assertEqual(analyse_lyrics("la la la", top_n=0).top_words, [])
+        lyrics = "Hello, hello\r\n\r\nI don't know why -- you say \u201cgoodbye\u201d\r\n  I say HELLO!\r\n"
+        with_top_words, without_top_words = analyse_lyrics(lyrics), analyse_lyrics(lyrics, top_n=0)
+        for metric in ("word_count", "unique_word_count", "line_count"):
+            self.assertEqual(getattr(without_top_words, metric), getattr(with_top_words, metric), metric)
+        self.assertEqual(without_top_words.unique_word_count, 8)
+
+    def test_track_lyrics_setter(self) -> None:
+        """Assert that setting a Track's lyrics fills in its lyrics metrics."""
+        track = Track({
+            "id": "1",
+            "title": "Song",
+            "artist-credit": [{"artist": {"id": "artist"}}],
+            "releases": [{"id": "release", "title": "Album", "date": "2000", "release-group": {"primary-type": "Album"}}],
+        })
+        track.lyrics = "Na na na\r\n\r\nHey hey\r\nGoodbye"
+        self.assertEqual((track.word_count, track.unique_word_count, track.line_count), (6, 3, 3))
@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import stat
+import tempfile
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import patch
+
+import flags
+from helpers.lyrics_providers import (
+    FallbackLyricsProvider,
+    LocalCorpusProvider,
+    LyricsOvhProvider,
+    LyricsProvider,
+)
+from .factories import make_track
+
+
+class StaticLyricsProvider(LyricsProvider):
+    def __init__(self, name: str, lyrics: dict):
+        """A provider with a fixed dict of song title to lyrics, counting how many times it was asked."""
+        self.name = name
+        self.lyrics = lyrics
+        self.requests = 0
+
+    async def get_lyrics(self, session, artist_name, track, limiter=None) -> str:
+        self.requests += 1
+        return self.lyrics.get(track.name)
+
+
+class TestLocalCorpusProvider(TestCase):
+    def setUp(self) -> None:
+        self.corpus_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.corpus_dir.cleanup()
+
+    def test_directory_corpus(self) -> None:
+        """Assert that lyrics are found in a directory of artist folders containing a text file per song."""
+        artist_dir = os.path.join(self.corpus_dir.name, "Beyoncé")
+        os.mkdir(artist_dir)
+        with open(os.path.join(artist_dir, "Halo.txt"), "w", encoding="utf-8") as lyrics_file:
+            lyrics_file.write("Remember those walls I built")
+
+        provider = LocalCorpusProvider(self.corpus_dir.name)
+        self.assertEqual(provider.lookup("Beyonce", "halo"), "Remember those walls I built")
+        self.assertIsNone(provider.lookup("Beyonce", "Single Ladies"))
+
+    def test_sqlite_corpus(self) -> None:
+        """Assert that lyrics are found in a SQLite corpus, and that the normalised index is stored in it."""
+        corpus_path = os.path.join(self.corpus_dir.name, "lyrics.sqlite3")
+        with sqlite3.connect(corpus_path) as connection:
+            connection.execute("CREATE TABLE lyrics (artist TEXT, title TEXT, lyrics TEXT)")
+            connection.execute("INSERT INTO lyrics VALUES ('Nine Inch Nails', 'Hurt', 'I hurt myself today')")
+        connection.close()
+
+        provider = LocalCorpusProvider(corpus_path)
+        self.assertEqual(provider.lookup("nine inch nails", "HURT"), "I hurt myself today")
+        self.assertIsNone(provider.lookup("Nine Inch Nails", "Closer"))
+        provider.close()
+
+        with sqlite3.connect(corpus_path) as connection:
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM lyrics_index").fetchone()[0], 1)
+        connection.close()
+
+    def test_read_only_sqlite_corpus(self) -> None:
+        """Assert that a read-only SQLite corpus can still be used, with the index kept in memory."""
+        corpus_path = os.path.join(self.corpus_dir.name, "lyrics.sqlite3")
+        with sqlite3.connect(corpus_path) as connection:
+            connection.execute("CREATE TABLE lyrics (artist TEXT, title TEXT, lyrics TEXT)")
+            connection.execute("INSERT INTO lyrics VALUES ('Nine Inch Nails', 'Hurt', 'I hurt myself today')")
+        connection.close()
+        os.chmod(corpus_path, stat.S_IRUSR)
+        if os.access(corpus_path, os.W_OK):
+            self.skipTest("file permissions aren't enforced for this user")
+
+        provider = LocalCorpusProvider(corpus_path)
+        self.assertEqual(provider.lookup("Nine Inch Nails", "Hurt"), "I hurt myself today")
+        provider.close()
+
+
+class TestFallbackLyricsProvider(IsolatedAsyncioTestCase):
+    async def test_providers_are_tried_in_order(self) -> None:
+        """Assert that later providers are only asked for songs the earlier providers don't have lyrics for."""
+        local = StaticLyricsProvider("local", {"Hurt": "I hurt myself today"})
+        remote = StaticLyricsProvider("remote", {"Hurt": "remote lyrics", "Closer": "You let me violate you"})
+        provider = FallbackLyricsProvider([local, remote])
+
+        hurt, closer, wish = make_track("1", "Hurt"), make_track("2", "Closer"), make_track("3", "Wish")
+        self.assertEqual(await provider.get_lyrics(None, "Nine Inch Nails", hurt), "I hurt myself today")
+        self.assertEqual(await provider.get_lyrics(None, "Nine Inch Nails", closer), "You let me violate you")
+        self.assertIsNone(await provider.get_lyrics(None, "Nine Inch Nails", wish))
+
+        self.assertEqual(remote.requests, 2)
+        self.assertEqual(provider.found, {"local": 1, "remote": 1})
+
+    async def test_lyrics_ovh_credit_is_removed(self) -> None:
+        """Assert that the header some of the lyrics API's sources add is removed from the lyrics."""
+        lyrics_data = {"lyrics": "Paroles de la chanson Hurt par Nine Inch Nails\r\nI hurt myself today"}
+        flags.USE_CACHE = False
+        with patch("helpers.lyrics_providers.fetch_lyrics_data", return_value=lyrics_data):
+            lyrics = await LyricsOvhProvider().get_lyrics(None, "Nine Inch Nails", make_track("1", "Hurt"))
+        self.assertEqual(lyrics, "\r\nI hurt myself today")
@@ -0,0 +1,89 @@
+from unittest import TestCase
+
+from helpers.metrics import MAX_LATENCY_SAMPLES, MAX_TIMELINE_POINTS, NetworkMetrics, endpoint_for_url, percentile
+
+
+class TestNetworkMetrics(TestCase):
+    def setUp(self) -> None:
+        self.metrics = NetworkMetrics()
+
+    def test_endpoint_names(self) -> None:
+        """Assert that MusicBrainz urls are grouped by entity and lyrics urls are grouped together."""
+        self.assertEqual(endpoint_for_url("https://musicbrainz.org/ws/2/recording/?query=arid:1"), "recording")
+        self.assertEqual(endpoint_for_url("https://musicbrainz.org/ws/2/artist/1?inc=tags"), "artist")
+        self.assertEqual(endpoint_for_url("https://api.lyrics.ovh/v1/Artist/Title"), "lyrics")
+
+    def test_requests_are_counted_by_status(self) -> None:
+        """Assert that each measured request is counted under its endpoint and response status."""
+        for status in (200, 200, 503):
+            with self.metrics.measure("https://api.lyrics.ovh/v1/a/b") as measurement:
+                measurement.status = status
+                measurement.bytes_received = 10
+
+        lyrics = self.metrics.endpoint("lyrics")
+        self.assertEqual(lyrics.requests, 3)
+        self.assertEqual(lyrics.statuses, {200: 2, 503: 1})
+        self.assertEqual(lyrics.bytes_received, 30)
+        self.assertEqual(self.metrics.request_count(), 3)
+
+    def test_exceptions_are_recorded_as_the_status(self) -> None:
+        """Assert that a request that raises is recorded with the exception name as its status."""
+        with self.assertRaises(TimeoutError):
+            with self.metrics.measure("https://api.lyrics.ovh/v1/a/b"):
+                raise TimeoutError
+        self.assertEqual(self.metrics.endpoint("lyrics").statuses, {"TimeoutError": 1})
+
+    def test_in_flight_requests_are_tracked(self) -> None:
+        """Assert that the most requests in flight at once is recorded."""
+        with self.metrics.measure("https://api.lyrics.ovh/v1/a/b"):
+            with self.metrics.measure("https://api.lyrics.ovh/v1/a/c"):
+                self.assertEqual(self.metrics.in_flight, 2)
+        self.assertEqual(self.metrics.in_flight, 0)
+        self.assertEqual(self.metrics.max_in_flight, 2)
+
+    def test_percentiles(self) -> None:
+        """Assert that percentiles use the nearest rank of the sorted values."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_prometheus_output(self) -> None:
+        """Assert that the Prometheus output includes the request counter and a complete latency histogram."""
+        with self.metrics.measure("https://musicbrainz.org/ws/2/recording/?query=arid:1") as measurement:
+            measurement.status = 200
+        output = self.metrics.to_prometheus()
+        self.assertIn('lyrics_avg_requests_total{endpoint="recording",status="200"} 1', output)
+        self.assertIn('lyrics_avg_request_duration_seconds_bucket{endpoint="recording",le="+Inf"} 1', output)
+        self.assertIn('lyrics_avg_request_duration_seconds_count{endpoint="recording"} 1', output)
+
+    def test_latency_memory_is_bounded(self) -> None:
+        """Assert that only the most recent latencies are kept, while the histogram counts every latency."""
+        endpoint = self.metrics.endpoint("lyrics")
+        for _ in range(MAX_LATENCY_SAMPLES):
+            endpoint.record_latency(60.0)
+        for _ in range(MAX_LATENCY_SAMPLES):
+            endpoint.record_latency(0.01)
+        self.assertEqual(len(endpoint.latencies), MAX_LATENCY_SAMPLES)
+        self.assertEqual(endpoint.summary()["latency_seconds"]["p99"], 0.01)
+        self.assertEqual(endpoint.summary()["latency_seconds"]["max"], 60.0)
+
+        output = self.metrics.to_prometheus()
+        histogram = 'lyrics_avg_request_duration_seconds_bucket{endpoint="lyrics",le='
+        self.assertIn(f'{histogram}"0.05"}} {MAX_LATENCY_SAMPLES}', output)
+        self.assertIn(f'{histogram}"30.0"}} {MAX_LATENCY_SAMPLES}', output)
+        self.assertIn(f'{histogram}"+Inf"}} {2 * MAX_LATENCY_SAMPLES}', output)
+
+    def test_concurrency_timeline_is_bounded(self) -> None:
+        """Assert that the concurrency timeline is reduced as it grows, without changing the most requests in flight."""
+        for _ in range(5 * MAX_TIMELINE_POINTS):
+            with self.metrics.measure("https://api.lyrics.ovh/v1/a/b"):
+                with self.metrics.measure("https://api.lyrics.ovh/v1/a/c"):
+                    pass
+        self.assertLess(len(self.metrics._concurrency_timeline), 2 * MAX_TIMELINE_POINTS)
+        timeline = self.metrics.concurrency_timeline()
+        self.assertLessEqual(len(timeline), MAX_TIMELINE_POINTS)
+        self.assertEqual(max(in_flight for _, in_flight in timeline), 2)
+        self.assertGreater(self.metrics.average_in_flight(), 0)
+        self.assertLessEqual(self.metrics.average_in_flight(), 2)
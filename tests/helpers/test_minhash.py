@@ -0,0 +1,32 @@
+from unittest import TestCase
+
+import numpy as np
+
+from helpers.minhash import MinHashLSH, jaccard_similarity, shingle
+
+
+class TestMinHashLSH(TestCase):
+    def test_shingles(self) -> None:
+        self.assertEqual(shingle("song"), {"^so", "son", "ong", "ng$"})
+        self.assertEqual(shingle("a"), {"^a$"})
+
+    def test_signature_agreement_estimates_similarity(self) -> None:
+        """Assert that the proportion of matching signature positions is close to the Jaccard similarity."""
+        lsh = MinHashLSH(permutations=256, bands=16)
+        first, second = shingle("head like a hole"), shingle("head like a hole baby")
+        agreement = np.mean(lsh.signature(first) == lsh.signature(second))
+        self.assertAlmostEqual(agreement, jaccard_similarity(first, second), delta=0.1)
+
+    def test_groups(self) -> None:
+        """Assert that near duplicates are grouped under the first of them, and different titles aren't grouped."""
+        titles = ["head like a hole", "closer", "head like a hole!", "hurt", "closer", "part 1", "part 2"]
+        groups = MinHashLSH(threshold=0.8).group([shingle(title) for title in titles])
+        self.assertEqual(groups, [0, 1, 0, 3, 1, 5, 6])
+
+    def test_groups_are_the_same_every_run(self) -> None:
+        shingle_sets = [shingle(f"song number {index}") for index in range(50)]
+        self.assertEqual(MinHashLSH(threshold=0.6).group(shingle_sets), MinHashLSH(threshold=0.6).group(shingle_sets))
+
+    def test_bands_must_divide_the_signature(self) -> None:
+        with self.assertRaises(ValueError):
+            MinHashLSH(permutations=64, bands=10)
@@ -0,0 +1,61 @@
+import asyncio
+import time
+from unittest import TestCase, IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from helpers.rate_limiter import TokenBucket, get_rate_limiter, parse_retry_after
+
+
+class TestTokenBucket(IsolatedAsyncioTestCase):
+    async def test_requests_are_paced_to_the_rate(self) -> None:
+        """Assert that concurrent requests are spread out to the limiter's rate rather than made at once."""
+        limiter = TokenBucket(rate=50)
+        timer_start = time.monotonic()
+        await asyncio.gather(*[limiter.acquire() for _ in range(6)])
+        # The first request goes straight away, each one after that waits 1/50th of a second
+        self.assertGreaterEqual(time.monotonic() - timer_start, 5 / 50)
+
+    async def test_capacity_allows_a_burst(self) -> None:
+        """Assert that up to `capacity` requests can be made without waiting."""
+        limiter = TokenBucket(rate=1, capacity=3)
+        timer_start = time.monotonic()
+        await asyncio.gather(*[limiter.acquire() for _ in range(3)])
+        self.assertLess(time.monotonic() - timer_start, 0.5)
+
+    async def test_penalise_blocks_requests(self) -> None:
+        """Assert that after a Retry-After penalty no request is allowed until the penalty has passed."""
+        limiter = TokenBucket(rate=100)
+        limiter.penalise(0.2)
+        timer_start = time.monotonic()
+        await limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - timer_start, 0.2)
+
+    def test_sync_and_async_requests_share_a_budget(self) -> None:
+        """Assert that a sync request uses up the same slot an async request would."""
+        limiter = TokenBucket(rate=10)
+        limiter.acquire_sync()
+        timer_start = time.monotonic()
+        asyncio.run(limiter.acquire())
+        self.assertGreaterEqual(time.monotonic() - timer_start, 0.09)
+
+
+class TestRateLimiterHelpers(TestCase):
+    def test_limiter_is_shared_per_host(self) -> None:
+        """Assert that every url on the same host gets the same limiter, and unknown hosts aren't limited."""
+        limiter = get_rate_limiter("https://musicbrainz.org/ws/2/recording/?query=test")
+        self.assertIs(limiter, get_rate_limiter("musicbrainz.org"))
+        self.assertIsNone(get_rate_limiter("https://api.lyrics.ovh/v1/artist/title"))
+
+    def test_retry_after_seconds(self) -> None:
+        """Assert that a Retry-After value given in seconds is parsed."""
+        self.assertEqual(parse_retry_after("3", 1.0), 3.0)
+
+    def test_retry_after_date(self) -> None:
+        """Assert that a Retry-After value given as an HTTP date is converted into seconds from now."""
+        with patch("helpers.rate_limiter.time.time", return_value=784111767.0):
+            self.assertEqual(parse_retry_after("Sun, 06 Nov 1994 08:49:37 GMT", 1.0), 10.0)
+
+    def test_missing_or_invalid_retry_after_uses_default(self) -> None:
+        """Assert that the default wait is used when the header is missing or can't be parsed."""
+        self.assertEqual(parse_retry_after(None, 1.0), 1.0)
+        self.assertEqual(parse_retry_after("soon", 1.0), 1.0)
@@ -0,0 +1,62 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import patch
+
+import numpy as np
+
+import flags
+from helpers.data import Artist
+from helpers.data_collection_helpers import get_song_lyrics
+from helpers.running_stats import RunningStatistics
+from helpers.track_table import TrackTable
+from .factories import make_track
+
+
+class TestRunningStatistics(TestCase):
+    def test_matches_the_track_table(self) -> None:
+        """Assert that the running mean and standard deviation are the same as the TrackTable's."""
+        word_counts = [120, 85, 301, 85, 450, 301, 12, 199, 12, 450, 64]
+        tracks = [make_track(str(index), word_count=count) for index, count in enumerate(word_counts)]
+        running_statistics = RunningStatistics()
+        for track in tracks:
+            running_statistics.add(track)
+
+        expected = TrackTable(tracks).statistics()
+        self.assertEqual(running_statistics.count, expected["track_count"])
+        self.assertAlmostEqual(running_statistics.mean, np.mean(word_counts))
+        self.assertAlmostEqual(running_statistics.std_dev, expected["std_dev"])
+        self.assertAlmostEqual(running_statistics.variance, expected["variance"])
+
+    def test_no_tracks(self) -> None:
+        running_statistics = RunningStatistics()
+        self.assertEqual(running_statistics.variance, 0)
+
+    def test_summary(self) -> None:
+        running_statistics = RunningStatistics()
+        for word_count in (10, 20, 30):
+            running_statistics.add(make_track(str(word_count), word_count=word_count))
+        self.assertEqual(running_statistics.summary(), "Average of 20 ± 8 words after 3 tracks")
+
+
+class TestLiveStatistics(IsolatedAsyncioTestCase):
+    def tearDown(self) -> None:
+        flags.LIVE_STATISTICS = False
+
+    async def test_statistics_are_shown_as_lyrics_are_found(self) -> None:
+        """Assert that the running statistics are shown in the order lyrics are found, while the results are still
+        returned in track order."""
+        async def make_lyrics_request(session, artist, track, limiter):
+            await asyncio.sleep(0.01 * int(track.mb_id))
+            return track if track.word_count else None
+
+        flags.LIVE_STATISTICS = True
+        shown = []
+        tracks = [make_track("3", word_count=30), make_track("1", word_count=10), make_track("2", word_count=0)]
+        with patch("helpers.data_collection_helpers.make_lyrics_request", make_lyrics_request), \
+                patch("helpers.data_collection_helpers.print_running_statistics",
+                      lambda running_statistics: shown.append(running_statistics.summary())):
+            recordings_with_lyrics, err = await get_song_lyrics(None, tracks, Artist("", "Artist", "artist", ""))
+
+        self.assertIsNone(err)
+        self.assertEqual([track.mb_id for track in recordings_with_lyrics], ["3", "1"])
+        self.assertEqual(shown, ["Average of 10 ± 0 words after 1 tracks", "Average of 20 ± 10 words after 2 tracks"])
@@ -0,0 +1,94 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from aiohttp import test_utils
+
+from helpers.analysis import DEADLINE_REACHED, NOT_FOUND, UPSTREAM_ERROR
+from helpers.server import ArtistResults, create_app
+
+MB_ID = "b7ffd2af-418f-4be2-bdd1-22f8b48613da"
+MISSING_ID = "00000000-0000-0000-0000-000000000000"
+UNAVAILABLE_ID = "00000000-0000-0000-0000-000000000502"
+SLOW_ID = "00000000-0000-0000-0000-000000000504"
+
+
+class TestArtistAverage(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.analysed = []
+        self.sessions = set()
+        self.failures = {
+            MISSING_ID: ("No artist found!", NOT_FOUND),
+            UNAVAILABLE_ID: ("ClientConnectorError: Cannot connect to host", UPSTREAM_ERROR),
+            SLOW_ID: ("Deadline reached before all songs were found!", DEADLINE_REACHED),
+        }
+
+        async def analyse_artist(session, query, limiter):
+            self.analysed.append(query)
+            self.sessions.add((session, limiter))
+            await asyncio.sleep(0.05)
+            if query in self.failures:
+                error, failure = self.failures[query]
+                return {"query": query, "error": error, "failure": failure}
+            return {"query": query, "artist": "Nine Inch Nails", "mb_id": query, "average_word_count": 212}
+
+        patcher = patch("helpers.server.analyse_artist", analyse_artist)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = test_utils.TestClient(test_utils.TestServer(create_app()))
+        await self.client.start_server()
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        # Every request shares one session and lyrics limiter
+        self.assertLessEqual(len(self.sessions), 1)
+        for session, _ in self.sessions:
+            self.assertTrue(session.closed)
+
+    async def test_average(self) -> None:
+        """Assert that an artist's statistics are returned as JSON, and served from memory the next time."""
+        for _ in range(2):
+            response = await self.client.get(f"/artists/{MB_ID.upper()}/average")
+            self.assertEqual(response.status, 200)
+            self.assertEqual((await response.json())["average_word_count"], 212)
+        self.assertEqual(self.analysed, [MB_ID])
+
+    async def test_concurrent_requests_share_an_analysis(self) -> None:
+        responses = await asyncio.gather(*(self.client.get(f"/artists/{MB_ID}/average") for _ in range(5)))
+        self.assertEqual([response.status for response in responses], [200] * 5)
+        self.assertEqual(self.analysed, [MB_ID])
+
+    async def test_errors(self) -> None:
+        """Assert that an invalid ID is rejected without analysing anything, and failed analyses aren't kept."""
+        response = await self.client.get("/artists/Nine Inch Nails/average")
+        self.assertEqual(response.status, 400)
+        self.assertEqual(self.analysed, [])
+
+        for _ in range(2):
+            response = await self.client.get(f"/artists/{MISSING_ID}/average")
+            self.assertEqual(response.status, 404)
+            self.assertEqual(
+                await response.json(), {"query": MISSING_ID, "error": "No artist found!", "failure": NOT_FOUND}
+            )
+        self.assertEqual(self.analysed, [MISSING_ID, MISSING_ID])
+
+    async def test_upstream_errors(self) -> None:
+        """Assert that failed requests and running out of time aren't reported as the artist not existing."""
+        for mb_id, status in [(UNAVAILABLE_ID, 502), (SLOW_ID, 504)]:
+            response = await self.client.get(f"/artists/{mb_id}/average")
+            self.assertEqual(response.status, status)
+            self.assertEqual((await response.json())["error"], self.failures[mb_id][0])
+
+
+class TestArtistResults(IsolatedAsyncioTestCase):
+    async def test_results_expire(self) -> None:
+        analysed = []
+
+        async def analyse(mb_id):
+            analysed.append(mb_id)
+            return {"mb_id": mb_id}
+
+        results = ArtistResults(ttl=0)
+        await results.get(MB_ID, analyse)
+        await results.get(MB_ID, analyse)
+        self.assertEqual(analysed, [MB_ID, MB_ID])
@@ -0,0 +1,45 @@
+import random
+from unittest import TestCase
+
+from helpers.simhash import SimHashIndex, hamming_distance, lyrics_fingerprint
+
+LYRICS = (
+    "I hurt myself today\r\nTo see if I still feel\r\nI focus on the pain\r\nThe only thing that's real\r\n\r\n"
+    "The needle tears a hole\r\nThe old familiar sting\r\nTry to kill it all away\r\nBut I remember everything"
+)
+
+
+class TestLyricsFingerprint(TestCase):
+    def test_formatting_doesnt_change_the_fingerprint(self) -> None:
+        """Assert that case, punctuation and whitespace differences give the same fingerprint."""
+        reformatted = LYRICS.upper().replace("\r\n\r\n", "\n").replace("\r\n", "\n").replace("'", "")
+        self.assertEqual(lyrics_fingerprint(LYRICS), lyrics_fingerprint(reformatted.replace("THATS", "THAT'S")))
+
+    def test_similar_lyrics_have_close_fingerprints(self) -> None:
+        """Assert that changing a word in song length lyrics only moves the fingerprint a few bits, but different
+        lyrics are far apart."""
+        rng = random.Random(1)
+        words = [f"word{rng.randrange(500)}" for _ in range(300)]
+        lyrics = " ".join(words)
+        changed = " ".join(words[:150] + ["different"] + words[151:])
+        self.assertLessEqual(hamming_distance(lyrics_fingerprint(lyrics), lyrics_fingerprint(changed)), 3)
+        self.assertGreater(hamming_distance(lyrics_fingerprint(LYRICS), lyrics_fingerprint(lyrics)), 12)
+
+    def test_empty_lyrics(self) -> None:
+        self.assertEqual(lyrics_fingerprint(" \r\n "), 0)
+        self.assertNotEqual(lyrics_fingerprint("Hurt"), 0)
+
+
+class TestSimHashIndex(TestCase):
+    def test_finds_fingerprints_within_the_distance(self) -> None:
+        """Assert that fingerprints differing by up to `max_distance` bits are found, even with a differing bit in
+        3 of the 4 blocks, and fingerprints further away aren't."""
+        index = SimHashIndex(max_distance=3)
+        fingerprint = 0x0123456789ABCDEF
+        index.add(fingerprint, "song")
+        self.assertEqual(index.find(fingerprint ^ (1 | 1 << 16 | 1 << 32)), "song")
+        self.assertIsNone(index.find(fingerprint ^ (1 | 1 << 16 | 1 << 32 | 1 << 48)))
+
+    def test_distance_must_be_under_the_number_of_blocks(self) -> None:
+        with self.assertRaises(ValueError):
+            SimHashIndex(max_distance=4)
@@ -0,0 +1,69 @@
+import statistics
+from unittest import TestCase
+
+import numpy as np
+
+from helpers.data import ReleaseRegistry
+from helpers.track_table import TrackTable, UNKNOWN_RELEASE_TYPE, UNKNOWN_YEAR, parse_release_year
+from .factories import make_track
+
+
+class TestTrackTable(TestCase):
+    def test_statistics_match_the_statistics_module(self) -> None:
+        """Assert that the vectorised statistics are the same as calculating them over a list of word counts."""
+        word_counts = [120, 85, 301, 85, 450, 301, 12, 199]
+        table = TrackTable([make_track(str(index), word_count=count) for index, count in enumerate(word_counts)])
+        stats = table.statistics()
+
+        self.assertEqual(stats["track_count"], len(word_counts))
+        self.assertEqual(stats["average_word_count"], int(statistics.mean(word_counts)))
+        self.assertAlmostEqual(stats["std_dev"], statistics.pstdev(word_counts))
+        self.assertAlmostEqual(stats["variance"], statistics.pvariance(word_counts))
+        self.assertEqual((stats["min_word_count"], stats["min_track"]), (12, "Song 6"))
+        # The first of the tracks with the most words is used
+        self.assertEqual((stats["max_word_count"], stats["max_track"]), (450, "Song 4"))
+        self.assertEqual(stats["median_word_count"], statistics.median(word_counts))
+        self.assertAlmostEqual(stats["p90_word_count"], statistics.quantiles(word_counts, n=10, method="inclusive")[-1])
+
+    def test_columns(self) -> None:
+        """Assert that the release year and type columns are filled in from each track's release."""
+        releases = ReleaseRegistry()
+        table = TrackTable([
+            make_track("1", release_name="The Downward Spiral", date="1994-03-08", releases=releases, word_count=10),
+            make_track("2", release_name="Down in It", release_type="Single", date="1989", releases=releases,
+                       word_count=20),
+            make_track("3", release_name="Demos", release_type="Mixtape", date="", releases=releases, word_count=30),
+        ])
+        self.assertEqual(table.years.tolist(), [1994, 1989, UNKNOWN_YEAR])
+        self.assertEqual(table.release_types.tolist(), [0, 1, UNKNOWN_RELEASE_TYPE])
+        self.assertEqual(table.word_counts.tolist(), [10, 20, 30])
+
+    def test_dated_rows_are_sorted_by_year(self) -> None:
+        """Assert that undated tracks are left out, and tracks from the same year keep the order they were found in."""
+        table = TrackTable([
+            make_track("1", date="2005-01-01"),
+            make_track("2", date=None),
+            make_track("3", date="1994"),
+            make_track("4", date="2005-06-01"),
+        ])
+        self.assertEqual(table.dated_rows_by_year().tolist(), [2, 0, 3])
+
+    def test_release_years(self) -> None:
+        self.assertEqual(parse_release_year("1994-03-08"), 1994)
+        self.assertEqual(parse_release_year("1994"), 1994)
+        self.assertEqual(parse_release_year(""), UNKNOWN_YEAR)
+        self.assertEqual(parse_release_year(None), UNKNOWN_YEAR)
+
+    def test_yearly_word_count_quartiles(self) -> None:
+        """Assert that each year's quartiles are the same as numpy.percentile of that year's word counts."""
+        word_counts = [120, 85, 301, 85, 450, 301, 12, 199, 64]
+        dates = ["2005", "1994", "2005", None, "1994-03-08", "2005", "2010", "2005", "1994"]
+        table = TrackTable([make_track(str(index), date=date, word_count=count) for index, (count, date)
+                            in enumerate(zip(word_counts, dates))])
+        years, lower_quartiles, medians, upper_quartiles = table.yearly_word_count_quartiles()
+
+        self.assertEqual(years.tolist(), [1994, 2005, 2010])
+        for year, lower_quartile, median, upper_quartile in zip(years, lower_quartiles, medians, upper_quartiles):
+            year_word_counts = [count for count, date in zip(word_counts, dates) if date and date.startswith(str(year))]
+            expected = np.percentile(year_word_counts, [25, 50, 75]).tolist()
+            self.assertEqual([lower_quartile, median, upper_quartile], expected)
@@ -0,0 +1,58 @@
+import re
+from unittest import TestCase
+
+import flags
+from helpers.data import Track
+from helpers.variant_classifier import (
+    VariantClassifier,
+    get_variant_classifier,
+    reset_variant_classifier,
+)
+from .factories import make_track
+
+
+def original_is_re_release_or_instrumental(track: Track) -> bool:
+    """The original implementation, which cleaned and split both names for every check."""
+    track_name_words = re.sub("[()]", '', track.name.lower()).split(" ")
+    release_name_words = re.sub("[()]", '', track.release.name.lower()).split(" ")
+    return any(
+        keyword in track_name_words or keyword in release_name_words for keyword in flags.DEFAULT_VARIANT_KEYWORDS
+    )
+
+
+class TestVariantClassifier(TestCase):
+    def tearDown(self) -> None:
+        flags.VARIANT_KEYWORDS = []
+        reset_variant_classifier()
+
+    def test_matches_the_original_checks(self) -> None:
+        """Assert that the classifier gives the same verdicts as cleaning and splitting the names each time."""
+        classifier = VariantClassifier()
+        names = ["Closer", "Closer (Live)", "Alive", "Mixed Up", "Hurt (demo)", "Hurt - Instrumental", "Mono",
+                 "Head Like a Hole (5.1 mix)", "(Version)", "Take Five", "Mastered", "live:", ""]
+        for name in names:
+            for release_name in ["Album", "Live in Berlin", "Deluxe Edition", "Remixes"]:
+                track = make_track(name, name, release_name, release_id=release_name)
+                self.assertEqual(classifier.is_variant(track), original_is_re_release_or_instrumental(track),
+                                 f"{name} on {release_name}")
+
+    def test_release_verdicts_are_cached_by_mbid(self) -> None:
+        """Assert that a release is only classified once, however many of its tracks are checked."""
+        classifier = VariantClassifier()
+        track = make_track("1", "Closer", "Live in Berlin")
+        self.assertTrue(classifier.is_variant(track))
+        # A release's name can't change, so its cached verdict is used even if it somehow did
+        track.release.name = "Album"
+        self.assertTrue(classifier.is_variant_release(track.release))
+
+    def test_custom_keywords(self) -> None:
+        """Assert that user supplied keywords replace the defaults and are matched case-insensitively."""
+        classifier = VariantClassifier(["Bonus"])
+        self.assertTrue(classifier.is_variant(make_track("1", "Closer (Bonus)")))
+        self.assertFalse(classifier.is_variant(make_track("2", "Closer (live)")))
+
+    def test_shared_classifier_uses_the_flags(self) -> None:
+        flags.VARIANT_KEYWORDS = ["bonus"]
+        reset_variant_classifier()
+        self.assertEqual(get_variant_classifier().keywords, {"bonus"})
+        self.assertIs(get_variant_classifier(), get_variant_classifier())
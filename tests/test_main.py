@@ -0,0 +1,31 @@
+import subprocess
+import sys
+from unittest import TestCase
+
+from benchmarks.startup_time import HEAVY_MODULES, MAIN_SCRIPT, measure_startup
+from main import build_arg_parser
+
+
+class TestMain(TestCase):
+    def test_help_does_not_import_heavy_modules(self) -> None:
+        """Assert that showing the help doesn't import the plotting, numerical or network stacks."""
+        _, modules = measure_startup()
+        self.assertTrue(modules)
+        self.assertEqual({module.split(".")[0] for module in modules}.intersection(HEAVY_MODULES), set())
+
+    def test_arguments(self) -> None:
+        args = build_arg_parser().parse_args(["-s", "--lyrics-providers", "local, lyrics.ovh", "--deadline", "5"])
+        self.assertTrue(args.statistics)
+        self.assertEqual(args.lyrics_providers, ["local", "lyrics.ovh"])
+        self.assertEqual(args.deadline, 5)
+        self.assertFalse(args.graph)
+
+    def test_serve_on_port_zero_is_a_mode(self) -> None:
+        """Assert that `--serve 0`, which serves on any free port, can't be combined with another mode."""
+        self.assertEqual(build_arg_parser().parse_args(["--serve", "0"]).serve, 0)
+        result = subprocess.run(
+            [sys.executable, MAIN_SCRIPT, "--compare", "Tool", "Nine Inch Nails", "--serve", "0"],
+            capture_output=True, text=True,
+        )
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("only one of --batch, --compare, and --serve", result.stderr)